@@ -49,6 +49,8 @@ INSTALLED_APPS = [
     'docgen',
     'dashboard',
     'transactions',
+    'search',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
@@ -58,10 +60,20 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'manager_entities.middleware.ActiveEntityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# --- REQUEST PROFILING ---
+# Opt-in per-request query count, SQL / template / Python time as Server-Timing
+# headers; requests slower than REQUEST_PROFILING_SLOW_MS are logged on 'benchmarks.requests'
+REQUEST_PROFILING = os.getenv('DJANGO_REQUEST_PROFILING', 'False').lower() in ('true', '1', 'yes')
+REQUEST_PROFILING_SAMPLE_RATE = float(os.getenv('DJANGO_REQUEST_PROFILING_SAMPLE_RATE', '1.0'))
+REQUEST_PROFILING_SLOW_MS = float(os.getenv('DJANGO_REQUEST_PROFILING_SLOW_MS', '500'))
+if REQUEST_PROFILING:
+    MIDDLEWARE.insert(0, 'benchmarks.middleware.RequestProfilingMiddleware')
+
 ROOT_URLCONF = 'aif_compliance.urls'
 
 TEMPLATES = [
@@ -91,6 +103,17 @@ DATABASES = {
     )
 }
 
+# --- CACHE ---
+# Shared by every worker so a write invalidates cached dashboard rollups and FX
+# rates everywhere, not only in the process that made it (the table is created
+# by the dashboard migrations)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
 # --- SECURITY SETTINGS ---
 # When DEBUG is True, we disable all HTTPS/SSL requirements to allow local testing.
 if DEBUG:
@@ -161,6 +184,10 @@ LOGGING = {
         'handlers': ['console'],
         'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
     },
+    'loggers': {
+        # One JSON line per slow profiled request (see REQUEST_PROFILING)
+        'benchmarks.requests': {'level': 'INFO'},
+    },
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from django.views.generic import TemplateView
 from dashboard.views import dashboard_view
+from transactions.views import transaction_list
 from django.conf import settings 
 from django.conf.urls.static import static
 
@@ -17,8 +18,8 @@ urlpatterns = [
     # --- Portal Home ---
     path("portal/", dashboard_view, name="portal-home"),
     
-    # Placeholder for transactions to prevent NoReverseMatch in base.html
-    path("portal/transactions/", TemplateView.as_view(template_name="transactions/transactions_list.html"), name="portal-transactions"),
+    # Master Ledger (unified transaction stream)
+    path("portal/transactions/", transaction_list, name="transaction-ledger"),
 
     # --- App Includes (Namespaced) ---
     path("portal/funds/", include("funds.urls")),
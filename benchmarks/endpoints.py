@@ -0,0 +1,75 @@
+# benchmarks/endpoints.py
+from collections import namedtuple
+
+from django.urls import reverse
+
+# `target` names the sample object whose pk goes in the URL (None for list views).
+# `budget` is the most queries the view may run; it must not depend on the size
+# of the book, so a loop that queries per row (N+1) breaks it on any data set.
+Endpoint = namedtuple('Endpoint', 'name url_name target budget params')
+Endpoint.__new__.__defaults__ = (None,)
+
+ENDPOINTS = [
+    # --- Portal ---
+    Endpoint('dashboard', 'portal-home', None, 18),
+    Endpoint('fund list', 'funds:portal-funds', None, 4),
+    Endpoint('fund detail', 'funds:fund_detail', 'fund', 6),
+    Endpoint('fund portfolio', 'funds:fund_portfolio', 'fund', 4),
+    Endpoint('fund performance', 'funds:performance-report', 'fund', 13),
+    Endpoint('fund activity', 'funds:activity-log', 'fund', 9),
+    Endpoint('investor list', 'investors:portal-list', None, 7),
+    Endpoint('investor detail', 'investors:portal-detail', 'investor', 18),
+    Endpoint('company list', 'investee_companies:portal-list', None, 4),
+    Endpoint('company detail', 'investee_companies:portal-detail', 'company', 6),
+    Endpoint('cap table', 'investee_companies:cap-table', 'company', 7),
+    Endpoint('compliance tasks', 'compliances:task-list', None, 10),
+    Endpoint('compliance task', 'compliances:task-detail', 'task', 8),
+    Endpoint('compliance calendar', 'compliances:calendar', None, 3),
+    Endpoint('compliance reports', 'compliances:reports', None, 5),
+    Endpoint('transactions', 'portal-transactions', None, 6),
+    Endpoint('transaction ledger', 'transaction-ledger', None, 8),
+    # --- API ---
+    Endpoint('api funds', 'fund-list', None, 5),
+    Endpoint('api investors', 'investor-list', None, 6),
+    Endpoint('api companies', 'company-list', None, 5),
+    Endpoint('api commitments', 'investorcommitment-list', None, 4),
+    Endpoint('api calls', 'capitalcall-list', None, 4),
+    Endpoint('api receipts', 'drawdownreceipt-list', None, 4),
+    Endpoint('api purchases', 'purchase-list', None, 4),
+    Endpoint('api compliance tasks', 'compliance-task-list', None, 4),
+    Endpoint('api search', 'global-search', None, 4, {'q': 'fund'}),
+]
+
+
+def sample_targets(entity_id):
+    """
+    Picks one representative fund, investor, company and task of the entity
+    for the detail views: the fund with the most commitments and objects
+    linked to it, so the detail pages have rows to render.
+    """
+    from django.db.models import Count
+
+    from compliances.models import ComplianceTask
+    from funds.models import Fund
+    from transactions.models import InvestorCommitment, PurchaseTransaction
+
+    fund = (
+        Fund.objects.filter(manager_entity_id=entity_id)
+        .annotate(lps=Count('commitments')).order_by('-lps', 'pk').first()
+    )
+    if fund is None:
+        return {}
+    return {
+        'fund': fund.pk,
+        'investor': InvestorCommitment.objects.filter(fund=fund).values_list('investor_id', flat=True).first(),
+        'company': PurchaseTransaction.objects.filter(fund=fund).values_list('investee_company_id', flat=True).first(),
+        'task': ComplianceTask.objects.filter(fund=fund).values_list('pk', flat=True).first(),
+    }
+
+
+def endpoint_url(endpoint, targets):
+    """The URL for an endpoint, or None when the book has no object for its target."""
+    if endpoint.target is None:
+        return reverse(endpoint.url_name)
+    pk = targets.get(endpoint.target)
+    return reverse(endpoint.url_name, args=[pk]) if pk else None
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from benchmarks.runner import budget_violations, compare, load_baseline, run_benchmarks, write_baseline
+from manager_entities.models import EntityMembership, ManagerEntity
+
+class Command(BaseCommand):
+    help = (
+        'Times the hot portal views and API endpoints (wall time, query count, peak memory), '
+        'writes a JSON baseline and fails when a view exceeds its query budget'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to browse as. Defaults to the first superuser.')
+        parser.add_argument('--entity', type=int, help="Manager entity to browse. Defaults to the user's first.")
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per endpoint')
+        parser.add_argument('--output', help='Write the results to this JSON baseline file')
+        parser.add_argument('--compare', help='Report changes against a previously written baseline')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError("No user to browse as; pass --user.")
+
+        entity_id = options['entity'] or (
+            EntityMembership.objects.filter(user=user).order_by('pk').values_list('entity_id', flat=True).first()
+            or ManagerEntity.objects.order_by('pk').values_list('pk', flat=True).first()
+        )
+        if entity_id is None:
+            raise CommandError("No manager entity to browse; run generate_synthetic_book first.")
+
+        results = run_benchmarks(user, entity_id, repeat=options['repeat'])
+        for r in results:
+            if 'skipped' in r:
+                self.stdout.write(f"  {r['name']:<24} skipped ({r['skipped']})")
+                continue
+            self.stdout.write(
+                f"  {r['name']:<24} {r['status']:>4} {r['queries']:>4}/{r['budget']:<4} queries "
+                f"{r['median_ms'] if r['median_ms'] is not None else '-':>9} ms {r['peak_kib']:>9} KiB"
+            )
+
+        if options['compare']:
+            for name, changed in compare(results, load_baseline(options['compare'])).items():
+                summary = ', '.join(f"{metric} {old} -> {new}" for metric, (old, new) in changed.items())
+                self.stdout.write(f"  changed {name}: {summary}")
+
+        if options['output']:
+            write_baseline(options['output'], results, meta={
+                'recorded_at': timezone.now(), 'user': user.get_username(), 'entity_id': entity_id,
+                'repeat': options['repeat'],
+            })
+            self.stdout.write(f"Wrote baseline to {options['output']}.")
+
+        violations = budget_violations(results)
+        if violations:
+            raise CommandError('Over budget or failing: ' + ', '.join(
+                f"{r['name']} ({r['queries']} queries, budget {r['budget']}, HTTP {r['status']})" for r in violations
+            ))
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} endpoints within their query budgets.'))
@@ -0,0 +1,144 @@
+# benchmarks/middleware.py
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('benchmarks.requests')
+
+# IN (%s, %s, ...) lists of any length share one fingerprint
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+# Literals inlined into raw SQL: quoted strings and bare numbers
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r'\s+')
+
+# Profile of the request being served on this thread, None when not sampled
+_active = threading.local()
+
+
+def fingerprint(sql):
+    """The statement with its parameters and literals reduced to placeholders."""
+    sql = _LITERALS.sub('%s', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class RequestProfile:
+    """Query, SQL-time and template-time totals for one request."""
+
+    def __init__(self):
+        self.queries = Counter()
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries[fingerprint(sql)] += 1
+
+    def duplicates(self, limit=5):
+        """[count, fingerprint] of the statements run more than once, most repeated first."""
+        return [[n, sql[:200]] for sql, n in self.queries.most_common(limit) if n > 1]
+
+
+def _profiled_render(render):
+    """
+    Wraps Template.render so the outermost render of a profiled request
+    adds its time, less the SQL it ran, to the profile. Included and
+    extended templates are counted once as part of their parent.
+    """
+    def wrapper(self, context):
+        profile = getattr(_active, 'profile', None)
+        if profile is None or profile._template_depth:
+            return render(self, context)
+        profile._template_depth += 1
+        started, db_before = time.perf_counter(), profile.db_ms
+        try:
+            return render(self, context)
+        finally:
+            profile._template_depth -= 1
+            elapsed = (time.perf_counter() - started) * 1000
+            profile.template_ms += elapsed - (profile.db_ms - db_before)
+    wrapper.profiled = True
+    return wrapper
+
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in (settings.REQUEST_PROFILING) per-request timing. For a
+    REQUEST_PROFILING_SAMPLE_RATE share of requests it records:
+
+      db   - query count and SQL time over every database connection
+      tpl  - template render time, excluding SQL run from the templates
+      app  - the remaining Python time in middleware and views
+
+    and returns them in a Server-Timing header. Requests that take at
+    least REQUEST_PROFILING_SLOW_MS are also logged on the
+    'benchmarks.requests' logger as one JSON line naming the view, with
+    the fingerprints of the queries it repeated.
+
+    Goes first in MIDDLEWARE so the total covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        self.slow_ms = settings.REQUEST_PROFILING_SLOW_MS
+        if not getattr(Template.render, 'profiled', False):
+            Template.render = _profiled_render(Template.render)
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        _active.profile = profile
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _active.profile = None
+        total_ms = (time.perf_counter() - started) * 1000
+
+        app_ms = max(total_ms - profile.db_ms - profile.template_ms, 0.0)
+        query_count = sum(profile.queries.values())
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={profile.db_ms:.1f};desc="{query_count} queries"',
+            f'tpl;dur={profile.template_ms:.1f}',
+            f'app;dur={app_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        if total_ms >= self.slow_ms:
+            match = request.resolver_match
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'func': f'{match.func.__module__}.{match.func.__name__}' if match else None,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'db_ms': round(profile.db_ms, 1),
+                'template_ms': round(profile.template_ms, 1),
+                'app_ms': round(app_ms, 1),
+                'queries': query_count,
+                'duplicates': profile.duplicates(),
+            }
+            logger.info('request_profile %s', json.dumps(record), extra={'profile': record})
+        return response
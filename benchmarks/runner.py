@@ -0,0 +1,122 @@
+# benchmarks/runner.py
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from currencies.utils import rate_cache
+from .endpoints import ENDPOINTS, endpoint_url, sample_targets
+
+
+def _client(user):
+    # Benchmarks may run outside the test runner, where 'testserver' is not an allowed
+    # host; a view that errors is recorded as a 500 instead of stopping the run
+    client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+    client.force_login(user)
+    return client
+
+
+def measure(client, url, params=None, repeat=5):
+    """
+    Requests `url` once to warm the session, once more with the Django and
+    FX rate caches cleared, under tracemalloc, for the query count and
+    peak memory, then `repeat` more times untraced for the wall time.
+    Counting the cold request keeps an N+1 behind a cache within reach of
+    the budget.
+    Returns {status, queries, peak_kib, median_ms, best_ms}.
+    """
+    client.get(url, params or {})
+    cache.clear()
+    rate_cache.clear()
+    reset_queries()  # a full DEBUG query log would hide new queries from the capture
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params or {})
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        client.get(url, params or {})
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'peak_kib': round(peak / 1024, 1),
+        'median_ms': round(statistics.median(timings), 2) if timings else None,
+        'best_ms': round(min(timings), 2) if timings else None,
+    }
+
+
+def run_benchmarks(user, entity_id, endpoints=ENDPOINTS, repeat=5):
+    """
+    Measures every endpoint as `user` with `entity_id` active. Returns one
+    record per endpoint with its URL, budget and the measure() numbers;
+    endpoints the book has no object for are reported as skipped.
+    """
+    client = _client(user)
+    session = client.session
+    session['active_entity_id'] = entity_id
+    session.save()
+
+    targets = sample_targets(entity_id)
+    results = []
+    for endpoint in endpoints:
+        url = endpoint_url(endpoint, targets)
+        record = {'name': endpoint.name, 'url': url, 'budget': endpoint.budget}
+        if url is None:
+            record['skipped'] = f"no {endpoint.target} in the book"
+        else:
+            record.update(measure(client, url, endpoint.params, repeat))
+        results.append(record)
+    return results
+
+
+def budget_violations(results):
+    """Records that failed or ran more queries than their budget."""
+    return [
+        r for r in results
+        if 'skipped' not in r and (r['status'] >= 400 or r['queries'] > r['budget'])
+    ]
+
+
+def compare(results, baseline):
+    """
+    {endpoint name: {metric: (baseline, current)}} for the query counts,
+    times and memory that changed against a previously written baseline.
+    """
+    before = {r['name']: r for r in baseline.get('endpoints', [])}
+    changes = {}
+    for record in results:
+        old = before.get(record['name'])
+        if not old or 'skipped' in record or 'skipped' in old:
+            continue
+        changed = {
+            metric: (old[metric], record[metric])
+            for metric in ('queries', 'median_ms', 'peak_kib')
+            if old.get(metric) != record.get(metric)
+        }
+        if changed:
+            changes[record['name']] = changed
+    return changes
+
+
+def write_baseline(path, results, meta=None):
+    with open(path, 'w') as fh:
+        json.dump({'meta': meta or {}, 'endpoints': results}, fh, indent=2, default=str)
+        fh.write('\n')
+
+
+def load_baseline(path):
+    with open(path) as fh:
+        return json.load(fh)
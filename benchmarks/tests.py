@@ -0,0 +1,128 @@
+import json
+from functools import partial
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dashboard.services import compute_rollup
+from manager_entities.models import EntityMembership, ManagerEntity
+from funds.models import Fund
+from .endpoints import ENDPOINTS, Endpoint
+from .middleware import RequestProfile, fingerprint
+from .runner import budget_violations, compare, run_benchmarks
+
+
+class EndpointBudgetTest(TestCase):
+    """Every benchmarked endpoint stays within its query budget on a small synthetic book."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_synthetic_book', '--seed', '3', '--entities', '1', '--funds', '2', '--investors', '40',
+            '--lps', '12', '--calls', '3', '--companies', '12', '--trades', '6', '--years', '2', stdout=StringIO(),
+        )
+        cls.entity = ManagerEntity.objects.get(name__startswith="SYN3 ")
+        cls.user = User.objects.create_superuser("bench", "bench@example.com", "pw")
+        EntityMembership.objects.create(user=cls.user, entity=cls.entity, role='ADMIN')
+
+    def test_endpoints_within_budget(self):
+        results = run_benchmarks(self.user, self.entity.pk, repeat=0)
+        self.assertEqual([r['name'] for r in results if 'skipped' in r], [])
+        self.assertEqual(budget_violations(results), [])
+
+    def test_per_row_queries_break_the_budget(self):
+        # The investor list with a budget that only fits an N+1-free page
+        tight = [e._replace(budget=1) for e in ENDPOINTS if e.name == 'investor list']
+        results = run_benchmarks(self.user, self.entity.pk, endpoints=tight, repeat=0)
+        self.assertEqual([r['name'] for r in budget_violations(results)], ['investor list'])
+        self.assertEqual(
+            compare(results, {'endpoints': [dict(results[0], queries=results[0]['queries'] - 1)]}),
+            {'investor list': {'queries': (results[0]['queries'] - 1, results[0]['queries'])}},
+        )
+
+    def test_cached_views_are_counted_cold(self):
+        # The rollup behind the dashboard cache is part of the measured request
+        with CaptureQueriesContext(connection) as rollup:
+            compute_rollup(self.entity.pk)
+        dashboard = [e for e in ENDPOINTS if e.name == 'dashboard']
+        [result] = run_benchmarks(self.user, self.entity.pk, endpoints=dashboard, repeat=0)
+        self.assertGreater(result['queries'], len(rollup))
+
+    def test_command_fails_over_budget(self):
+        out = StringIO()
+        call_command('run_benchmarks', '--user', 'bench', '--repeat', '1', stdout=out)
+        self.assertIn('within their query budgets', out.getvalue())
+
+        tight = [Endpoint('dashboard', 'portal-home', None, 1)]
+        with mock.patch(
+            'benchmarks.management.commands.run_benchmarks.run_benchmarks', partial(run_benchmarks, endpoints=tight)
+        ):
+            with self.assertRaisesMessage(CommandError, 'dashboard'):
+                call_command('run_benchmarks', '--user', 'bench', '--repeat', '0', stdout=StringIO())
+
+
+PROFILED_MIDDLEWARE = ['benchmarks.middleware.RequestProfilingMiddleware'] + settings.MIDDLEWARE
+
+
+class RequestProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("profiler", "profiler@example.com", "pw")
+        cls.entity = ManagerEntity.objects.create(name="Profiled Manager")
+        EntityMembership.objects.create(user=cls.user, entity=cls.entity, role='ADMIN')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_fingerprint_ignores_parameters_and_literals(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "funds_fund" WHERE "id" IN (%s, %s, %s)  LIMIT 21'),
+            fingerprint('SELECT * FROM "funds_fund" WHERE "id" IN (%s) LIMIT 1'),
+        )
+        self.assertEqual(fingerprint("SELECT 1 FROM t WHERE name = 'x'"), "SELECT %s FROM t WHERE name = %s")
+
+    def test_repeated_queries_are_reported(self):
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile):
+            for pk in (1, 2, 3):
+                list(Fund.objects.filter(pk=pk))
+            Fund.objects.count()
+        self.assertEqual(sum(profile.queries.values()), 4)
+        [[count, sql]] = profile.duplicates()
+        self.assertEqual(count, 3)
+        self.assertIn('"funds_fund"', sql)
+
+    @override_settings(MIDDLEWARE=PROFILED_MIDDLEWARE, REQUEST_PROFILING_SAMPLE_RATE=1.0, REQUEST_PROFILING_SLOW_MS=0)
+    def test_slow_requests_get_timing_header_and_log_line(self):
+        with self.assertLogs('benchmarks.requests', 'INFO') as logs:
+            response = self.client.get(reverse('funds:portal-funds'))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, app;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+        [record] = logs.records
+        self.assertEqual(record.profile['view'], 'funds:portal-funds')
+        self.assertGreater(record.profile['queries'], 0)
+        self.assertGreater(record.profile['template_ms'], 0)
+        self.assertEqual(json.loads(record.getMessage().split(' ', 1)[1]), record.profile)
+
+    @override_settings(MIDDLEWARE=PROFILED_MIDDLEWARE, REQUEST_PROFILING_SAMPLE_RATE=1.0, REQUEST_PROFILING_SLOW_MS=60000)
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs('benchmarks.requests', 'INFO'):
+            response = self.client.get(reverse('funds:portal-funds'))
+        self.assertIn('Server-Timing', response)
+
+    @override_settings(MIDDLEWARE=PROFILED_MIDDLEWARE, REQUEST_PROFILING_SAMPLE_RATE=0.0, REQUEST_PROFILING_SLOW_MS=0)
+    def test_unsampled_requests_are_untouched(self):
+        with self.assertNoLogs('benchmarks.requests', 'INFO'):
+            response = self.client.get(reverse('funds:portal-funds'))
+        self.assertNotIn('Server-Timing', response)
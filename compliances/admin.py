@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ComplianceMaster, ComplianceTask, ComplianceDocument
+from .models import ComplianceMaster, ComplianceTask, ComplianceDocument, ComplianceTaskTransition
 
 # --- Inline for Documents ---
 class ComplianceDocumentInline(admin.TabularInline):
@@ -56,4 +56,12 @@ class ComplianceTaskAdmin(admin.ModelAdmin):
 class ComplianceDocumentAdmin(admin.ModelAdmin):
     list_display = ('title', 'task', 'uploaded_at', 'uploaded_by')
     list_filter = ('uploaded_at',)
-    search_fields = ('title', 'task__title')
\ No newline at end of file
+    search_fields = ('title', 'task__title')
+
+# --- 4. Status Transition Log ---
+@admin.register(ComplianceTaskTransition)
+class ComplianceTaskTransitionAdmin(admin.ModelAdmin):
+    list_display = ('task', 'from_status', 'to_status', 'changed_at', 'reason')
+    list_filter = ('to_status',)
+    list_select_related = ('task',)
+    date_hierarchy = 'changed_at'
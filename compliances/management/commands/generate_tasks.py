@@ -6,86 +6,118 @@ from dateutil.relativedelta import relativedelta
 
 from funds.models import Fund
 from compliances.models import ComplianceMaster, ComplianceTask
+from search.services import index_objects
+
+# Months between two periods in a recurring chain
+FREQUENCY_MONTHS = {
+    'MONTHLY': 1,
+    'QUARTERLY': 3,
+    'HALF_YEARLY': 6,
+    'ANNUALLY': 12,
+}
+
+
+def period_ends(anchor, frequency, start, end):
+    """
+    Yields month-end period dates of a recurring chain that starts at
+    `anchor`, limited to periods whose anchor month falls in [start, end].
+    """
+    step = FREQUENCY_MONTHS[frequency]
+    # Jump straight to the first link on or after `start` instead of walking from the anchor
+    skipped = 0
+    if anchor < start:
+        diff = relativedelta(start, anchor)
+        skipped = -(-(diff.years * 12 + diff.months + (1 if diff.days else 0)) // step) * step
+
+    check_date = anchor + relativedelta(months=skipped)
+    while check_date <= end:
+        if check_date >= start:
+            last_day = calendar.monthrange(check_date.year, check_date.month)[1]
+            yield date(check_date.year, check_date.month, last_day)
+        skipped += step
+        check_date = anchor + relativedelta(months=skipped)
+
+
+def plan_tasks(rules, funds, start, end):
+    """
+    Builds unsaved ComplianceTask rows for every (rule, fund) period in the window.
+    Pure in-memory work: no queries beyond the already-evaluated inputs.
+    """
+    planned = {}
+    for rule in rules:
+        if rule.frequency not in FREQUENCY_MONTHS:
+            continue
+        for fund in funds:
+            if rule.jurisdiction != fund.jurisdiction:
+                continue
+
+            # Priority: Rule's first_due_date > Fund's date_of_inception > Jan 1st
+            anchor = rule.first_due_date or fund.date_of_inception or date(start.year, 1, 1)
+            for period_end in period_ends(anchor, rule.frequency, start, end):
+                due_date = period_end + timedelta(days=rule.days_after_period)
+                planned[(rule.pk, fund.pk, due_date)] = ComplianceTask(
+                    compliance_master=rule,
+                    fund=fund,
+                    manager_id=fund.manager_entity_id,
+                    due_date=due_date,
+                    title=f"{rule.title} - {period_end.strftime('%b %Y')}",
+                    description=rule.description,
+                    status='PENDING',
+                )
+    return planned
+
 
 class Command(BaseCommand):
     help = 'Generates recurring compliance tasks based on Fund Incorporation or Master Anchor'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, default=12, help='Months ahead to schedule (default 12)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report counts without writing')
+
     def handle(self, *args, **options):
-        self.stdout.write("Mapping out the Compliance Calendar for the next 12 months...")
-        
+        horizon = options['horizon']
+        self.stdout.write(f"Mapping out the Compliance Calendar for the next {horizon} months...")
+
         today = timezone.now().date()
-        one_year_later = today + relativedelta(years=1)
-        
-        # FIX: Define applicable_funds before the loop starts
-        applicable_funds = Fund.objects.all()
-        rules = ComplianceMaster.objects.all()
+        end = today + relativedelta(months=horizon)
 
-        
-        tasks_created = 0
+        funds = list(Fund.objects.only('id', 'jurisdiction', 'date_of_inception', 'manager_entity'))
+        rules = list(ComplianceMaster.objects.exclude(frequency='EVENT_BASED'))
 
-        for rule in rules:
-            if rule.frequency == 'EVENT_BASED':
-                continue
+        # 1. Every candidate period, computed in memory
+        planned = plan_tasks(rules, funds, today, end)
+
+        # 2. One query for what already exists in the window
+        existing = set()
+        if planned:
+            due_dates = [due for _, _, due in planned]
+            existing = set(
+                ComplianceTask.objects.filter(
+                    compliance_master__isnull=False,
+                    fund__isnull=False,
+                    due_date__range=(min(due_dates), max(due_dates)),
+                ).values_list('compliance_master_id', 'fund_id', 'due_date').iterator()
+            )
+        missing = [task for key, task in planned.items() if key not in existing]
+
+        # 3. Insert the gap; the unique constraint absorbs concurrent runs
+        created = len(missing)
+        if not options['dry_run'] and missing:
+            window = ComplianceTask.objects.filter(
+                compliance_master__in=rules, fund__isnull=False,
+                due_date__range=(min(t.due_date for t in missing), max(t.due_date for t in missing)),
+            )
+            # ignore_conflicts drops rows another run inserted first, so count what landed
+            before = window.count()
+            ComplianceTask.objects.bulk_create(
+                missing, batch_size=options['batch_size'], ignore_conflicts=True
+            )
+            created = window.count() - before
+            # bulk_create skips post_save, so index the window's tasks explicitly
+            index_objects(window.select_related('fund'), batch_size=options['batch_size'])
 
-            for fund in applicable_funds:
-
-                if rule.jurisdiction != fund.jurisdiction:
-                    continue
-
-                # 1. Determine the Anchor Date
-                # Priority: Rule's first_due_date > Fund's date_of_inception > Jan 1st
-                anchor_date = rule.first_due_date or fund.date_of_inception or date(today.year, 1, 1)
-                
-                # 2. Start checking from the anchor, but only create tasks for the future
-                check_date = anchor_date
-                
-                # We loop forward month-by-month for 2 years from anchor to cover 
-                # the 1-year window from today
-                while check_date <= one_year_later:
-                    period_end = None
-                    
-                    # Calculate months elapsed from the start of the chain
-                    diff = relativedelta(check_date, anchor_date)
-                    months_elapsed = diff.years * 12 + diff.months
-                    
-                    # 3. Frequency Logic
-                    if rule.frequency == 'MONTHLY':
-                        period_end = check_date
-                    
-                    elif rule.frequency == 'QUARTERLY' and months_elapsed % 3 == 0:
-                        period_end = check_date
-                        
-                    elif rule.frequency == 'HALF_YEARLY' and months_elapsed % 6 == 0:
-                        period_end = check_date
-                        
-                    elif rule.frequency == 'ANNUALLY' and months_elapsed % 12 == 0:
-                        period_end = check_date
-
-                    # 4. Create the Task if valid
-                    if period_end and period_end >= today:
-                        # Normalize to the last day of that month
-                        last_day = calendar.monthrange(period_end.year, period_end.month)[1]
-                        final_period_end = date(period_end.year, period_end.month, last_day)
-                        
-                        due_date = final_period_end + timedelta(days=rule.days_after_period)
-                        
-                        # Generate unique title to prevent duplicates
-                        task_title = f"{rule.title} - {final_period_end.strftime('%b %Y')}"
-                        
-                        task, created = ComplianceTask.objects.get_or_create(
-                            fund=fund,
-                            compliance_master=rule,
-                            due_date=due_date,
-                            defaults={
-                                'title': task_title,
-                                'status': 'PENDING',
-                                'description': rule.description,
-                            }
-                        )
-                        if created:
-                            tasks_created += 1
-
-                    # Increment by 1 month to check the next "link" in the chain
-                    check_date += relativedelta(months=1)
-
-        self.stdout.write(self.style.SUCCESS(f"Successfully created {tasks_created} tasks across {applicable_funds.count()} funds."))
\ No newline at end of file
+        verb = "Would create" if options['dry_run'] else "Created"
+        self.stdout.write(f"Rules: {len(rules)}, funds: {len(funds)}")
+        self.stdout.write(f"Candidate periods: {len(planned)}, already scheduled: {len(planned) - len(missing)}")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {created} tasks across {len(funds)} funds."))
@@ -0,0 +1,58 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from compliances.models import ComplianceTask, ComplianceTaskTransition
+
+OPEN_STATUSES = ('PENDING', 'IN_PROGRESS')
+
+
+def mark_overdue_tasks(as_of=None, batch_size=2000):
+    """
+    Flips open tasks due before `as_of` (default: today) to OVERDUE with a
+    single UPDATE and writes one ComplianceTaskTransition per task.
+    Returns the number of tasks flipped.
+    """
+    as_of = as_of or timezone.now().date()
+    now = timezone.now()
+    due = ComplianceTask.objects.filter(status__in=OPEN_STATUSES, due_date__lt=as_of)
+
+    with transaction.atomic():
+        # Lock the candidates so the log matches exactly what the UPDATE changes
+        candidates = list(due.select_for_update().order_by('pk').values_list('pk', 'status'))
+        if not candidates:
+            return 0
+        # Tasks created after the snapshot are left for the next run
+        flipped = due.filter(pk__lte=candidates[-1][0]).update(status='OVERDUE', updated_at=now)
+
+        ComplianceTaskTransition.objects.bulk_create(
+            (
+                ComplianceTaskTransition(
+                    task_id=pk, from_status=status, to_status='OVERDUE',
+                    changed_at=now, reason=f"Past due date (as of {as_of})",
+                )
+                for pk, status in candidates
+            ),
+            batch_size=batch_size,
+        )
+    return flipped
+
+
+class Command(BaseCommand):
+    help = 'Marks PENDING / IN_PROGRESS compliance tasks past their due date as OVERDUE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', type=date.fromisoformat, help='Cut-off date (YYYY-MM-DD), default today')
+        parser.add_argument('--dry-run', action='store_true', help='Report the count without writing')
+
+    def handle(self, *args, **options):
+        as_of = options['as_of'] or timezone.now().date()
+
+        if options['dry_run']:
+            count = ComplianceTask.objects.filter(status__in=OPEN_STATUSES, due_date__lt=as_of).count()
+            self.stdout.write(f"Would mark {count} tasks as OVERDUE (as of {as_of}).")
+            return
+
+        count = mark_overdue_tasks(as_of)
+        self.stdout.write(self.style.SUCCESS(f"Marked {count} tasks as OVERDUE (as of {as_of})."))
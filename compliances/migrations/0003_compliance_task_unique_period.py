@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tasks(apps, schema_editor):
+    """Keeps the oldest task per (rule, fund, due date) and moves documents onto it."""
+    ComplianceTask = apps.get_model('compliances', 'ComplianceTask')
+    ComplianceDocument = apps.get_model('compliances', 'ComplianceDocument')
+
+    duplicates = (
+        ComplianceTask.objects.filter(compliance_master__isnull=False, fund__isnull=False)
+        .values('compliance_master', 'fund', 'due_date')
+        .annotate(keep=Min('id'), n=Count('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        extra = ComplianceTask.objects.filter(
+            compliance_master=row['compliance_master'], fund=row['fund'], due_date=row['due_date']
+        ).exclude(pk=row['keep'])
+        ComplianceDocument.objects.filter(task__in=extra).update(task_id=row['keep'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliances', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tasks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='compliancetask',
+            constraint=models.UniqueConstraint(fields=('compliance_master', 'fund', 'due_date'), name='unique_compliance_task_period'),
+        ),
+    ]
@@ -114,8 +114,17 @@ class ComplianceTask(models.Model):
 
     class Meta:
         ordering = ['due_date']
-        # Optional: Prevent duplicate tasks for the same rule/fund/date
-        # unique_together = ('compliance_master', 'fund', 'due_date')
+        # Prevent duplicate tasks for the same rule/fund/date
+        constraints = [
+            models.UniqueConstraint(
+                fields=['compliance_master', 'fund', 'due_date'],
+                name='unique_compliance_task_period',
+            ),
+        ]
+        indexes = [
+            # Overdue widgets count status='OVERDUE'; the sweeper scans open tasks by due date
+            models.Index(fields=['status', 'due_date']),
+        ]
     
     def clean(self):
         """Validate that Fund is present if the Master Rule says it's a FUND scope."""
@@ -150,6 +159,24 @@ class ComplianceTask(models.Model):
         return self.status != 'COMPLETED' and self.due_date < timezone.now().date()
 
 
+class ComplianceTaskTransition(models.Model):
+    """
+    Audit trail of status changes made outside the task form,
+    e.g. the overdue sweeper flipping PENDING tasks to OVERDUE.
+    """
+    task = models.ForeignKey(ComplianceTask, on_delete=models.CASCADE, related_name='transitions')
+    from_status = models.CharField(max_length=20, choices=ComplianceTask.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=ComplianceTask.STATUS_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    reason = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ['-changed_at']
+
+    def __str__(self):
+        return f"{self.task_id}: {self.from_status} -> {self.to_status}"
+
+
 def compliance_upload_path(instance, filename):
     return f"compliances/task_{instance.task.id}/{filename}"
 
@@ -0,0 +1,6 @@
+from django.tasks import task
+from django.core.management import call_command
+
+@task()
+def sweep_overdue_compliance_tasks():
+    call_command('mark_overdue_tasks')
@@ -1,3 +1,235 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from currencies.models import Currency
+from funds.models import Fund
+from manager_entities.models import ManagerEntity
+from search.models import SearchDocument
+from .management.commands.generate_tasks import plan_tasks
+from .management.commands.mark_overdue_tasks import mark_overdue_tasks
+from .models import ComplianceMaster, ComplianceTask, ComplianceTaskTransition
+
+
+class GenerateTasksTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        entity = ManagerEntity.objects.create(name="Calendar Manager")
+        cls.fund = Fund.objects.create(
+            name="Calendar Fund", manager_entity=entity, currency=currency,
+            jurisdiction='DOMESTIC', date_of_inception=timezone.now().date()
+        )
+        Fund.objects.create(name="GIFT Fund", manager_entity=entity, currency=currency, jurisdiction='IFSC')
+        ComplianceMaster.objects.create(
+            title="Monthly Report", description="", jurisdiction='DOMESTIC', frequency='MONTHLY'
+        )
+        ComplianceMaster.objects.create(
+            title="CTR", description="", jurisdiction='DOMESTIC', frequency='QUARTERLY', days_after_period=15
+        )
+        ComplianceMaster.objects.create(
+            title="Ad hoc", description="", jurisdiction='DOMESTIC', frequency='EVENT_BASED'
+        )
+
+    def run_command(self, **options):
+        out = StringIO()
+        call_command('generate_tasks', stdout=out, **options)
+        return out.getvalue()
+
+    def test_dry_run_reports_without_writing(self):
+        output = self.run_command(horizon=3, dry_run=True)
+
+        self.assertIn("Would create 6 tasks", output)
+        self.assertFalse(ComplianceTask.objects.exists())
+
+    def test_rerun_is_idempotent(self):
+        self.run_command(horizon=3)
+        output = self.run_command(horizon=3)
+
+        self.assertIn("Created 0 tasks", output)
+        self.assertEqual(ComplianceTask.objects.filter(fund=self.fund).count(), 6)
+        self.assertEqual(ComplianceTask.objects.filter(manager=self.fund.manager_entity).count(), 6)
+        # bulk-created tasks still reach the search index
+        self.assertEqual(SearchDocument.objects.filter(kind='TASK').count(), 6)
+
+    def test_reports_only_the_rows_inserted(self):
+        planned, lookups = [], []
+        task_filter = ComplianceTask.objects.filter
+
+        def plan(*args):
+            tasks = plan_tasks(*args)
+            planned.extend(tasks.values())
+            return tasks
+
+        def concurrent_run_between(*args, **kwargs):
+            # Another run inserts a planned period after this one checked what exists
+            lookups.append(kwargs)
+            if len(lookups) == 2:
+                task = planned[0]
+                ComplianceTask.objects.create(
+                    compliance_master=task.compliance_master, fund=task.fund, due_date=task.due_date, title=task.title,
+                )
+            return task_filter(*args, **kwargs)
+
+        with mock.patch('compliances.management.commands.generate_tasks.plan_tasks', side_effect=plan), \
+                mock.patch.object(ComplianceTask.objects, 'filter', side_effect=concurrent_run_between):
+            output = self.run_command(horizon=3)
+
+        self.assertIn("Created 5 tasks", output)
+        self.assertEqual(ComplianceTask.objects.filter(fund=self.fund).count(), 6)
+
+    def test_longer_horizon_only_adds_new_periods(self):
+        self.run_command(horizon=3)
+        output = self.run_command(horizon=6)
+
+        self.assertIn("Created 4 tasks", output)
+
+
+class CalendarViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from datetime import date
+        from django.contrib.auth.models import User
+
+        cls.user = User.objects.create_user(username="calendar", password="pass")
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        entity = ManagerEntity.objects.create(name="Calendar Manager")
+        cls.fund = Fund.objects.create(name="Calendar Fund", manager_entity=entity, currency=currency)
+        for day, title in ((date(2025, 3, 15), "CTR, Q4; final"), (date(2025, 3, 15), "TDS"), (date(2025, 5, 7), "AGM")):
+            ComplianceTask.objects.create(title=title, fund=cls.fund, due_date=day)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_month_grid_buckets_tasks_by_day(self):
+        response = self.client.get(reverse('compliances:calendar'), {'year': 2025, 'month': 3})
+
+        days = {cell['date'].day: cell for cell in response.context['calendar_days'] if cell['is_current_month']}
+        self.assertEqual(sorted(t.title for t in days[15]['tasks']), ["CTR, Q4; final", "TDS"])
+        self.assertEqual(days[14]['tasks'], [])
+        self.assertEqual(response.context['next_month_url'], "year=2025&month=4")
+
+    def test_year_view_spans_twelve_months(self):
+        response = self.client.get(reverse('compliances:calendar'), {'view': 'year', 'year': 2025})
+
+        months = response.context['calendar_months']
+        self.assertEqual(len(months), 12)
+        may = [cell for cell in months[4]['days'] if cell['is_current_month'] and cell['tasks']]
+        self.assertEqual([cell['date'].day for cell in may], [7])
+        self.assertEqual(response.context['prev_month_url'], "year=2024&month=1&months=12")
+
+    def test_ics_export_covers_range(self):
+        response = self.client.get(reverse('compliances:calendar-ics'), {'year': 2025, 'month': 3, 'months': 2})
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertEqual(body.count('BEGIN:VEVENT'), 2)
+        self.assertIn('DTSTART;VALUE=DATE:20250315', body)
+        self.assertIn(r'SUMMARY:CTR\, Q4\; final (Calendar Fund)', body)
+        self.assertNotIn('AGM', body)
+
+
+class ComplianceReportsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from datetime import timedelta
+        from django.contrib.auth.models import User
+
+        cls.user = User.objects.create_user(username="reports", password="pass")
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        entity = ManagerEntity.objects.create(name="Reports Manager")
+        today = timezone.now().date()
+        cls.funds = []
+        for n in range(3):
+            fund = Fund.objects.create(name=f"Fund {n}", manager_entity=entity, currency=currency)
+            cls.funds.append(fund)
+            for offset in range(-4, 4):
+                ComplianceTask.objects.create(
+                    title=f"Task {n}/{offset}", fund=fund, due_date=today + timedelta(days=offset * 10),
+                    status='COMPLETED' if offset == -4 else 'PENDING',
+                )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_counts_and_recent_tasks_per_fund(self):
+        mark_overdue_tasks()
+        response = self.client.get(reverse('compliances:reports'))
+
+        report = response.context['reports_by_fund'][0]
+        self.assertEqual(report['fund'], self.funds[0])
+        self.assertEqual(report['completed'], 1)
+        self.assertEqual(report['pending'], 4)  # due on or before today, not completed
+        self.assertEqual(report['overdue'], 3)
+        self.assertTrue(report['at_risk'])
+        self.assertEqual([t.title for t in report['recent_tasks']], [f"Task 0/{i}" for i in (3, 2, 1, 0, -1)])
+        self.assertEqual(response.context['overdue_count'], 9)
+
+    def test_query_count_does_not_grow_with_funds(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.get(reverse('compliances:reports'))
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('compliances:reports'))
+        Fund.objects.create(name="Fund 9", manager_entity=self.funds[0].manager_entity, currency=self.funds[0].currency)
+        with CaptureQueriesContext(connection) as more:
+            self.client.get(reverse('compliances:reports'))
+
+        self.assertEqual(len(more), len(few))
+
+
+class OverdueSweeperTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from datetime import date
+
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        entity = ManagerEntity.objects.create(name="Sweeper Manager")
+        fund = Fund.objects.create(name="Sweeper Fund", manager_entity=entity, currency=currency)
+        for title, due, status in (
+            ("Late pending", date(2025, 1, 10), 'PENDING'),
+            ("Late in progress", date(2025, 1, 20), 'IN_PROGRESS'),
+            ("Late but done", date(2025, 1, 5), 'COMPLETED'),
+            ("Due on cut-off", date(2025, 2, 1), 'PENDING'),
+        ):
+            ComplianceTask.objects.create(title=title, fund=fund, due_date=due, status=status)
+
+    def test_sweep_flips_open_tasks_in_one_update_and_logs(self):
+        from datetime import date
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            flipped = mark_overdue_tasks(as_of=date(2025, 2, 1))
+
+        updates = [q for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(flipped, 2)
+        self.assertEqual(
+            sorted(ComplianceTask.objects.filter(status='OVERDUE').values_list('title', flat=True)),
+            ["Late in progress", "Late pending"],
+        )
+        log = {t.task.title: t.from_status for t in ComplianceTaskTransition.objects.select_related('task')}
+        self.assertEqual(log, {"Late pending": 'PENDING', "Late in progress": 'IN_PROGRESS'})
+
+        # Re-running finds nothing new
+        self.assertEqual(mark_overdue_tasks(as_of=date(2025, 2, 1)), 0)
+        self.assertEqual(ComplianceTaskTransition.objects.count(), 2)
+
+    def test_command_dry_run(self):
+        out = StringIO()
+        call_command('mark_overdue_tasks', as_of='2025-02-01', dry_run=True, stdout=out)
 
-# Create your tests here.
+        self.assertIn("Would mark 2 tasks", out.getvalue())
+        self.assertFalse(ComplianceTask.objects.filter(status='OVERDUE').exists())
@@ -7,6 +7,7 @@ urlpatterns = [
     path('tasks/', views.task_list_view, name='task-list'),
     path('tasks/add/', views.create_task, name='task-create'), # Keep this name
     path('calendar/', views.calendar_view, name='calendar'),
+    path('calendar/ics/', views.calendar_ics_view, name='calendar-ics'),
     path('reports/', views.compliance_reports_view, name='reports'),
     # Add the detail path so the "Edit" icons work too
     path('tasks/<int:pk>/', views.task_detail_view, name='task-detail'), 
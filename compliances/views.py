@@ -7,8 +7,10 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from datetime import date, timedelta
 import calendar
+from collections import defaultdict
 from django.db.models import Min
 from django.urls import reverse
+from django.http import StreamingHttpResponse
 
 
 # Local Imports
@@ -51,12 +53,8 @@ def dashboard_view(request):
     """
     tasks = ComplianceTask.objects.all().order_by('due_date')
     
-    # Calculate overdue count for pending/in-progress tasks
-    # We exclude COMPLETED and CANCELLED to match the model's 'is_overdue' logic
-    now = timezone.now().date()
-    overdue_count = tasks.filter(
-        due_date__lt=now
-    ).exclude(status__in=['COMPLETED', 'CANCELLED']).count()
+    # Overdue status is maintained by the mark_overdue_tasks sweeper (indexed count)
+    overdue_count = tasks.filter(status='OVERDUE').count()
     
     return render(request, 'compliances/dashboard.html', {
         'tasks': tasks,
@@ -116,7 +114,7 @@ def task_list_view(request):
     if fund_id:
         base_qs = base_qs.filter(fund_id=fund_id)
 
-    overdue_count = base_qs.filter(due_date__lt=today).exclude(status='COMPLETED').count()
+    overdue_count = base_qs.filter(status='OVERDUE').count()
     due_this_week = base_qs.filter(due_date__range=[today, next_week]).exclude(status='COMPLETED').count()
     upcoming_count = base_qs.filter(due_date__range=[today, next_30]).exclude(status='COMPLETED').count()
     completed_count = base_qs.filter(status='COMPLETED').count()
@@ -138,13 +136,12 @@ def task_list_view(request):
 
     # 4. Combine IDs and fetch final QuerySet
     final_ids = list(set(list(actionable_ids) + list(future_earliest_ids)))
-    tasks = ComplianceTask.objects.filter(id__in=final_ids).order_by('due_date', 'fund__name')
+    tasks = ComplianceTask.objects.filter(id__in=final_ids).select_related('fund').order_by('due_date', 'fund__name')
 
     # Metrics for Dashboard
     context = {
         'tasks': tasks,
         'fund_id': fund_id,
-        'overdue_count': base_qs.filter(due_date__lt=today).exclude(status='COMPLETED').count(),
         'total_active_funds': base_qs.values('fund').distinct().count(),
         'overdue_count': overdue_count,
         'due_this_week': due_this_week,
@@ -237,70 +234,169 @@ def task_delete_view(request, pk):
         return redirect('compliances:portal-home')
     return render(request, 'compliances/task_confirm_delete.html', {'task': task})
 
+# Number of months a calendar page may span (?months=, or ?view=year for 12)
+CALENDAR_MAX_MONTHS = 12
+
+
+def _calendar_window(request):
+    """
+    Reads year/month/months (or view=year) from the query string and returns
+    (first_year, first_month, month_count).
+    """
+    today = timezone.now().date()
+    year = int(request.GET.get('year', today.year))
+    if request.GET.get('view') == 'year':
+        return year, 1, 12
+    month = int(request.GET.get('month', today.month))
+    try:
+        months = int(request.GET.get('months', 1))
+    except ValueError:
+        months = 1
+    return year, month, max(1, min(months, CALENDAR_MAX_MONTHS))
+
+
+def _shift_month(year, month, offset):
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+
+def _calendar_tasks(start_date, end_date, fund_id=None):
+    tasks = ComplianceTask.objects.filter(
+        due_date__range=[start_date, end_date]
+    ).select_related('fund').order_by('due_date', 'pk')
+
+    # Optional Fund Filtering
+    if fund_id:
+        tasks = tasks.filter(fund_id=fund_id)
+    return tasks
+
+
 @login_required
 def calendar_view(request):
     """
     Generates the grid logic for the Compliance Calendar with Year-Month boundary handling.
+    Spans one month by default; ?months=N or ?view=year show several grids
+    built from the same single query, bucketed by due date in one pass.
     """
     # 1. Determine Month/Year to display
     today = timezone.now().date()
-    year = int(request.GET.get('year', today.year))
-    month = int(request.GET.get('month', today.month))
+    year, month, month_count = _calendar_window(request)
     fund_id = request.GET.get('fund')
 
     # 2. Setup Calendar Iterator
     cal = calendar.Calendar(firstweekday=6) # 6 = Sunday
-    month_days = cal.monthdatescalendar(year, month)
-    
-    # 3. Fetch Tasks for this date range
-    start_date = month_days[0][0]
-    end_date = month_days[-1][-1]
-    
-    tasks_in_range = ComplianceTask.objects.filter(
-        due_date__range=[start_date, end_date]
-    )
+    months = [_shift_month(year, month, i) for i in range(month_count)]
+    grids = [(y, m, cal.monthdatescalendar(y, m)) for y, m in months]
+
+    # 3. Fetch Tasks for this date range and bucket them by day
+    start_date = grids[0][2][0][0]
+    end_date = grids[-1][2][-1][-1]
+
+    tasks_by_day = defaultdict(list)
+    for task in _calendar_tasks(start_date, end_date, fund_id):
+        tasks_by_day[task.due_date].append(task)
+
+    # 4. Build the Grid Data Structure (one per month)
+    calendar_months = []
+    for y, m, weeks in grids:
+        calendar_months.append({
+            'month_date': date(y, m, 1),
+            'days': [
+                {
+                    'date': day,
+                    'is_today': (day == today),
+                    'is_current_month': (day.month == m),
+                    'tasks': tasks_by_day.get(day, []),
+                }
+                for week in weeks for day in week
+            ],
+        })
 
-    # Optional Fund Filtering
-    if fund_id:
-        tasks_in_range = tasks_in_range.filter(fund_id=fund_id)
-
-    # 4. Build the Grid Data Structure
-    calendar_data = []
-    for week in month_days:
-        for day in week:
-            day_tasks = [t for t in tasks_in_range if t.due_date == day]
-            calendar_data.append({
-                'date': day,
-                'is_today': (day == today),
-                'is_current_month': (day.month == month),
-                'tasks': day_tasks
-            })
-
-    # 5. Calculate Nav Links (Fixed logic to handle Year transitions)
-    if month == 12:
-        next_month_val, next_year_val = 1, year + 1
-        prev_month_val, prev_year_val = 11, year
-    elif month == 1:
-        next_month_val, next_year_val = 2, year
-        prev_month_val, prev_year_val = 12, year - 1
-    else:
-        next_month_val, next_year_val = month + 1, year
-        prev_month_val, prev_year_val = month - 1, year
+    # 5. Calculate Nav Links (step by the span shown; handles year transitions)
+    prev_year_val, prev_month_val = _shift_month(year, month, -month_count)
+    next_year_val, next_month_val = _shift_month(year, month, month_count)
 
     fund_param = f"&fund={fund_id}" if fund_id else ""
-    
+    span_param = f"&months={month_count}" if month_count > 1 else ""
+
     context = {
-        'calendar_days': calendar_data,
+        'calendar_days': calendar_months[0]['days'],
+        'calendar_months': calendar_months,
         'current_month_date': date(year, month, 1),
-        'prev_month_url': f"year={prev_year_val}&month={prev_month_val}{fund_param}",
-        'next_month_url': f"year={next_year_val}&month={next_month_val}{fund_param}",
+        'last_month_date': calendar_months[-1]['month_date'],
+        'month_count': month_count,
+        'prev_month_url': f"year={prev_year_val}&month={prev_month_val}{span_param}{fund_param}",
+        'next_month_url': f"year={next_year_val}&month={next_month_val}{span_param}{fund_param}",
+        'ics_url': f"year={year}&month={month}&months={month_count}{fund_param}",
         'current_tab': 'calendar',
         'fund_id': fund_id,
     }
     
     return render(request, 'compliances/calendar.html', context)
 
-from django.db.models import Count, Q
+
+def _ics_text(value):
+    """Escapes a value for an iCalendar TEXT property (RFC 5545 3.3.11)."""
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _ics_line(line):
+    """Folds a content line at 75 octets as iCalendar requires."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, chunk = [], b''
+    for char in line:
+        piece = char.encode('utf-8')
+        if len(chunk) + len(piece) > (75 if not parts else 74):
+            parts.append(chunk.decode('utf-8'))
+            chunk = b''
+        chunk += piece
+    parts.append(chunk.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+@login_required
+def calendar_ics_view(request):
+    """
+    Exports the tasks of the calendar range being viewed (same year/month/
+    months/view/fund parameters) as an iCalendar feed of all-day events.
+    """
+    year, month, month_count = _calendar_window(request)
+    last_year, last_month = _shift_month(year, month, month_count - 1)
+    start_date = date(year, month, 1)
+    end_date = date(last_year, last_month, calendar.monthrange(last_year, last_month)[1])
+    tasks = _calendar_tasks(start_date, end_date, request.GET.get('fund'))
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+    host = request.get_host()
+
+    def events():
+        yield _ics_line('BEGIN:VCALENDAR')
+        yield _ics_line('VERSION:2.0')
+        yield _ics_line('PRODID:-//AIFSEC//Compliance Calendar//EN')
+        yield _ics_line('CALSCALE:GREGORIAN')
+        for task in tasks.iterator(chunk_size=2000):
+            summary = f"{task.title} ({task.fund.name})" if task.fund else task.title
+            yield _ics_line('BEGIN:VEVENT')
+            yield _ics_line(f'UID:compliance-task-{task.pk}@{host}')
+            yield _ics_line(f'DTSTAMP:{stamp}')
+            yield _ics_line(f"DTSTART;VALUE=DATE:{task.due_date.strftime('%Y%m%d')}")
+            yield _ics_line(f"DTEND;VALUE=DATE:{(task.due_date + timedelta(days=1)).strftime('%Y%m%d')}")
+            yield _ics_line(f'SUMMARY:{_ics_text(summary)}')
+            yield _ics_line(f'DESCRIPTION:{_ics_text(task.get_status_display())}')
+            yield _ics_line(f"URL:{request.build_absolute_uri(reverse('compliances:task-detail', args=[task.pk]))}")
+            yield _ics_line('END:VEVENT')
+        yield _ics_line('END:VCALENDAR')
+
+    response = StreamingHttpResponse(events(), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="compliance-{start_date:%Y-%m}.ics"'
+    return response
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
 
 @login_required
 def compliance_reports_view(request):
@@ -308,42 +404,61 @@ def compliance_reports_view(request):
     Enhanced Reporting View:
     1. Groups funds by Jurisdiction (SEBI/IFSCA).
     2. Flags 'At Risk' funds with overdue tasks.
-    3. Optimized with Prefetching to prevent 'N+1' query issues.
+    3. Per-fund counts come from one conditional-aggregation query and the
+       five most recent tasks per fund from one window-function query, so
+       the query count does not grow with the number of funds.
     """
-    # Use prefetch_related to get tasks efficiently for all funds at once
-    funds = Fund.objects.all().prefetch_related('fund_compliance_tasks')
-    
-    total_tasks = ComplianceTask.objects.count()
-    completed_tasks = ComplianceTask.objects.filter(status='COMPLETED').count()
-    
-    # We define 'Overdue' as any task past due_date that isn't completed
     today = timezone.now().date()
-    overdue_qs = ComplianceTask.objects.filter(due_date__lt=today).exclude(status='COMPLETED')
-    overdue_count = overdue_qs.count()
-    
+    not_completed = ~Q(fund_compliance_tasks__status='COMPLETED')
+
+    # 1. Per-fund counts in a single GROUP BY
+    funds = Fund.objects.annotate(
+        pending_count=Count(
+            'fund_compliance_tasks', filter=Q(fund_compliance_tasks__due_date__lte=today) & not_completed
+        ),
+        completed_count=Count('fund_compliance_tasks', filter=Q(fund_compliance_tasks__status='COMPLETED')),
+        overdue_count=Count('fund_compliance_tasks', filter=Q(fund_compliance_tasks__status='OVERDUE')),
+    ).order_by('name')
+
+    # 2. Book-wide totals in one aggregate
+    # 'Overdue' is the status set by the mark_overdue_tasks sweeper
+    totals = ComplianceTask.objects.aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status='COMPLETED')),
+        overdue=Count('id', filter=Q(status='OVERDUE')),
+    )
+
+    # 3. Five most recent tasks per fund, ranked inside the database
+    recent = ComplianceTask.objects.filter(fund__isnull=False).annotate(
+        recency=Window(
+            RowNumber(),
+            partition_by=[F('fund_id')],
+            order_by=[F('due_date').desc(), F('pk').desc()],
+        )
+    ).filter(recency__lte=5).order_by('fund_id', 'recency')
+    recent_by_fund = defaultdict(list)
+    for task in recent:
+        recent_by_fund[task.fund_id].append(task)
+
     reports_by_fund = []
-    
     for fund in funds:
-        # Calculate fund-specific stats
-        fund_tasks = fund.fund_compliance_tasks.all()
-        f_pending = fund_tasks.filter(due_date__lte=today).exclude(status='COMPLETED').count()
-        f_completed = fund_tasks.filter(status='COMPLETED').count()
-        
         reports_by_fund.append({
             'fund': fund,
             'jurisdiction': fund.get_jurisdiction_display(),
-            'pending': f_pending,
-            'completed': f_completed,
+            'pending': fund.pending_count,
+            'completed': fund.completed_count,
+            'overdue': fund.overdue_count,
             # FLAG: If pending > 0, this fund is technically 'At Risk'
-            'at_risk': f_pending > 0,
-            'recent_tasks': fund_tasks.order_by('-due_date')[:5]
+            'at_risk': fund.pending_count > 0,
+            'recent_tasks': recent_by_fund.get(fund.pk, []),
         })
 
+    total_tasks = totals['total']
     context = {
         'reports_by_fund': reports_by_fund,
         'total_tasks': total_tasks,
-        'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
-        'overdue_count': overdue_count,
+        'completion_rate': (totals['completed'] / total_tasks * 100) if total_tasks > 0 else 0,
+        'overdue_count': totals['overdue'],
         'today': today,
     }
-    return render(request, 'compliances/reports.html', context)
\ No newline at end of file
+    return render(request, 'compliances/reports.html', context)
@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Packs the sort-key values of a row into an opaque, URL-safe token."""
+    payload = [
+        {'d': str(v)} if isinstance(v, Decimal)
+        else {'t': v.isoformat()} if isinstance(v, (date, datetime))
+        else v
+        for v in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Inverse of encode_cursor; returns None for a missing or malformed token
+    (including tampered payloads), so callers fall back to the first page.
+    """
+    if not token:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(payload, list):
+            return None
+        values = []
+        for v in payload:
+            if isinstance(v, dict) and 'd' in v:
+                v = Decimal(v['d'])
+            elif isinstance(v, dict) and 't' in v:
+                v = datetime.fromisoformat(v['t']) if 'T' in v['t'] else date.fromisoformat(v['t'])
+            elif isinstance(v, (dict, list)):
+                return None
+            values.append(v)
+    except (ValueError, TypeError, InvalidOperation):
+        return None
+    return values
+
+
+def _seek(fields, values, forward):
+    """
+    Builds the row-value comparison `(f1, f2, ...) > (v1, v2, ...)` as nested Q
+    objects, honouring a leading '-' on each field for descending order.
+    """
+    condition = Q()
+    for i in reversed(range(len(fields))):
+        field = fields[i]
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        if condition:
+            step |= Q(**{name: values[i]}) & condition
+        condition = step
+    return condition
+
+
+def keyset_page(queryset, ordering, after=None, before=None, per_page=50):
+    """
+    Keyset ("seek") pagination: pages are located by comparing the sort keys
+    with the last row seen instead of OFFSET, so deep pages cost the same as
+    the first one. `ordering` must end with a unique field (usually 'pk').
+
+    Returns a dict with the page `rows`, `next_cursor` and `previous_cursor`
+    (None at either end).
+    """
+    ordering = list(ordering)
+    names = [f.lstrip('-') for f in ordering]
+    after_values = decode_cursor(after)
+    before_values = None if after_values else decode_cursor(before)
+    forward = before_values is None
+
+    if after_values and len(after_values) == len(ordering):
+        queryset = queryset.filter(_seek(ordering, after_values, forward=True))
+    elif before_values and len(before_values) == len(ordering):
+        queryset = queryset.filter(_seek(ordering, before_values, forward=False))
+        # Walk backwards from the cursor, then flip the page back into display order
+        ordering = [f[1:] if f.startswith('-') else f'-{f}' for f in ordering]
+    else:
+        before_values = None
+        forward = True
+
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    def cursor(row):
+        return encode_cursor([getattr(row, name) for name in names])
+
+    has_next = has_more if forward else True
+    has_previous = bool(after_values) if forward else has_more
+    return {
+        'rows': rows,
+        'next_cursor': cursor(rows[-1]) if rows and has_next else None,
+        'previous_cursor': cursor(rows[0]) if rows and has_previous else None,
+    }
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class CurrenciesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'currencies'
+    verbose_name = "Currencies"
+
+    def ready(self):
+        import currencies.signals  # noqa: F401
@@ -2,6 +2,7 @@ import requests
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from currencies.models import Currency, ExchangeRate
+from currencies.utils import invalidate_rate_cache
 
 class Command(BaseCommand):
     help = 'Fetches latest exchange rates from Frankfurter API'
@@ -44,4 +45,7 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS(f'Updated {code}: {actual_rate}'))
 
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'API Error: {str(e)}'))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f'API Error: {str(e)}'))
+        finally:
+            # Rates may have been written before a failure; never serve the old series
+            invalidate_rate_cache()
\ No newline at end of file
@@ -0,0 +1,15 @@
+# currencies/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Currency, ExchangeRate
+from .utils import invalidate_rate_cache
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def reset_rate_cache(sender, **kwargs):
+    """Any change to a rate or to the base currency invalidates the FX cache."""
+    invalidate_rate_cache()
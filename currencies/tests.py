@@ -0,0 +1,75 @@
+from decimal import Decimal
+from datetime import date
+
+from django.test import TestCase
+
+from .models import Currency, ExchangeRate
+from .utils import (
+    RATE_CACHE_CHECK_INTERVAL, RateCache, convert_amount, convert_many, get_exchange_rate, invalidate_rate_cache
+)
+
+
+class RateCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        cls.usd = Currency.objects.create(code="USD", symbol="$", name="US Dollar")
+        cls.eur = Currency.objects.create(code="EUR", symbol="€", name="Euro")
+        for day, rate in ((date(2025, 1, 1), '83.000000'), (date(2025, 2, 1), '84.000000')):
+            ExchangeRate.objects.create(currency=cls.usd, date=day, rate=Decimal(rate))
+        ExchangeRate.objects.create(currency=cls.eur, date=date(2025, 1, 1), rate=Decimal('90.000000'))
+
+    def setUp(self):
+        invalidate_rate_cache()
+
+    def test_as_of_lookup(self):
+        self.assertEqual(get_exchange_rate("USD", date(2024, 12, 31)), Decimal('1.0'))
+        self.assertEqual(get_exchange_rate("USD", date(2025, 1, 15)), Decimal('83'))
+        self.assertEqual(get_exchange_rate("USD", date(2025, 3, 1)), Decimal('84'))
+        self.assertEqual(get_exchange_rate("INR", date(2025, 3, 1)), Decimal('1.0'))
+
+    def test_conversions_are_query_free_after_warm_up(self):
+        convert_amount(Decimal('1'), "USD", "EUR", date(2025, 1, 15))
+
+        with self.assertNumQueries(0):
+            for day in range(1, 29):
+                converted = convert_amount(Decimal('900'), "USD", "EUR", date(2025, 2, day))
+        self.assertEqual(converted, Decimal('840'))
+
+    def test_saving_a_rate_invalidates_the_cache(self):
+        self.assertEqual(get_exchange_rate("USD", date(2025, 3, 1)), Decimal('84'))
+
+        ExchangeRate.objects.create(currency=self.usd, date=date(2025, 3, 1), rate=Decimal('85.000000'))
+
+        self.assertEqual(get_exchange_rate("USD", date(2025, 3, 1)), Decimal('85'))
+
+    def test_other_workers_reload_after_an_invalidation(self):
+        # Another process's cache: it only learns of the change through the shared version
+        worker = RateCache()
+        self.assertEqual(worker.rate("USD", date(2025, 3, 1)), Decimal('84'))
+
+        ExchangeRate.objects.create(currency=self.usd, date=date(2025, 3, 1), rate=Decimal('85.000000'))
+        self.assertEqual(worker.rate("USD", date(2025, 3, 1)), Decimal('84'))
+
+        worker._checked_at -= RATE_CACHE_CHECK_INTERVAL
+        self.assertEqual(worker.rate("USD", date(2025, 3, 1)), Decimal('85'))
+
+    def test_convert_many_matches_convert_amount(self):
+        amounts = [Decimal('100'), Decimal('200'), Decimal('300'), Decimal('50')]
+        codes = ["USD", "EUR", "INR", "USD"]
+        days = [date(2025, 1, 15), date(2025, 1, 15), date(2025, 2, 15), date(2024, 6, 1)]
+
+        for to_code in ("INR", "USD"):
+            expected = [convert_amount(a, c, to_code, d) for a, c, d in zip(amounts, codes, days)]
+            with self.assertNumQueries(0):
+                converted = convert_many(amounts, codes, to_code, days)
+            self.assertEqual(converted, expected)
+
+            floats = convert_many(amounts, codes, to_code, days, as_float=True)
+            self.assertEqual([round(f, 6) for f in floats.tolist()], [round(float(e), 6) for e in expected])
+
+    def test_convert_many_broadcasts_scalars(self):
+        converted = convert_many([Decimal('1'), Decimal('2')], "USD", "INR", date(2025, 2, 1))
+
+        self.assertEqual(converted, [Decimal('84'), Decimal('168')])
@@ -1,49 +1,224 @@
+import time
+from bisect import bisect_right
+from datetime import datetime
 from decimal import Decimal
+from threading import Lock
+
 from .models import Currency, ExchangeRate
 from django.core.cache import cache
 
+# Key in the shared default cache (settings.CACHES, one for every worker),
+# bumped on every invalidation so other processes drop their copy
+RATE_CACHE_VERSION_KEY = 'currencies:rate_cache_version'
+# How often a process checks the shared version (seconds)
+RATE_CACHE_CHECK_INTERVAL = 60
+
+_UNSET = object()
+
+
+class RateCache:
+    """
+    Process-local cache of exchange rate series.
+
+    Each currency's rates are loaded once into parallel sorted lists
+    (dates, rates); as-of lookups are a binary search on the dates. A
+    process notices another one's invalidation through the version kept
+    in the shared cache, at most RATE_CACHE_CHECK_INTERVAL seconds later.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._reset(version=None)
+
+    def _reset(self, version):
+        self._base_code = _UNSET
+        self._series = {}
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def clear(self, version=_UNSET):
+        with self._lock:
+            self._reset(version=self._version if version is _UNSET else version)
+
+    def _sync(self):
+        """Drops local data if another process invalidated the cache."""
+        now = time.monotonic()
+        if now - self._checked_at < RATE_CACHE_CHECK_INTERVAL:
+            return
+        version = cache.get(RATE_CACHE_VERSION_KEY)
+        with self._lock:
+            if version != self._version:
+                self._reset(version=version)
+            self._checked_at = now
+
+    def base_code(self):
+        """Code of the reporting currency, or None if no base is set."""
+        self._sync()
+        if self._base_code is _UNSET:
+            base = Currency.objects.filter(is_base=True).values_list('code', flat=True).first()
+            with self._lock:
+                self._base_code = base
+        return self._base_code
+
+    def series(self, code):
+        """Returns (dates, rates) for a currency, sorted by date ascending."""
+        self._sync()
+        series = self._series.get(code)
+        if series is None:
+            rows = ExchangeRate.objects.filter(currency__code=code).order_by('date').values_list('date', 'rate')
+            dates, rates = [], []
+            for rate_date, rate in rows:
+                dates.append(rate_date)
+                rates.append(rate)
+            series = (dates, rates)
+            with self._lock:
+                self._series[code] = series
+        return series
+
+    def rate(self, code, on_date):
+        """Most recent rate on or before `on_date`, or None if there is none."""
+        if isinstance(on_date, datetime):
+            on_date = on_date.date()
+        dates, rates = self.series(code)
+        i = bisect_right(dates, on_date)
+        return rates[i - 1] if i else None
+
+
+rate_cache = RateCache()
+
+
+def invalidate_rate_cache():
+    """Clears this process's rates and tells other processes to reload theirs."""
+    try:
+        version = cache.incr(RATE_CACHE_VERSION_KEY)
+    except ValueError:
+        version = 1
+        cache.set(RATE_CACHE_VERSION_KEY, version, None)
+    rate_cache.clear(version=version)
+
+
 def get_exchange_rate(from_currency_code, date):
     """
-    Fetches the exchange rate for a specific date. 
+    Fetches the exchange rate for a specific date.
     Falls back to the most recent rate if exact date missing.
     """
     # 1. Check if Base
-    try:
-        base = Currency.objects.get(is_base=True)
-        if from_currency_code == base.code:
-            return Decimal('1.0')
-    except Currency.DoesNotExist:
+    base_code = rate_cache.base_code()
+    if base_code is None or from_currency_code == base_code:
         return Decimal('1.0') # Default to 1 if no base set
 
     # 2. Fetch Rate
-    rate_obj = ExchangeRate.objects.filter(
-        currency__code=from_currency_code, 
-        date__lte=date
-    ).order_by('-date').first()
-
-    if rate_obj:
-        return rate_obj.rate
+    rate = rate_cache.rate(from_currency_code, date)
+    if rate is not None:
+        return rate
     return Decimal('1.0') # Fallback warning: No rate found
 
 def convert_amount(amount, from_code, to_code, date):
     """
-    Converts an amount from one currency to another using the DB rates.
+    Converts an amount from one currency to another using the cached rates.
     """
     if from_code == to_code:
         return amount
-    
+
     # Convert to Base first (if from_code is not base)
     rate_to_base = get_exchange_rate(from_code, date)
     amount_in_base = amount * rate_to_base
-    
+
     # If target is base, we are done
-    base = Currency.objects.filter(is_base=True).first()
-    if not base or to_code == base.code:
+    base_code = rate_cache.base_code()
+    if base_code is None or to_code == base_code:
         return amount_in_base
-        
+
     # If target is NOT base, convert Base -> Target
     # (Rate stored is 1 Foreign = X Base, so 1 Base = 1/X Foreign)
     rate_of_target = get_exchange_rate(to_code, date)
     if rate_of_target == 0: return Decimal('0.0')
-    
-    return amount_in_base / rate_of_target
\ No newline at end of file
+
+    return amount_in_base / rate_of_target
+
+
+def _column(value, n):
+    """Broadcasts a scalar argument of convert_many to a list of length n."""
+    if isinstance(value, (str, bytes)) or not hasattr(value, '__iter__'):
+        return [value] * n
+    values = list(value)
+    if len(values) != n:
+        raise ValueError(f"Expected {n} values, got {len(values)}.")
+    return values
+
+
+def convert_many(amounts, from_codes, to_code, dates, as_float=False):
+    """
+    Converts a column of amounts into `to_code` in one pass over the cached
+    rate series. `from_codes` and `dates` may be sequences aligned with
+    `amounts` or single values applied to every row.
+
+    Returns a list of Decimals with the same results as convert_amount row by
+    row, or a NumPy float64 array when `as_float` is set (for analytics).
+    """
+    amounts = list(amounts)
+    n = len(amounts)
+    from_codes = _column(from_codes, n)
+    dates = [d.date() if isinstance(d, datetime) else d for d in _column(dates, n)]
+
+    base_code = rate_cache.base_code()
+    # Row indexes per source currency; rows already in the target are left as is
+    groups = {}
+    for i, code in enumerate(from_codes):
+        if code != to_code:
+            groups.setdefault(code, []).append(i)
+
+    def needs_rate(code):
+        return base_code is not None and code != base_code
+
+    if as_float:
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("Please run: pip install numpy")
+
+        def rates_at(code, day_index):
+            series_dates, series_rates = rate_cache.series(code)
+            if not series_dates:
+                return np.ones(len(day_index))
+            positions = np.searchsorted(np.array(series_dates, dtype='datetime64[D]'), day_index, side='right') - 1
+            found = np.array(series_rates, dtype=np.float64)[np.maximum(positions, 0)]
+            return np.where(positions >= 0, found, 1.0)
+
+        result = np.array(amounts, dtype=np.float64)
+        day_index = np.array(dates, dtype='datetime64[D]')
+        target = rates_at(to_code, day_index) if needs_rate(to_code) else np.ones(n)
+        for code, rows in groups.items():
+            rows = np.array(rows)
+            to_base = rates_at(code, day_index[rows]) if needs_rate(code) else 1.0
+            to_target = target[rows] if base_code is not None else 1.0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[rows] = np.where(to_target == 0, 0.0, result[rows] * to_base / to_target)
+        return result
+
+    def rate_lookup(code):
+        """Memoised as-of rate for one currency, same fallbacks as get_exchange_rate."""
+        if not needs_rate(code):
+            return lambda day: Decimal('1.0')
+        series_dates, series_rates = rate_cache.series(code)
+        memo = {}
+
+        def lookup(day):
+            if day not in memo:
+                i = bisect_right(series_dates, day)
+                memo[day] = series_rates[i - 1] if i else Decimal('1.0')
+            return memo[day]
+        return lookup
+
+    result = list(amounts)
+    target_rate = rate_lookup(to_code)
+    for code, rows in groups.items():
+        source_rate = rate_lookup(code)
+        for i in rows:
+            amount_in_base = amounts[i] * source_rate(dates[i])
+            if base_code is None or to_code == base_code:
+                result[i] = amount_in_base
+                continue
+            rate_of_target = target_rate(dates[i])
+            result[i] = Decimal('0.0') if rate_of_target == 0 else amount_in_base / rate_of_target
+    return result
@@ -0,0 +1,67 @@
+# dashboard/services.py
+from django.core.cache import cache
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+# Per-entity rollups live in the shared cache (settings.CACHES) and are dropped
+# on every ledger write in any worker; the timeout is only a safety net for
+# writes that bypass signals (bulk_create / queryset.update).
+ROLLUP_CACHE_TIMEOUT = 60 * 10
+
+
+def rollup_cache_key(entity_id):
+    return f"dashboard:rollup:{entity_id or 'all'}"
+
+
+def compute_rollup(entity_id=None):
+    """
+    Counts and ledger totals for one manager entity (or the whole book when
+    `entity_id` is None), as plain numbers ready to be cached.
+    """
+    from funds.models import Fund
+    from investors.models import Investor
+    from transactions.models import (
+        DrawdownReceipt, PurchaseTransaction, RedemptionTransaction, Distribution
+    )
+
+    def scoped(model, lookup='fund__manager_entity_id'):
+        qs = model.objects.all()
+        return qs.filter(**{lookup: entity_id}) if entity_id is not None else qs
+
+    trade_value = ExpressionWrapper(F('quantity') * F('price_per_share'), output_field=DecimalField())
+
+    total_drawdowns = scoped(DrawdownReceipt).aggregate(s=Sum('amount_received'))['s'] or 0
+    total_investments = scoped(PurchaseTransaction).aggregate(s=Sum(trade_value))['s'] or 0
+    total_redemptions = scoped(RedemptionTransaction).aggregate(s=Sum(trade_value))['s'] or 0
+    distributed = scoped(Distribution).aggregate(s=Sum('gross_amount'), carry=Sum('carried_interest'))
+    total_distributions = distributed['s'] or 0
+    # Carry paid to the GP out of a waterfall has left the fund as well
+    total_carry = distributed['carry'] or 0
+
+    return {
+        'fund_count': scoped(Fund, 'manager_entity_id').count(),
+        'investor_count': scoped(Investor, 'manager_entities__id').count(),
+        'company_count': scoped(PurchaseTransaction).values('investee_company').distinct().count(),
+        'total_drawdowns': total_drawdowns,
+        'total_investments': total_investments,
+        'total_redemptions': total_redemptions,
+        'total_distributions': total_distributions,
+        'total_carry': total_carry,
+        'cash_available': (
+            (total_drawdowns + total_redemptions) - (total_investments + total_distributions + total_carry)
+        ),
+    }
+
+
+def get_rollup(entity_id=None):
+    """Cached compute_rollup: the ledgers are only scanned after a write."""
+    key = rollup_cache_key(entity_id)
+    rollup = cache.get(key)
+    if rollup is None:
+        rollup = compute_rollup(entity_id)
+        cache.set(key, rollup, ROLLUP_CACHE_TIMEOUT)
+    return rollup
+
+
+def invalidate_rollup(*entity_ids):
+    """Drops the cached rollups of the given entities and of the whole book."""
+    cache.delete_many([rollup_cache_key(None)] + [rollup_cache_key(pk) for pk in entity_ids if pk])
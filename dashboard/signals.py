@@ -0,0 +1,77 @@
+# dashboard/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from funds.models import Fund
+from investors.models import Investor
+from transactions.models import (
+    DrawdownReceipt, PurchaseTransaction, RedemptionTransaction, Distribution
+)
+from .services import invalidate_rollup
+
+
+def invalidate_after_commit(*entity_ids):
+    """
+    Drops the rollups once the write commits: invalidating inside the
+    transaction lets a concurrent dashboard request re-cache the
+    pre-commit totals, which would then stay stale until the next write.
+    """
+    transaction.on_commit(lambda: invalidate_rollup(*entity_ids))
+
+
+@receiver(post_save, sender=DrawdownReceipt)
+@receiver(post_delete, sender=DrawdownReceipt)
+@receiver(post_save, sender=PurchaseTransaction)
+@receiver(post_delete, sender=PurchaseTransaction)
+@receiver(post_save, sender=RedemptionTransaction)
+@receiver(post_delete, sender=RedemptionTransaction)
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+def reset_rollup_for_ledger_row(sender, instance, raw=False, **kwargs):
+    if raw or not instance.fund_id:
+        return
+    entity_id = Fund.objects.filter(pk=instance.fund_id).values_list('manager_entity_id', flat=True).first()
+    invalidate_after_commit(entity_id)
+
+
+@receiver(pre_save, sender=Fund)
+def remember_fund_entity(sender, instance, raw=False, **kwargs):
+    """Keeps the stored entity so moving a fund also resets the entity it left."""
+    instance._rollup_previous_entity = None
+    if not raw and instance.pk is not None:
+        instance._rollup_previous_entity = (
+            Fund.objects.filter(pk=instance.pk).values_list('manager_entity_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Fund)
+@receiver(post_delete, sender=Fund)
+def reset_rollup_for_fund(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_after_commit(instance.manager_entity_id, getattr(instance, '_rollup_previous_entity', None))
+
+
+@receiver(pre_delete, sender=Investor)
+def remember_investor_entities(sender, instance, **kwargs):
+    instance._rollup_entities = list(instance.manager_entities.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Investor)
+def reset_rollup_for_deleted_investor(sender, instance, **kwargs):
+    invalidate_after_commit(*getattr(instance, '_rollup_entities', ()))
+
+
+@receiver(m2m_changed, sender=Investor.manager_entities.through)
+def reset_rollup_for_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # Changed from the ManagerEntity side
+        if action.startswith('post_'):
+            invalidate_after_commit(instance.pk)
+        return
+    if action == 'pre_clear':
+        instance._rollup_entities = list(instance.manager_entities.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        invalidate_after_commit(*getattr(instance, '_rollup_entities', ()))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_after_commit(*pk_set)
@@ -1,3 +1,90 @@
+from decimal import Decimal
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from currencies.models import Currency
+from funds.models import Fund
+from investors.models import Investor
+from manager_entities.models import ManagerEntity
+from transactions.models import DrawdownReceipt
+from .services import get_rollup
+
+
+class DashboardRollupTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        cls.entity = ManagerEntity.objects.create(name="Rollup Manager")
+        cls.other_entity = ManagerEntity.objects.create(name="Other Manager")
+        cls.fund = Fund.objects.create(name="Rollup Fund", manager_entity=cls.entity, currency=currency)
+        other_fund = Fund.objects.create(name="Other Fund", manager_entity=cls.other_entity, currency=currency)
+        cls.investor = Investor.objects.create(name="LP", email="lp@example.com", pan="ABCDE1234F")
+        cls.investor.manager_entities.add(cls.entity)
+        for fund, amount in ((cls.fund, '1000'), (other_fund, '5000')):
+            DrawdownReceipt.objects.create(
+                fund=fund, investor=cls.investor, amount_received=Decimal(amount),
+                date_received=date(2025, 1, 1), transaction_reference="UTR"
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rollup_is_scoped_and_cached(self):
+        rollup = get_rollup(self.entity.pk)
+
+        self.assertEqual(rollup['fund_count'], 1)
+        self.assertEqual(rollup['investor_count'], 1)
+        self.assertEqual(rollup['total_drawdowns'], Decimal('1000'))
+        self.assertEqual(get_rollup(self.other_entity.pk)['investor_count'], 0)
+        # A cache hit is one read of the shared cache table, not the ledger scans
+        with self.assertNumQueries(1):
+            self.assertEqual(get_rollup(self.entity.pk), rollup)
+
+    def test_writes_invalidate_only_their_entity(self):
+        get_rollup(self.entity.pk)
+        get_rollup(self.other_entity.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DrawdownReceipt.objects.create(
+                fund=self.fund, investor=self.investor, amount_received=Decimal('250'),
+                date_received=date(2025, 2, 1), transaction_reference="UTR-2"
+            )
+            self.investor.manager_entities.remove(self.entity)
+            # Nothing is dropped before the write commits
+            with self.assertNumQueries(1):
+                get_rollup(self.entity.pk)
+
+        with self.assertNumQueries(1):
+            get_rollup(self.other_entity.pk)
+        rollup = get_rollup(self.entity.pk)
+        self.assertEqual(rollup['total_drawdowns'], Decimal('1250'))
+        self.assertEqual(rollup['investor_count'], 0)
+
+    def test_moving_a_fund_resets_both_entities(self):
+        get_rollup(self.entity.pk)
+        get_rollup(self.other_entity.pk)
+
+        self.fund.manager_entity = self.other_entity
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fund.save()
+
+        self.assertEqual(get_rollup(self.entity.pk)['fund_count'], 0)
+        self.assertEqual(get_rollup(self.other_entity.pk)['fund_count'], 2)
+
+    def test_dashboard_reads_active_entity_rollup(self):
+        user = User.objects.create_user(username="ops", password="pass")
+        self.client.force_login(user)
+        session = self.client.session
+        session['active_entity_id'] = self.entity.pk
+        session.save()
+
+        response = self.client.get(reverse('portal-home'), {'denom': 'raw'})
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats']['total_drawdowns'], Decimal('1000.00'))
+        self.assertEqual(len(response.context['recent_activities']), 1)
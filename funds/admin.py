@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Fund, NavSnapshot, Document, StewardshipEngagement
+from .models import Fund, FundStats, NavSnapshot, Document, StewardshipEngagement
 
 @admin.register(Fund)
 class FundAdmin(admin.ModelAdmin):
@@ -23,4 +23,9 @@ class DocumentAdmin(admin.ModelAdmin):
 @admin.register(StewardshipEngagement)
 class StewardshipAdmin(admin.ModelAdmin):
     list_display = ("fund", "investee_company", "topic", "status", "engagement_date")
-    list_filter = ("status", "fund")
\ No newline at end of file
+    list_filter = ("status", "fund")
+
+@admin.register(FundStats)
+class FundStatsAdmin(admin.ModelAdmin):
+    list_display = ("fund", "total_committed", "total_called", "total_received", "total_invested", "total_distributed", "updated_at")
+    readonly_fields = ("updated_at",)
@@ -1,6 +1,7 @@
 from decimal import Decimal
 from django.db.models import Sum
 from transactions.models import CapitalCall, Distribution, InvestorCommitment
+from .services.performance import compute_performance
 
 class FundAnalyticsService:
     """
@@ -31,8 +32,8 @@ class FundAnalyticsService:
         # Basic Checks
         percent_called = (total_called / total_committed * 100) if total_committed > 0 else 0
         
-        # DPI (Distributions to Paid-In Capital)
-        dpi = (total_distributed / total_called) if total_called > 0 else 0
+        # Multiples and IRR from the cash flows (paid-in = receipts, residual = latest NAV)
+        performance = compute_performance([self.fund.pk])[self.fund.pk]
         
         # Safe access to currency symbol, fallback to code if symbol missing
         currency_symbol = getattr(self.fund.currency, 'symbol', self.fund.currency.code)
@@ -43,6 +44,9 @@ class FundAnalyticsService:
             "total_called": total_called,
             "total_distributed": total_distributed,
             "percent_called": round(percent_called, 2),
-            "dpi": round(dpi, 2),
+            "dpi": round(performance['dpi'], 2),
+            "rvpi": round(performance['rvpi'], 2),
+            "tvpi": round(performance['tvpi'], 2),
+            "irr": performance['irr'],
             "currency_symbol": currency_symbol
         }
\ No newline at end of file
@@ -19,7 +19,10 @@ class FundForm(forms.ModelForm):
             'currency', 
             'manager_entity',
             'scheme_type',
-            'jurisdiction'
+            'jurisdiction',
+            'hurdle_rate',
+            'gp_catch_up',
+            'carried_interest',
         ]
         
         # Adding widgets ensures they are styled as inputs/dates rather than plain text
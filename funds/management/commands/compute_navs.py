@@ -0,0 +1,29 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from funds.services.nav import compute_nav
+
+class Command(BaseCommand):
+    help = 'Computes NAV for all funds as of a date and upserts NavSnapshot rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', dest='as_of', help='Valuation date (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--fund', type=int, action='append', dest='fund_ids',
+                            help='Restrict the run to this fund id (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Print results without saving snapshots')
+
+    def handle(self, *args, **options):
+        try:
+            as_of = date.fromisoformat(options['as_of']) if options['as_of'] else timezone.now().date()
+        except ValueError:
+            raise CommandError(f"Invalid --as-of date: {options['as_of']}")
+
+        results = compute_nav(as_of, fund_ids=options['fund_ids'], persist=not options['dry_run'])
+
+        for row in results.values():
+            self.stdout.write(
+                f"Fund {row['fund_id']}: NAV/unit {row['nav_per_unit']} | "
+                f"Net assets {row['net_assets']} | Units {row['units_outstanding']}"
+            )
+        verb = 'Computed' if options['dry_run'] else 'Saved'
+        self.stdout.write(self.style.SUCCESS(f'{verb} NAV for {len(results)} funds as of {as_of}.'))
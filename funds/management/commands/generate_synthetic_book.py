@@ -0,0 +1,282 @@
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from compliances.models import ComplianceTask
+from currencies.models import Currency, ExchangeRate
+from dashboard.services import invalidate_rollup
+from funds.models import Fund
+from funds.services.stats import refresh_fund_stats
+from investee_companies.models import InvesteeCompany, ShareCapital, ShareMovement, ShareValuation, ValuationReport
+from investee_companies.services import pool_movement
+from investors.models import Investor
+from manager_entities.models import ManagerEntity
+from transactions.models import (
+    CapitalCall, DrawdownReceipt, InvestorCommitment, PurchaseTransaction, RedemptionTransaction
+)
+
+SECTORS = ['Fintech', 'Healthcare', 'SaaS', 'Consumer', 'Climate', 'Logistics', 'Agritech', 'Manufacturing']
+INVESTOR_TYPES = ['INDIVIDUAL', 'INDIVIDUAL', 'INDIVIDUAL', 'HUF', 'COMPANY', 'LLP', 'TRUST', 'NRI', 'FPI']
+# code, symbol, name, starting rate to INR
+FOREIGN_CURRENCIES = [('USD', '$', 'US Dollar', 83.0), ('EUR', '€', 'Euro', 90.0), ('GBP', '£', 'Pound Sterling', 105.0)]
+QUARTERLY_RETURNS = [
+    ('Quarterly Activity Report', 'REPORTING', 'DOMESTIC', 15),
+    ('TDS Return (Form 26Q)', 'TAX', 'TAX', 31),
+]
+
+# Insert order: a batch is only written after the batches it points at
+WRITE_ORDER = [
+    InvestorCommitment, CapitalCall, DrawdownReceipt, PurchaseTransaction,
+    RedemptionTransaction, ValuationReport, ShareValuation, ComplianceTask, ExchangeRate,
+]
+
+
+def _money(rng, low, high):
+    """A random amount in [low, high) rupees, whole cents."""
+    return Decimal(rng.randrange(low * 100, high * 100)).scaleb(-2)
+
+
+def _pan(seed, n):
+    """A unique 10-character PAN per (seed, investor number), for up to 10M investors."""
+    letters = ''
+    for _ in range(3):
+        seed, digit = divmod(seed, 26)
+        letters += chr(ord('A') + digit)
+    return f"{letters}{n:07d}"
+
+
+class _BatchWriter:
+    """
+    Buffers unsaved rows per model and writes them with bulk_create once any
+    buffer reaches batch_size, parents first so foreign keys resolve.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.buffers = {model: [] for model in WRITE_ORDER}
+        self.counts = Counter()
+
+    def add(self, obj):
+        buffer = self.buffers[type(obj)]
+        buffer.append(obj)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model, buffer in self.buffers.items():
+            if buffer:
+                model.objects.bulk_create(buffer, batch_size=self.batch_size, ignore_conflicts=model is ExchangeRate)
+                self.counts[model._meta.label] += len(buffer)
+                buffer.clear()
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds a seeded, realistic synthetic book (entities, funds, LPs, commitments, calls, receipts, '
+        'trades, valuations, FX rates, compliance tasks) with batched bulk inserts, for load testing'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed builds the same book')
+        parser.add_argument('--entities', type=int, default=3, help='Manager entities')
+        parser.add_argument('--funds', type=int, default=4, help='Funds per manager entity')
+        parser.add_argument('--investors', type=int, default=500, help='Investors in the LP pool')
+        parser.add_argument('--lps', type=int, default=100, help='Committed LPs per fund')
+        parser.add_argument('--calls', type=int, default=8, help='Drawdowns per fund (one call per LP each)')
+        parser.add_argument('--companies', type=int, default=200, help='Investee companies')
+        parser.add_argument('--trades', type=int, default=40, help='Purchases per fund')
+        parser.add_argument('--years', type=int, default=5, help='History length ending today')
+        parser.add_argument('--batch-size', type=int, default=5000, dest='batch_size')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        tag = f"SYN{options['seed']}"
+        if ManagerEntity.objects.filter(name__startswith=f"{tag} ").exists():
+            raise CommandError(f"A book for seed {options['seed']} already exists; pick another --seed.")
+        if options['lps'] > options['investors']:
+            raise CommandError("--lps cannot exceed --investors.")
+
+        started = time.monotonic()
+        self.today = date.today()
+        self.start = self.today - timedelta(days=365 * options['years'])
+        writer = _BatchWriter(options['batch_size'])
+
+        currencies = self._currencies(rng, writer)
+        entities = ManagerEntity.objects.bulk_create([
+            ManagerEntity(name=f"{tag} Capital Advisors {n + 1}", contact_email=f"ops{n + 1}@{tag.lower()}.example.com")
+            for n in range(options['entities'])
+        ])
+        investors = self._investors(rng, tag, options['seed'], options['investors'], entities, options['batch_size'])
+        share_classes = self._companies(rng, tag, options['companies'], writer, options['batch_size'])
+
+        funds = Fund.objects.bulk_create([
+            Fund(
+                name=f"{tag} Fund {e + 1}-{f + 1}", manager_entity=entity,
+                category=rng.choice(['CAT_I', 'CAT_II', 'CAT_II', 'CAT_III']),
+                jurisdiction=rng.choice(['DOMESTIC', 'DOMESTIC', 'DOMESTIC', 'IFSC']),
+                currency=currencies[0] if rng.random() < 0.8 else rng.choice(currencies[1:]),
+                corpus=Decimal(rng.randrange(100, 2000)) * Decimal('10000000'),
+                date_of_inception=self.start + timedelta(days=rng.randrange(180)),
+            )
+            for e, entity in enumerate(entities) for f in range(options['funds'])
+        ])
+
+        investor_ids = [investor.pk for investor in investors]
+        for fund in funds:
+            with transaction.atomic():
+                self._capital(rng, tag, fund, rng.sample(investor_ids, options['lps']), options['calls'], writer)
+                self._trades(rng, fund, rng.sample(share_classes, min(len(share_classes), 12)), options['trades'], writer)
+                self._tasks(fund, writer)
+                writer.flush()
+
+        # bulk_create skips the ledger signals: rebuild what they would have maintained
+        fund_ids = [fund.pk for fund in funds]
+        refresh_fund_stats(fund_ids)
+        lot_args = [arg for pk in fund_ids for arg in ('--fund', str(pk))]
+        call_command('rebuild_lots', *lot_args, stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        invalidate_rollup(*(entity.pk for entity in entities))
+
+        counts = writer.counts
+        counts.update({
+            'manager_entities.ManagerEntity': len(entities), 'funds.Fund': len(funds),
+            'investors.Investor': len(investors), 'investee_companies.InvesteeCompany': len(share_classes),
+            'investee_companies.ShareCapital': len(share_classes),
+            'investee_companies.ShareMovement': len(share_classes),
+        })
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f"  {label:<40} {count:>12,}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(counts.values()):,} rows for seed {options['seed']} in {time.monotonic() - started:.1f}s."
+        ))
+
+    def _currencies(self, rng, writer):
+        base, _ = Currency.objects.get_or_create(code='INR', defaults={'symbol': '₹', 'name': 'Indian Rupee', 'is_base': True})
+        currencies = [base]
+        for code, symbol, name, rate in FOREIGN_CURRENCIES:
+            currency, _ = Currency.objects.get_or_create(code=code, defaults={'symbol': symbol, 'name': name})
+            currencies.append(currency)
+            day = self.start
+            while day <= self.today:
+                if day.weekday() < 5:
+                    rate *= 1 + rng.gauss(0, 0.004)
+                    writer.add(ExchangeRate(currency=currency, date=day, rate=Decimal(f"{rate:.6f}")))
+                day += timedelta(days=1)
+        writer.flush()
+        return currencies
+
+    def _investors(self, rng, tag, seed, count, entities, batch_size):
+        investors = Investor.objects.bulk_create([
+            Investor(
+                name=f"{tag} Investor {n + 1}", email=f"lp{n + 1}@{tag.lower()}.example.com",
+                pan=_pan(seed, n),
+                investor_type=rng.choice(INVESTOR_TYPES), kyc_status='VERIFIED',
+            )
+            for n in range(count)
+        ], batch_size=batch_size)
+        Membership = Investor.manager_entities.through
+        Membership.objects.bulk_create([
+            Membership(investor_id=investor.pk, managerentity_id=entity.pk)
+            for investor in investors
+            for entity in rng.sample(entities, rng.randint(1, len(entities)))
+        ], batch_size=batch_size)
+        return investors
+
+    def _companies(self, rng, tag, count, writer, batch_size):
+        companies = InvesteeCompany.objects.bulk_create([
+            InvesteeCompany(
+                name=f"{tag} {rng.choice(SECTORS)} Co {n + 1}", sector=rng.choice(SECTORS),
+                incorporation_date=self.start - timedelta(days=rng.randrange(3650)),
+            )
+            for n in range(count)
+        ], batch_size=batch_size)
+        share_classes = ShareCapital.objects.bulk_create([
+            ShareCapital(investee_company=company, class_name="Series A", share_type='CCPS',
+                         issued_shares=Decimal(rng.randrange(100000, 5000000)), as_on_date=self.start)
+            for company in companies
+        ], batch_size=batch_size)
+        # bulk_create skips the share ledger signals: open each class's issued pool
+        ShareMovement.objects.bulk_create([
+            pool_movement(share_class, share_class.issued_shares, self.start, 'ISSUE') for share_class in share_classes
+        ], batch_size=batch_size)
+        # Year-end valuations: a random walk from the entry price
+        for share_class in share_classes:
+            price = rng.uniform(50, 500)
+            for year in range(self.start.year, self.today.year):
+                price *= max(0.2, 1 + rng.gauss(0.12, 0.35))
+                report = ValuationReport(investee_company=share_class.investee_company, valuation_date=date(year, 12, 31))
+                writer.add(report)
+                writer.add(ShareValuation(valuation_report=report, share_capital=share_class,
+                                          per_share_value=Decimal(f"{price:.4f}")))
+        writer.flush()
+        return share_classes
+
+    def _capital(self, rng, tag, fund, lp_ids, drawdowns, writer):
+        # Plain *_id values: bulk_create skips the related-object checks for them
+        commitments = {}
+        for investor_id in lp_ids:
+            commitments[investor_id] = Decimal(rng.choice([1, 1, 2, 5, 10, 25])) * Decimal('10000000')
+            writer.add(InvestorCommitment(
+                fund_id=fund.pk, investor_id=investor_id, amount_committed=commitments[investor_id],
+                commitment_date=fund.date_of_inception + timedelta(days=rng.randrange(90)),
+            ))
+        span = max((self.today - fund.date_of_inception).days - 120, drawdowns)
+        for k in range(drawdowns):
+            call_date = fund.date_of_inception + timedelta(days=90 + span * k // drawdowns)
+            due_date = call_date + timedelta(days=30)
+            percent = Decimal(rng.choice([5, 10, 10, 15]))
+            for investor_id in lp_ids:
+                paid = due_date < self.today and rng.random() < 0.95
+                call = CapitalCall(
+                    fund_id=fund.pk, investor_id=investor_id, call_date=call_date, due_date=due_date,
+                    amount_called=commitments[investor_id] * percent / 100, purpose=f"Drawdown {k + 1}",
+                    reference=f"{tag}-{fund.pk}-{k + 1}-{investor_id}", is_paid=paid, is_fully_paid=paid,
+                )
+                writer.add(call)
+                if paid:
+                    # The call is written first (WRITE_ORDER), which fills in capital_call_id
+                    writer.add(DrawdownReceipt(
+                        fund_id=fund.pk, investor_id=investor_id, capital_call=call, amount_received=call.amount_called,
+                        date_received=call_date + timedelta(days=rng.randrange(1, 30)),
+                        transaction_reference=f"UTR{fund.pk:04d}{k:02d}{investor_id:08d}",
+                    ))
+
+    def _trades(self, rng, fund, share_classes, count, writer):
+        for _ in range(count):
+            share_class = rng.choice(share_classes)
+            bought_on = fund.date_of_inception + timedelta(days=rng.randrange(max((self.today - fund.date_of_inception).days, 1)))
+            quantity = Decimal(rng.randrange(1000, 100000))
+            price = _money(rng, 50, 500)
+            writer.add(PurchaseTransaction(
+                fund=fund, investee_company_id=share_class.investee_company_id, share_class=share_class,
+                transaction_date=bought_on, quantity=quantity, price_per_share=price,
+                transaction_costs=(quantity * price / 1000).quantize(Decimal('0.01')), currency=fund.currency,
+            ))
+            sold_on = bought_on + timedelta(days=rng.randrange(365, 1500))
+            if rng.random() < 0.3 and sold_on < self.today:
+                writer.add(RedemptionTransaction(
+                    fund=fund, investee_company_id=share_class.investee_company_id, share_class=share_class,
+                    transaction_date=sold_on, quantity=(quantity * Decimal(rng.choice(['0.25', '0.5', '1']))).quantize(Decimal('1')),
+                    price_per_share=(price * Decimal(f"{rng.uniform(0.5, 4):.2f}")).quantize(Decimal('0.01')),
+                ))
+
+    def _tasks(self, fund, writer):
+        year, quarter = fund.date_of_inception.year, (fund.date_of_inception.month - 1) // 3 + 1
+        while date(year, 3 * quarter, 1) <= self.today:
+            quarter_end = date(year, 3 * quarter, 1) + timedelta(days=31)
+            quarter_end -= timedelta(days=quarter_end.day)
+            for title, topic, jurisdiction, days_after in QUARTERLY_RETURNS:
+                due = quarter_end + timedelta(days=days_after)
+                done = due < self.today
+                writer.add(ComplianceTask(
+                    title=f"{title} - Q{quarter} {year}", topic=topic, jurisdiction=jurisdiction,
+                    manager_id=fund.manager_entity_id, fund=fund, due_date=due,
+                    status='COMPLETED' if done else 'PENDING', completion_date=due if done else None,
+                ))
+            year, quarter = (year + 1, 1) if quarter == 4 else (year, quarter + 1)
@@ -0,0 +1,56 @@
+import csv
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from funds.services.performance import compute_performance, load_index_series
+
+COLUMNS = ('level', 'fund_id', 'investor_id', 'paid_in', 'distributed', 'residual',
+           'dpi', 'rvpi', 'tvpi', 'irr', 'pme')
+
+class Command(BaseCommand):
+    help = 'Writes IRR, TVPI, DPI, RVPI and KS-PME for every fund and every LP as CSV (quarterly LP reporting)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', dest='as_of', help='Report date (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--fund', type=int, action='append', dest='fund_ids',
+                            help='Restrict the run to this fund id (repeatable)')
+        parser.add_argument('--index', help='Benchmark CSV of date,level rows for KS-PME')
+        parser.add_argument('--output', help='Write the CSV here instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            as_of = date.fromisoformat(options['as_of']) if options['as_of'] else timezone.now().date()
+        except ValueError:
+            raise CommandError(f"Invalid --as-of date: {options['as_of']}")
+
+        index = None
+        if options['index']:
+            with open(options['index'], newline='', encoding='utf-8-sig') as fh:
+                index = load_index_series(fh)
+            if not index[0]:
+                raise CommandError(f"No date,level rows in {options['index']}")
+
+        funds = compute_performance(options['fund_ids'], as_of=as_of, index=index)
+        investors = compute_performance(options['fund_ids'], as_of=as_of, index=index, by_investor=True)
+
+        out = open(options['output'], 'w', newline='') if options['output'] else self.stdout
+        try:
+            writer = csv.writer(out)
+            writer.writerow(COLUMNS)
+            rows = [('FUND', fund_id, '', m) for fund_id, m in funds.items()]
+            rows += [('INVESTOR', fund_id, investor_id, m) for (fund_id, investor_id), m in investors.items()]
+            for level, fund_id, investor_id, m in rows:
+                writer.writerow([
+                    level, fund_id, investor_id, m['paid_in'], m['distributed'], m['residual'],
+                    m['dpi'], m['rvpi'], m['tvpi'],
+                    '' if m['irr'] is None else f"{m['irr']:.6f}",
+                    '' if m['pme'] is None else f"{m['pme']:.4f}",
+                ])
+        finally:
+            if options['output']:
+                out.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {len(funds)} fund and {len(investors)} investor rows as of {as_of} to {options["output"]}.'
+            ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from funds.services.stats import refresh_fund_stats
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized FundStats table from the transaction ledgers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fund', type=int, action='append', dest='fund_ids',
+                            help='Restrict the rebuild to this fund id (repeatable)')
+
+    def handle(self, *args, **options):
+        stats = refresh_fund_stats(options['fund_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {len(stats)} funds.'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:44
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funds', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FundStats',
+            fields=[
+                ('fund', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='funds.fund')),
+                ('total_committed', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('commitment_count', models.PositiveIntegerField(default=0)),
+                ('total_called', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('total_received', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('total_invested', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=24)),
+                ('total_distributed', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Fund Statistics',
+                'verbose_name_plural': 'Fund Statistics',
+            },
+        ),
+    ]
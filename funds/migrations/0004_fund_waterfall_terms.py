@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:13
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funds', '0003_fundstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fund',
+            name='carried_interest',
+            field=models.DecimalField(decimal_places=2, default=Decimal('20.00'), help_text='GP share of profits once caught up', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='fund',
+            name='gp_catch_up',
+            field=models.DecimalField(decimal_places=2, default=Decimal('100.00'), help_text='GP share of distributions in the catch-up tier', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='fund',
+            name='hurdle_rate',
+            field=models.DecimalField(decimal_places=2, default=Decimal('8.00'), help_text='Preferred return to LPs, compounded annually', max_digits=5),
+        ),
+    ]
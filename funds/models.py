@@ -82,6 +82,20 @@ class Fund(models.Model):
         related_name='child_schemes'
     )
 
+    # --- Waterfall Terms (annual %, used by funds.services.waterfall) ---
+    hurdle_rate = models.DecimalField(
+        max_digits=5, decimal_places=2, default=Decimal('8.00'),
+        help_text="Preferred return to LPs, compounded annually"
+    )
+    gp_catch_up = models.DecimalField(
+        max_digits=5, decimal_places=2, default=Decimal('100.00'),
+        help_text="GP share of distributions in the catch-up tier"
+    )
+    carried_interest = models.DecimalField(
+        max_digits=5, decimal_places=2, default=Decimal('20.00'),
+        help_text="GP share of profits once caught up"
+    )
+
     # --- Timeline ---
     date_of_inception = models.DateField(default=timezone.now)
     target_close_date = models.DateField(null=True, blank=True)
@@ -90,20 +104,33 @@ class Fund(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
 
+    def get_stats(self):
+        """
+        Returns the materialized FundStats row, building it on first access.
+        """
+        try:
+            return self.stats
+        except FundStats.DoesNotExist:
+            from .services.stats import refresh_fund_stats
+            stats = refresh_fund_stats([self.pk])[self.pk]
+            self.stats = stats
+            return stats
+
     @property
     def total_committed(self):
-        return self.commitments.aggregate(s=Sum('amount_committed'))['s'] or 0
+        return self.get_stats().total_committed
 
     @property
     def total_called(self):
-        # Requires import from transactions.models inside the method to avoid circular import
-        from transactions.models import CapitalCall
-        return CapitalCall.objects.filter(fund=self).aggregate(s=Sum('amount_called'))['s'] or 0
+        return self.get_stats().total_called
 
     @property
     def total_invested_capital(self):
-        from transactions.models import PurchaseTransaction
-        return PurchaseTransaction.objects.filter(fund=self).aggregate(s=Sum(F('quantity') * F('price_per_share')))['s'] or 0
+        return self.get_stats().total_invested
+
+    @property
+    def lp_count(self):
+        return self.get_stats().commitment_count
 
     @property
     def raised_percentage(self):
@@ -113,11 +140,35 @@ class Fund(models.Model):
 
     @property
     def drawdown_percentage(self):
-        committed = self.total_committed
-        if committed > 0:
-            return (self.total_called / committed) * 100
+        stats = self.get_stats()
+        if stats.total_committed > 0:
+            return (stats.total_called / stats.total_committed) * 100
         return 0
 
+class FundStats(models.Model):
+    """
+    Materialized per-fund totals.
+    Kept in sync by the transaction signals so fund pages read one row
+    instead of re-aggregating the ledgers on every request.
+    """
+    fund = models.OneToOneField(Fund, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    total_committed = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    commitment_count = models.PositiveIntegerField(default=0)
+    total_called = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    total_received = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    total_invested = models.DecimalField(max_digits=24, decimal_places=4, default=Decimal('0.0000'))
+    total_distributed = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Fund Statistics"
+        verbose_name_plural = "Fund Statistics"
+
+    def __str__(self):
+        return f"Stats for {self.fund_id}"
+
 class NavSnapshot(models.Model):
     """
     Quarterly/Monthly NAV records for Performance Reporting.
@@ -3,6 +3,13 @@ from .models import Fund, NavSnapshot, Document, StewardshipEngagement
 
 class FundSerializer(serializers.ModelSerializer):
     currency_code = serializers.CharField(source='currency.code', read_only=True)
+
+    # Served from the materialized FundStats row (select_related by the viewset)
+    total_committed = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True)
+    total_called = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True)
+    total_invested_capital = serializers.DecimalField(max_digits=24, decimal_places=2, read_only=True)
+    raised_percentage = serializers.FloatField(read_only=True)
+    drawdown_percentage = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Fund
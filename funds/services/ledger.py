@@ -0,0 +1,178 @@
+# funds/services/ledger.py
+import csv
+import heapq
+import json
+from collections import namedtuple
+from datetime import date
+from itertools import islice
+
+from django.db.models import CharField, DecimalField, ExpressionWrapper, F, Q, Value
+
+from core.utils.pagination import decode_cursor, encode_cursor
+
+# Stream order for rows sharing a date: the lifecycle order of the money
+LEDGER_KINDS = {
+    'COMMITMENT': 'Commitment',
+    'CALL': 'Capital Call',
+    'RECEIPT': 'Receipt',
+    'PURCHASE': 'Investment',
+    'REDEMPTION': 'Exit',
+    'DISTRIBUTION': 'Distribution',
+}
+KIND_ORDER = {kind: index for index, kind in enumerate(LEDGER_KINDS)}
+LEDGER_PAGE_SIZE = 50
+EXPORT_CHUNK_SIZE = 2000
+
+LedgerEntry = namedtuple(
+    'LedgerEntry', 'date kind pk fund_id fund_name counterparty amount reference'
+)
+EXPORT_FIELDS = LedgerEntry._fields
+
+
+def _ledger_sources():
+    """
+    Maps each ledger kind to (queryset, date field, counterparty, amount, reference).
+    Imported lazily: transactions.models depends on funds.models.
+    """
+    from transactions.models import (
+        CapitalCall, Distribution, DrawdownReceipt, InvestorCommitment,
+        PurchaseTransaction, RedemptionTransaction
+    )
+    trade_value = ExpressionWrapper(
+        F('quantity') * F('price_per_share'), output_field=DecimalField(max_digits=28, decimal_places=4)
+    )
+    no_reference = Value('', output_field=CharField())
+    return {
+        'COMMITMENT': (InvestorCommitment.objects, 'commitment_date', 'investor__name', F('amount_committed'), no_reference),
+        'CALL': (CapitalCall.objects, 'call_date', 'investor__name', F('amount_called'), F('reference')),
+        'RECEIPT': (DrawdownReceipt.objects, 'date_received', 'investor__name', F('amount_received'), F('transaction_reference')),
+        'PURCHASE': (PurchaseTransaction.objects, 'transaction_date', 'investee_company__name', trade_value, no_reference),
+        'REDEMPTION': (RedemptionTransaction.objects, 'transaction_date', 'investee_company__name', trade_value, no_reference),
+        'DISTRIBUTION': (Distribution.objects, 'distribution_date', 'investor__name', F('gross_amount'), F('distribution_type')),
+    }
+
+
+def _sort_key(entry):
+    # Newest first; same-day rows in lifecycle order, then newest row first
+    return (entry.date, -KIND_ORDER[entry.kind], entry.pk)
+
+
+def _seek(kind, key, forward):
+    """
+    Per-table half of the merged-stream comparison `row_key < key` (forward)
+    or `row_key > key` (backward) for rows of one kind.
+    """
+    cursor_date, cursor_kind, cursor_pk = key
+    if kind == cursor_kind:
+        if forward:
+            return Q(entry_date__lt=cursor_date) | Q(entry_date=cursor_date, pk__lt=cursor_pk)
+        return Q(entry_date__gt=cursor_date) | Q(entry_date=cursor_date, pk__gt=cursor_pk)
+    # Same-day rows of a kind sorted after the cursor's kind come after the cursor
+    later_kind = KIND_ORDER[kind] > KIND_ORDER[cursor_kind]
+    if forward:
+        return Q(entry_date__lte=cursor_date) if later_kind else Q(entry_date__lt=cursor_date)
+    return Q(entry_date__gt=cursor_date) if later_kind else Q(entry_date__gte=cursor_date)
+
+
+def _ledger_rows(fund_ids=None, kinds=None):
+    """Yields (kind, values queryset) per ledger table, unordered."""
+    for kind, (manager, date_field, party, amount, reference) in _ledger_sources().items():
+        if kinds and kind not in kinds:
+            continue
+        queryset = manager.all()
+        if fund_ids is not None:
+            queryset = queryset.filter(fund_id__in=fund_ids)
+        yield kind, queryset.annotate(
+            entry_date=F(date_field), counterparty=F(party), entry_amount=amount, entry_reference=reference
+        ).values_list(
+            'entry_date', 'pk', 'fund_id', 'fund__name', 'counterparty', 'entry_amount', 'entry_reference'
+        )
+
+
+def _entries(kind, rows):
+    for entry_date, pk, fund_id, fund_name, party, amount, reference in rows:
+        yield LedgerEntry(entry_date, kind, pk, fund_id, fund_name, party, amount, reference)
+
+
+def _cursor_key(token):
+    values = decode_cursor(token)
+    if not values or len(values) != 3 or not isinstance(values[0], date) or not isinstance(values[2], int):
+        return None
+    if not isinstance(values[1], str) or values[1] not in KIND_ORDER:
+        return None
+    return values
+
+
+def ledger_page(fund_ids=None, kinds=None, after=None, before=None, per_page=LEDGER_PAGE_SIZE):
+    """
+    One page of the unified activity ledger (commitments, calls, receipts,
+    purchases, redemptions and distributions), newest first.
+
+    Each table is seeked to the cursor and read for at most per_page + 1 rows;
+    the streams are merged in memory, so every page costs six indexed range
+    reads however deep it is. Returns the same dict shape as
+    core.utils.pagination.keyset_page.
+    """
+    after_key = _cursor_key(after)
+    before_key = None if after_key else _cursor_key(before)
+    key = after_key or before_key
+    forward = before_key is None
+    ordering = ('-entry_date', '-pk') if forward else ('entry_date', 'pk')
+
+    streams = []
+    for kind, rows in _ledger_rows(fund_ids, kinds):
+        if key:
+            rows = rows.filter(_seek(kind, key, forward))
+        streams.append(_entries(kind, rows.order_by(*ordering)[:per_page + 1]))
+
+    rows = list(islice(heapq.merge(*streams, key=_sort_key, reverse=forward), per_page + 1))
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    def cursor(entry):
+        return encode_cursor([entry.date, entry.kind, entry.pk])
+
+    has_next = has_more if forward else True
+    has_previous = bool(after_key) if forward else has_more
+    return {
+        'rows': rows,
+        'next_cursor': cursor(rows[-1]) if rows and has_next else None,
+        'previous_cursor': cursor(rows[0]) if rows and has_previous else None,
+    }
+
+
+def iter_ledger(fund_ids=None, kinds=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    The whole ledger as a lazy, newest-first stream: one chunked cursor per
+    table merged with a heap, so memory stays flat however long the history.
+    """
+    streams = [
+        _entries(kind, rows.order_by('-entry_date', '-pk').iterator(chunk_size=chunk_size))
+        for kind, rows in _ledger_rows(fund_ids, kinds)
+    ]
+    return heapq.merge(*streams, key=_sort_key, reverse=True)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(entries, fmt='csv'):
+    """Renders ledger entries as CSV (with header) or NDJSON lines, lazily."""
+    if fmt == 'ndjson':
+        for entry in entries:
+            row = entry._asdict()
+            row['date'] = entry.date.isoformat()
+            row['amount'] = str(entry.amount)
+            yield json.dumps(row) + '\n'
+        return
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for entry in entries:
+        yield writer.writerow(entry)
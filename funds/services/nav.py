@@ -0,0 +1,140 @@
+# funds/services/nav.py
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models import F, Sum
+
+from .portfolio import latest_share_valuations
+
+# Issue price used before a fund has any units outstanding (matches TransactionService)
+INITIAL_NAV = Decimal('10.00')
+
+NAV_QUANT = Decimal('0.0001')
+AMOUNT_QUANT = Decimal('0.01')
+
+
+def _grouped(queryset, keys, **aggregates):
+    """Runs one GROUP BY query and returns {key tuple: row}."""
+    rows = queryset.values(*keys).annotate(**aggregates)
+    return {tuple(row[k] for k in keys): row for row in rows}
+
+
+def compute_nav(as_of, fund_ids=None, persist=True):
+    """
+    Computes NAV for every fund (or `fund_ids`) as of a date with a fixed
+    number of grouped queries, independent of fund and holding counts.
+
+    NAV = (portfolio fair value + cash balance) / units outstanding, where
+      - fair value uses the latest ShareValuation per share class, falling
+        back to weighted purchase cost for unvalued classes,
+      - cash = receipts + redemption proceeds - purchases (incl. costs) - distributions
+        (the LP amounts and the GP's carried interest),
+      - units are the UnitIssuance rows for receipts dated on or before `as_of`.
+
+    When `persist` is set, results are upserted into NavSnapshot.
+    Returns {fund_id: {...components...}}.
+    """
+    from funds.models import Fund, NavSnapshot, UnitIssuance
+    from transactions.models import (
+        Distribution, DrawdownReceipt, PurchaseTransaction, RedemptionTransaction
+    )
+
+    funds = Fund.objects.all()
+    if fund_ids is not None:
+        funds = funds.filter(pk__in=fund_ids)
+    fund_pks = list(funds.values_list('pk', flat=True))
+    if not fund_pks:
+        return {}
+
+    purchases = _grouped(
+        PurchaseTransaction.objects.filter(fund_id__in=fund_pks, transaction_date__lte=as_of),
+        ('fund_id', 'share_class_id'),
+        qty=Sum('quantity'),
+        cost=Sum(F('quantity') * F('price_per_share')),
+        charges=Sum('transaction_costs'),
+    )
+    redemptions = _grouped(
+        RedemptionTransaction.objects.filter(fund_id__in=fund_pks, transaction_date__lte=as_of),
+        ('fund_id', 'share_class_id'),
+        qty=Sum('quantity'),
+        proceeds=Sum(F('quantity') * F('price_per_share')),
+    )
+    receipts = _grouped(
+        DrawdownReceipt.objects.filter(fund_id__in=fund_pks, date_received__lte=as_of),
+        ('fund_id',), total=Sum('amount_received'),
+    )
+    distributions = _grouped(
+        Distribution.objects.filter(fund_id__in=fund_pks, distribution_date__lte=as_of),
+        ('fund_id',), total=Sum(F('gross_amount') + F('carried_interest')),
+    )
+    units = _grouped(
+        UnitIssuance.objects.filter(position__fund_id__in=fund_pks, receipt__date_received__lte=as_of),
+        ('position__fund_id',), total=Sum('units_issued'),
+    )
+    fair_values = {
+        share_class_id: valuation['per_share_value']
+        for share_class_id, valuation in latest_share_valuations(
+            {share_class for _, share_class in purchases if share_class is not None}, as_of
+        ).items()
+    }
+
+    portfolio_value = defaultdict(Decimal)
+    cash_balance = defaultdict(Decimal)
+
+    for key in purchases.keys() | redemptions.keys():
+        fund_id, share_class_id = key
+        bought = purchases.get(key, {})
+        sold = redemptions.get(key, {})
+        bought_qty = bought.get('qty') or Decimal('0')
+        held_qty = bought_qty - (sold.get('qty') or Decimal('0'))
+
+        price = fair_values.get(share_class_id)
+        if price is None and bought_qty:
+            price = (bought.get('cost') or Decimal('0')) / bought_qty
+        if held_qty > 0 and price:
+            portfolio_value[fund_id] += held_qty * price
+
+        cash_balance[fund_id] += (
+            (sold.get('proceeds') or Decimal('0'))
+            - (bought.get('cost') or Decimal('0'))
+            - (bought.get('charges') or Decimal('0'))
+        )
+
+    results = {}
+    for fund_id in fund_pks:
+        cash = (
+            cash_balance[fund_id]
+            + (receipts.get((fund_id,), {}).get('total') or Decimal('0'))
+            - (distributions.get((fund_id,), {}).get('total') or Decimal('0'))
+        )
+        portfolio = portfolio_value[fund_id]
+        net_assets = portfolio + cash
+        units_outstanding = units.get((fund_id,), {}).get('total') or Decimal('0')
+        nav_per_unit = net_assets / units_outstanding if units_outstanding > 0 else INITIAL_NAV
+
+        results[fund_id] = {
+            'fund_id': fund_id,
+            'as_of': as_of,
+            'portfolio_value': portfolio.quantize(AMOUNT_QUANT),
+            'cash_balance': cash.quantize(AMOUNT_QUANT),
+            'net_assets': net_assets.quantize(AMOUNT_QUANT),
+            'units_outstanding': units_outstanding.quantize(NAV_QUANT),
+            'nav_per_unit': nav_per_unit.quantize(NAV_QUANT),
+        }
+
+    if persist:
+        NavSnapshot.objects.bulk_create(
+            [
+                NavSnapshot(
+                    fund_id=row['fund_id'],
+                    as_on_date=as_of,
+                    nav_per_unit=row['nav_per_unit'],
+                    aum=row['net_assets'],
+                    units_outstanding=row['units_outstanding'],
+                )
+                for row in results.values()
+            ],
+            update_conflicts=True,
+            unique_fields=['fund', 'as_on_date'],
+            update_fields=['nav_per_unit', 'aum', 'units_outstanding'],
+        )
+    return results
@@ -0,0 +1,257 @@
+# funds/services/performance.py
+import csv
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import OuterRef, Subquery, Sum
+from django.utils import timezone
+
+MULTIPLE_QUANT = Decimal('0.0001')
+# XIRR search space: -99.99% to +10,000% a year
+XIRR_LOWER, XIRR_UPPER = -0.9999, 100.0
+XIRR_TOLERANCE = 1e-9
+XIRR_MAX_ITERATIONS = 50
+XIRR_BISECTIONS = 200
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("Please run: pip install numpy")
+    return np
+
+
+def load_index_series(lines):
+    """
+    Parses a benchmark index from CSV lines of `date,level` (ISO dates; a
+    header row is skipped) into the (dates, levels) pair used for PME.
+    """
+    points = []
+    for row in csv.reader(lines):
+        if len(row) < 2 or not row[0].strip():
+            continue
+        try:
+            points.append((date.fromisoformat(row[0].strip()), float(row[1])))
+        except ValueError:
+            continue  # header or malformed row
+    points.sort()
+    return [d for d, _ in points], [level for _, level in points]
+
+
+def _index_level(index, on_date):
+    """Most recent index level on or before `on_date` (first level before the series starts)."""
+    dates, levels = index
+    i = bisect_right(dates, on_date)
+    return levels[i - 1] if i else levels[0]
+
+
+def xirr_many(series):
+    """
+    Solves XIRR for many cash-flow series at once. Each series is a list of
+    (date, amount) with contributions negative and distributions/value positive.
+
+    All series are padded into one matrix and stepped together with Newton's
+    method; the few that do not converge (or leave the search space) are
+    finished with a vectorised bisection on [XIRR_LOWER, XIRR_UPPER].
+    Returns a list of annual rates (floats), None where no rate exists.
+    """
+    np = _numpy()
+    n = len(series)
+    if not n:
+        return []
+    width = max(len(flows) for flows in series) or 1
+    amounts = np.zeros((n, width))
+    years = np.zeros((n, width))
+    for i, flows in enumerate(series):
+        if not flows:
+            continue
+        start = min(d for d, _ in flows)
+        amounts[i, :len(flows)] = [float(a) for _, a in flows]
+        years[i, :len(flows)] = [(d - start).days / 365.0 for d, _ in flows]
+
+    # A rate only exists when money went both ways
+    solvable = (amounts.min(axis=1) < 0) & (amounts.max(axis=1) > 0)
+
+    def npv(rate, rows):
+        return (amounts[rows] * (1.0 + rate[:, None]) ** -years[rows]).sum(axis=1)
+
+    rate = np.full(n, 0.1)
+    done = ~solvable
+    with np.errstate(all='ignore'):
+        for _ in range(XIRR_MAX_ITERATIONS):
+            active = ~done
+            if not active.any():
+                break
+            r = rate[active]
+            discount = (1.0 + r[:, None]) ** -years[active]
+            value = (amounts[active] * discount).sum(axis=1)
+            slope = (-years[active] * amounts[active] * discount / (1.0 + r[:, None])).sum(axis=1)
+            step = np.where(slope != 0, value / slope, np.nan)
+            rate[active] = r - step
+            converged = np.abs(step) < XIRR_TOLERANCE
+            done[np.flatnonzero(active)[converged]] = True
+
+        bad = solvable & (~done | ~np.isfinite(rate) | (rate <= XIRR_LOWER) | (rate > XIRR_UPPER))
+        if bad.any():
+            rows = np.flatnonzero(bad)
+            low = np.full(len(rows), XIRR_LOWER)
+            high = np.full(len(rows), XIRR_UPPER)
+            f_low = npv(low, rows)
+            bracketed = np.sign(f_low) != np.sign(npv(high, rows))
+            for _ in range(XIRR_BISECTIONS):
+                mid = (low + high) / 2
+                f_mid = npv(mid, rows)
+                left = np.sign(f_mid) == np.sign(f_low)
+                low = np.where(left, mid, low)
+                f_low = np.where(left, f_mid, f_low)
+                high = np.where(left, high, mid)
+            rate[rows] = np.where(bracketed, (low + high) / 2, np.nan)
+
+    return [float(r) if ok and np.isfinite(r) else None for r, ok in zip(rate, solvable)]
+
+
+def ks_pme(flows, index, as_of):
+    """
+    Kaplan-Schoar PME: distributions plus residual value over contributions,
+    each compounded to `as_of` by the benchmark index. Above 1.0 means the
+    fund beat the index. `flows` are (date, amount) as for xirr_many.
+    """
+    end_level = _index_level(index, as_of)
+    contributed = returned = 0.0
+    for flow_date, amount in flows:
+        growth = end_level / _index_level(index, flow_date)
+        if amount < 0:
+            contributed -= float(amount) * growth
+        else:
+            returned += float(amount) * growth
+    return returned / contributed if contributed else None
+
+
+def _multiple(numerator, denominator):
+    if not denominator:
+        return Decimal('0')
+    return (Decimal(numerator) / Decimal(denominator)).quantize(MULTIPLE_QUANT)
+
+
+def _flow_groups(as_of, fund_pks, keys):
+    """{key tuple: {date: (contributed, distributed)}} from two grouped queries."""
+    from transactions.models import Distribution, DrawdownReceipt
+
+    groups = defaultdict(lambda: defaultdict(lambda: [Decimal('0'), Decimal('0')]))
+    receipts = (
+        DrawdownReceipt.objects.filter(fund_id__in=fund_pks, date_received__lte=as_of)
+        .values(*keys, 'date_received').annotate(total=Sum('amount_received'))
+    )
+    for row in receipts:
+        groups[tuple(row[k] for k in keys)][row['date_received']][0] += row['total']
+    distributions = (
+        Distribution.objects.filter(fund_id__in=fund_pks, distribution_date__lte=as_of)
+        .values(*keys, 'distribution_date').annotate(total=Sum('gross_amount'))
+    )
+    for row in distributions:
+        groups[tuple(row[k] for k in keys)][row['distribution_date']][1] += row['total']
+    return groups
+
+
+def compute_performance(fund_ids=None, as_of=None, index=None, by_investor=False):
+    """
+    Performance metrics for every fund (or `fund_ids`) as of a date, and with
+    `by_investor` for every LP of those funds, in a fixed number of queries.
+
+    Cash flows are seen from the LP side: drawdown receipts are
+    contributions, distributions are returns, and the latest NAV on or
+    before `as_of` is the residual value (an LP's share is their units at
+    that NAV; LPs not yet issued units share the AUM left after those,
+    pro-rata to paid-in, so the LP residuals add up to the fund's).
+    Pass `index` from load_index_series to add the Kaplan-Schoar PME.
+
+    Returns {fund_id: metrics} or {(fund_id, investor_id): metrics} with
+    paid_in, distributed, residual, dpi, rvpi, tvpi, irr and pme.
+    """
+    from funds.models import Fund, NavSnapshot, UnitIssuance
+
+    as_of = as_of or timezone.now().date()
+    funds = Fund.objects.all()
+    if fund_ids is not None:
+        funds = funds.filter(pk__in=fund_ids)
+    fund_pks = list(funds.values_list('pk', flat=True))
+    if not fund_pks:
+        return {}
+
+    latest = NavSnapshot.objects.filter(
+        fund=OuterRef('fund'), as_on_date__lte=as_of
+    ).order_by('-as_on_date', '-pk').values('pk')[:1]
+    navs = {
+        nav.fund_id: nav
+        for nav in NavSnapshot.objects.filter(fund_id__in=fund_pks, pk=Subquery(latest))
+    }
+
+    keys = ('fund_id', 'investor_id') if by_investor else ('fund_id',)
+    groups = _flow_groups(as_of, fund_pks, keys)
+
+    residuals = {}
+    if by_investor:
+        units = {
+            (row['position__fund_id'], row['position__investor_id']): row['units']
+            for row in UnitIssuance.objects.filter(
+                position__fund_id__in=fund_pks, receipt__date_received__lte=as_of
+            ).values('position__fund_id', 'position__investor_id').annotate(units=Sum('units_issued'))
+        }
+        # LPs without units share only the AUM that issued units do not account for
+        unitised, unissued_paid_in = defaultdict(Decimal), defaultdict(Decimal)
+        for key, by_date in groups.items():
+            nav = navs.get(key[0])
+            if nav is None:
+                continue
+            if key in units:
+                residuals[key] = units[key] * nav.nav_per_unit
+                unitised[key[0]] += residuals[key]
+            else:
+                unissued_paid_in[key[0]] += sum(c for c, _ in by_date.values())
+        for key, by_date in groups.items():
+            nav = navs.get(key[0])
+            if nav is None or key in units or not unissued_paid_in[key[0]]:
+                continue
+            uncovered = max(nav.aum - unitised[key[0]], Decimal('0'))
+            paid_in = sum(c for c, _ in by_date.values())
+            residuals[key] = uncovered * paid_in / unissued_paid_in[key[0]]
+    else:
+        for fund_id in fund_pks:
+            groups.setdefault((fund_id,), {})  # every fund reports, even before its first flow
+            if fund_id in navs:
+                residuals[(fund_id,)] = navs[fund_id].aum
+
+    results, series = {}, []
+    for key, by_date in groups.items():
+        paid_in = sum((c for c, _ in by_date.values()), Decimal('0'))
+        distributed = sum((d for _, d in by_date.values()), Decimal('0'))
+        residual = residuals.get(key, Decimal('0'))
+        flows = []
+        for flow_date in sorted(by_date):
+            contributed, returned = by_date[flow_date]
+            if contributed:
+                flows.append((flow_date, -contributed))
+            if returned:
+                flows.append((flow_date, returned))
+        if residual:
+            flows.append((as_of, residual))
+
+        dpi, rvpi = _multiple(distributed, paid_in), _multiple(residual, paid_in)
+        results[key if by_investor else key[0]] = {
+            'paid_in': paid_in,
+            'distributed': distributed,
+            'residual': Decimal(residual).quantize(Decimal('0.01')),
+            'dpi': dpi,
+            'rvpi': rvpi,
+            'tvpi': dpi + rvpi,
+            'irr': None,
+            'pme': ks_pme(flows, index, as_of) if index and index[0] else None,
+        }
+        series.append(flows)
+
+    for metrics, irr in zip(results.values(), xirr_many(series)):
+        metrics['irr'] = irr
+    return results
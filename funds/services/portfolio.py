@@ -1,99 +1,118 @@
 # funds/services/portfolio.py
 from collections import defaultdict
-from django.db.models import Sum, Max
-from django.utils import timezone
+from decimal import Decimal
+from django.db.models import F, OuterRef, Subquery, Sum
 
-# Best-effort field accessors (so we don't need to change your models)
+AMOUNT_QUANT = Decimal('0.01')
+QTY_QUANT = Decimal('0.0001')
 
-def _get_qty(obj):
-    for f in ("units", "quantity", "number_of_shares", "shares", "no_of_units"):
-        if hasattr(obj, f):
-            return getattr(obj, f) or 0
-    # Fallback: try amount/price
-    if hasattr(obj, "amount") and hasattr(obj, "price_per_unit"):
-        try:
-            return (obj.amount or 0) / (obj.price_per_unit or 1)
-        except Exception:
-            return 0
-    return 0
 
+def latest_share_valuations(share_class_ids, as_of=None):
+    """
+    Returns {share_capital_id: {"per_share_value", "valuation_date"}} for the
+    most recent ShareValuation of each class (on or before `as_of`), using a
+    correlated subquery so the lookup is one query regardless of class count.
+    """
+    from investee_companies.models import ShareCapital, ShareValuation
+
+    if not share_class_ids:
+        return {}
+    latest = ShareValuation.objects.filter(share_capital=OuterRef('pk'))
+    if as_of is not None:
+        latest = latest.filter(valuation_report__valuation_date__lte=as_of)
+    latest = latest.order_by('-valuation_report__valuation_date', '-id')
 
-def _get_amount(obj):
-    for f in ("amount", "gross_amount", "net_amount", "total_amount"):
-        if hasattr(obj, f):
-            return getattr(obj, f) or 0
-    # Fallback from qty * price
-    if hasattr(obj, "price_per_unit"):
-        return (_get_qty(obj) or 0) * (getattr(obj, "price_per_unit") or 0)
-    return 0
+    rows = ShareCapital.objects.filter(pk__in=share_class_ids).annotate(
+        per_share_value=Subquery(latest.values('per_share_value')[:1]),
+        valuation_date=Subquery(latest.values('valuation_report__valuation_date')[:1]),
+    ).values('pk', 'per_share_value', 'valuation_date')
+    return {
+        row['pk']: {'per_share_value': row['per_share_value'], 'valuation_date': row['valuation_date']}
+        for row in rows if row['per_share_value'] is not None
+    }
 
 
-def compute_fund_positions(Fund, PurchaseTransaction, RedemptionTransaction, ValuationReport):
+def compute_fund_positions(fund_ids=None, as_of=None):
     """
     Returns a dict keyed by (fund_id, investee_company_id) with:
       qty_held, invested_cost, current_value, unrealised_gain, unrealised_gain_pct,
-      last_valuation_date, fair_value_per_share (if available)
+      last_valuation_date, fair_value_per_share (if available), partially_valued
+
+    Purchases and redemptions are summed in the database per
+    (fund, company, share class), so memory depends on the number of
+    positions rather than on the size of the trade history. Values are
+    exact Decimals; invested_cost is the weighted-average cost of the
+    quantity still held.
+
+    Unrealised gain and fair value per share cover only the share classes
+    that have a valuation; partially_valued marks a position holding some
+    classes that have none yet.
     """
-    # Aggregate purchases
-    purchases = PurchaseTransaction.objects.values(
-        "fund_id", "investee_company_id"
-    ).annotate(
-        qty=Sum("quantity", default=0) if hasattr(PurchaseTransaction, "quantity") else Sum("id")*0,
-        amount=Sum("amount", default=0),
-    )
+    from transactions.models import PurchaseTransaction, RedemptionTransaction
+
+    purchases = PurchaseTransaction.objects.all()
+    redemptions = RedemptionTransaction.objects.all()
+    if fund_ids is not None:
+        purchases = purchases.filter(fund_id__in=fund_ids)
+        redemptions = redemptions.filter(fund_id__in=fund_ids)
+    if as_of is not None:
+        purchases = purchases.filter(transaction_date__lte=as_of)
+        redemptions = redemptions.filter(transaction_date__lte=as_of)
 
-    # Gracefully recompute qty if quantity field isn't present
-    p_map = defaultdict(lambda: {"qty": 0.0, "amount": 0.0})
-    for p in PurchaseTransaction.objects.all():
-        key = (getattr(p, "fund_id"), getattr(p, "investee_company_id"))
-        p_map[key]["qty"] += float(_get_qty(p))
-        p_map[key]["amount"] += float(_get_amount(p))
+    keys = ('fund_id', 'investee_company_id', 'share_class_id')
+    sold = {
+        tuple(row[k] for k in keys): row['qty']
+        for row in redemptions.values(*keys).annotate(qty=Sum('quantity')).order_by().iterator()
+    }
+    bought = purchases.values(*keys).annotate(
+        qty=Sum('quantity'),
+        amount=Sum(F('quantity') * F('price_per_share')),
+    ).order_by()
 
-    # Aggregate redemptions
-    r_map = defaultdict(lambda: {"qty": 0.0, "amount": 0.0})
-    for r in RedemptionTransaction.objects.all():
-        key = (getattr(r, "fund_id"), getattr(r, "investee_company_id"))
-        r_map[key]["qty"] += float(_get_qty(r))
-        r_map[key]["amount"] += float(_get_amount(r))
+    # Per share class lots, rolled up to the company once valued
+    lines = []
+    for row in bought.iterator():
+        key = tuple(row[k] for k in keys)
+        qty_held = row['qty'] - sold.get(key, Decimal('0'))
+        avg_cost = row['amount'] / row['qty'] if row['qty'] else Decimal('0')
+        lines.append((key, qty_held, qty_held * avg_cost))
+
+    valuations = latest_share_valuations(
+        {share_class_id for (_, _, share_class_id), _, _ in lines if share_class_id}, as_of
+    )
 
-    # Latest valuation per investee company
-    latest_vals = {}
-    if ValuationReport is not None:
-        # We assume ValuationReport has fields: investee_company, report_date, fair_value_per_share
-        qs = (ValuationReport.objects
-              .values("investee_company_id")
-              .annotate(last_date=Max("report_date")))
-        last_dates = {row["investee_company_id"]: row["last_date"] for row in qs}
-        for ic_id, dt in last_dates.items():
-            vr = (ValuationReport.objects
-                  .filter(investee_company_id=ic_id, report_date=dt)
-                  .first())
-            if vr and hasattr(vr, "fair_value_per_share"):
-                latest_vals[ic_id] = {
-                    "fvps": float(vr.fair_value_per_share or 0),
-                    "date": vr.report_date,
-                }
+    totals = defaultdict(lambda: {
+        'qty': Decimal('0'), 'cost': Decimal('0'), 'value': Decimal('0'), 'date': None,
+        'valued_qty': Decimal('0'), 'valued_cost': Decimal('0'), 'unvalued': False,
+    })
+    for (fund_id, company_id, share_class_id), qty_held, cost in lines:
+        position = totals[(fund_id, company_id)]
+        position['qty'] += qty_held
+        position['cost'] += cost
+        valuation = valuations.get(share_class_id)
+        if valuation:
+            position['value'] += qty_held * valuation['per_share_value']
+            position['valued_qty'] += qty_held
+            position['valued_cost'] += cost
+            if position['date'] is None or valuation['valuation_date'] > position['date']:
+                position['date'] = valuation['valuation_date']
+        elif qty_held:
+            position['unvalued'] = True
 
-    # Build positions
     positions = {}
-    keys = set(p_map.keys()) | set(r_map.keys())
-    for key in keys:
-        p = p_map.get(key, {"qty": 0.0, "amount": 0.0})
-        r = r_map.get(key, {"qty": 0.0, "amount": 0.0})
-        qty_held = p["qty"] - r["qty"]
-        invested_cost = p["amount"]  # simple: total purchases; you can subtract avg cost of redeemed if needed
-        ic_id = key[1]
-        fvps = latest_vals.get(ic_id, {}).get("fvps", 0.0)
-        current_value = qty_held * fvps
-        unrealised_gain = current_value - invested_cost
-        unrealised_gain_pct = (unrealised_gain / invested_cost * 100.0) if invested_cost else 0.0
+    for key, p in totals.items():
+        # Unvalued classes carry no fair value, so their cost is left out of the gain
+        unrealised_gain = p['value'] - p['valued_cost']
+        unrealised_gain_pct = (unrealised_gain / p['valued_cost'] * 100) if p['valued_cost'] else Decimal('0')
+        fvps = (p['value'] / p['valued_qty']) if p['valued_qty'] else Decimal('0')
         positions[key] = {
-            "qty_held": round(qty_held, 4),
-            "invested_cost": round(invested_cost, 2),
-            "current_value": round(current_value, 2),
-            "unrealised_gain": round(unrealised_gain, 2),
-            "unrealised_gain_pct": round(unrealised_gain_pct, 2),
-            "fair_value_per_share": fvps,
-            "last_valuation_date": latest_vals.get(ic_id, {}).get("date"),
+            "qty_held": p['qty'].quantize(QTY_QUANT),
+            "invested_cost": p['cost'].quantize(AMOUNT_QUANT),
+            "current_value": p['value'].quantize(AMOUNT_QUANT),
+            "unrealised_gain": unrealised_gain.quantize(AMOUNT_QUANT),
+            "unrealised_gain_pct": unrealised_gain_pct.quantize(AMOUNT_QUANT),
+            "fair_value_per_share": fvps.quantize(QTY_QUANT),
+            "last_valuation_date": p['date'],
+            "partially_valued": bool(p['date']) and p['unvalued'],
         }
-    return positions
\ No newline at end of file
+    return positions
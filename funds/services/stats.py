@@ -0,0 +1,120 @@
+# funds/services/stats.py
+from decimal import Decimal
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+STAT_FIELDS = (
+    'total_committed',
+    'commitment_count',
+    'total_called',
+    'total_received',
+    'total_invested',
+    'total_distributed',
+)
+
+
+def _stat_sources():
+    """
+    Maps each ledger model to the FundStats columns it feeds.
+    Every column carries the grouped aggregate used for a rebuild and the
+    per-row value used for incremental updates.
+    """
+    from transactions.models import (
+        CapitalCall, Distribution, DrawdownReceipt,
+        InvestorCommitment, PurchaseTransaction
+    )
+    return {
+        InvestorCommitment: {
+            'total_committed': (Sum('amount_committed'), lambda o: o.amount_committed),
+            'commitment_count': (Count('id'), lambda o: 1),
+        },
+        CapitalCall: {
+            'total_called': (Sum('amount_called'), lambda o: o.amount_called),
+        },
+        DrawdownReceipt: {
+            'total_received': (Sum('amount_received'), lambda o: o.amount_received),
+        },
+        PurchaseTransaction: {
+            'total_invested': (
+                Sum(F('quantity') * F('price_per_share')),
+                lambda o: Decimal(o.quantity) * Decimal(o.price_per_share),
+            ),
+        },
+        Distribution: {
+            'total_distributed': (Sum('gross_amount'), lambda o: o.gross_amount),
+        },
+    }
+
+
+def tracked_models():
+    return tuple(_stat_sources().keys())
+
+
+def stats_contribution(instance):
+    """
+    Returns (fund_id, {column: value}) describing what a single ledger row
+    adds to its fund's statistics.
+    """
+    columns = _stat_sources().get(type(instance))
+    if not columns or not instance.fund_id:
+        return None
+    return instance.fund_id, {name: value(instance) or 0 for name, (_, value) in columns.items()}
+
+
+def refresh_fund_stats(fund_ids=None):
+    """
+    Rebuilds FundStats from the ledgers with one grouped query per source
+    table and a single upsert. Returns {fund_id: FundStats}.
+    """
+    from funds.models import Fund, FundStats
+
+    funds = Fund.objects.all()
+    if fund_ids is not None:
+        funds = funds.filter(pk__in=fund_ids)
+    totals = {pk: {name: 0 for name in STAT_FIELDS} for pk in funds.values_list('pk', flat=True)}
+    if not totals:
+        return {}
+
+    for model, columns in _stat_sources().items():
+        rows = model.objects.filter(fund_id__in=totals.keys()).values('fund_id').annotate(
+            **{name: aggregate for name, (aggregate, _) in columns.items()}
+        )
+        for row in rows:
+            for name in columns:
+                totals[row['fund_id']][name] = row[name] or 0
+
+    stats = [FundStats(fund_id=pk, **values) for pk, values in totals.items()]
+    FundStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['fund'],
+        update_fields=[*STAT_FIELDS, 'updated_at'],
+    )
+    return {s.fund_id: s for s in stats}
+
+
+def apply_stats_change(previous=None, current=None):
+    """
+    Applies the difference between a row's old and new contribution
+    (as returned by stats_contribution) using in-place F() updates.
+    """
+    from funds.models import FundStats
+
+    deltas = {}
+    for contribution, sign in ((previous, -1), (current, 1)):
+        if not contribution:
+            continue
+        fund_id, values = contribution
+        fund_deltas = deltas.setdefault(fund_id, {})
+        for name, value in values.items():
+            fund_deltas[name] = fund_deltas.get(name, 0) + sign * value
+
+    for fund_id, fund_deltas in deltas.items():
+        changes = {name: F(name) + delta for name, delta in fund_deltas.items() if delta}
+        if not changes:
+            continue
+        updated = FundStats.objects.filter(fund_id=fund_id).update(updated_at=timezone.now(), **changes)
+        if not updated and current and current[0] == fund_id:
+            # First write for this fund: the ledger row is already saved, so
+            # a rebuild picks it up.
+            refresh_fund_stats([fund_id])
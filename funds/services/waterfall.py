@@ -0,0 +1,143 @@
+# funds/services/waterfall.py
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from .performance import _numpy
+
+CENT = Decimal('0.01')
+DAYS_PER_YEAR = 365.0
+
+WaterfallLine = namedtuple('WaterfallLine', [
+    'investor_id', 'contributed', 'allocated',
+    'return_of_capital', 'preferred_return', 'catch_up', 'carry_split',
+    'lp_amount', 'gp_amount',
+])
+
+
+def _capital_accounts(fund, distribution_date):
+    """
+    Per-LP arrays from two grouped queries: contributed capital, prior LP
+    distributions, prior GP carry, and both cash flows compounded to
+    `distribution_date` at the fund's hurdle rate.
+    """
+    from transactions.models import Distribution, DrawdownReceipt
+
+    np = _numpy()
+    hurdle = float(fund.hurdle_rate) / 100
+
+    receipts = list(
+        DrawdownReceipt.objects.filter(fund=fund, date_received__lte=distribution_date)
+        .values_list('investor_id', 'date_received').annotate(total=Sum('amount_received')).order_by()
+    )
+    investor_ids = sorted({investor_id for investor_id, _, _ in receipts})
+    position = {investor_id: i for i, investor_id in enumerate(investor_ids)}
+
+    def compounded(flows):
+        """(row index, amount, amount grown at the hurdle) arrays for (investor, date, amount) rows."""
+        rows = [(position[i], float(a), (distribution_date - d).days / DAYS_PER_YEAR)
+                for i, d, a in flows if i in position]
+        if not rows:
+            return np.zeros(0, dtype=int), np.zeros(0), np.zeros(0)
+        index, amounts, years = (np.array(column) for column in zip(*rows))
+        return index.astype(int), amounts, amounts * (1.0 + hurdle) ** years
+
+    n = len(investor_ids)
+    accounts = {key: np.zeros(n) for key in ('contributed', 'grown_in', 'distributed', 'grown_out', 'carried')}
+    index, amounts, grown = compounded(receipts)
+    np.add.at(accounts['contributed'], index, amounts)
+    np.add.at(accounts['grown_in'], index, grown)
+
+    distributions = list(
+        Distribution.objects.filter(fund=fund, distribution_date__lte=distribution_date)
+        .values_list('investor_id', 'distribution_date')
+        .annotate(total=Sum('gross_amount'), carry=Sum('carried_interest')).order_by()
+    )
+    index, amounts, grown = compounded((i, d, a) for i, d, a, _ in distributions)
+    np.add.at(accounts['distributed'], index, amounts)
+    np.add.at(accounts['grown_out'], index, grown)
+    index, carried, _ = compounded((i, d, c) for i, d, _, c in distributions)
+    np.add.at(accounts['carried'], index, carried)
+    return investor_ids, accounts
+
+
+def _split_cents(total_cents, weights):
+    """Splits whole cents pro-rata to `weights`; leftover cents go to the largest remainders."""
+    np = _numpy()
+    raw = total_cents * weights / weights.sum()
+    cents = np.floor(raw).astype(np.int64)
+    leftover = int(total_cents - cents.sum())
+    if leftover:
+        cents[np.argsort(-(raw - cents), kind='stable')[:leftover]] += 1
+    return cents
+
+
+def compute_waterfall(fund, distributable, distribution_date):
+    """
+    Allocates a fund-level distributable amount across every LP by
+    contributed capital and runs each LP's share through the European
+    waterfall, cumulatively with everything distributed before:
+
+      1. return of capital until contributions are repaid
+      2. preferred return until distributions compound to the contributions
+         at `fund.hurdle_rate`
+      3. GP catch-up at `fund.gp_catch_up` until the GP holds
+         `fund.carried_interest` of all profits
+      4. the rest split LP / GP at the carried interest
+
+    All tiers are computed on per-investor arrays at once. Returns a list
+    of WaterfallLine (amounts in Decimal) for LPs with a non-zero share.
+    """
+    np = _numpy()
+    investor_ids, accounts = _capital_accounts(fund, distribution_date)
+    total_cents = int((Decimal(distributable) / CENT).to_integral_value())
+    if not investor_ids or total_cents <= 0 or not accounts['contributed'].sum():
+        return []
+
+    allocated_cents = _split_cents(total_cents, np.round(accounts['contributed'] * 100))
+    allocated = allocated_cents / 100.0
+    contributed, distributed = accounts['contributed'], accounts['distributed']
+    catch_up_rate = float(fund.gp_catch_up) / 100
+    carry = float(fund.carried_interest) / 100
+
+    capital_due = np.maximum(contributed - distributed, 0)
+    hurdle_due = np.maximum(accounts['grown_in'] - accounts['grown_out'], 0)
+    return_of_capital = np.minimum(allocated, capital_due)
+    remaining = allocated - return_of_capital
+    preferred = np.minimum(remaining, np.maximum(hurdle_due - capital_due, 0))
+    remaining -= preferred
+
+    if catch_up_rate > carry:
+        # Catch-up size T solves: carried + rate*T = carry * (LP profit + carried + T)
+        lp_profit = np.maximum(distributed - contributed, 0) + preferred
+        carried = accounts['carried']
+        catch_up_due = np.maximum(carry * (lp_profit + carried) - carried, 0) / (catch_up_rate - carry)
+    else:
+        catch_up_due = np.zeros_like(allocated)
+    catch_up = np.minimum(remaining, catch_up_due)
+    split = remaining - catch_up
+
+    gp_cents = np.minimum(np.round((catch_up_rate * catch_up + carry * split) * 100).astype(np.int64), allocated_cents)
+    tiers = [np.round(tier * 100).astype(np.int64) for tier in (return_of_capital, preferred, catch_up)]
+
+    def money(cents):
+        return Decimal(int(cents)) * CENT
+
+    lines = []
+    for i, investor_id in enumerate(investor_ids):
+        if not allocated_cents[i]:
+            continue
+        roc, pref, catch = (int(tier[i]) for tier in tiers)
+        lines.append(WaterfallLine(
+            investor_id=investor_id,
+            contributed=money(round(contributed[i] * 100)),
+            allocated=money(allocated_cents[i]),
+            return_of_capital=money(roc),
+            preferred_return=money(pref),
+            catch_up=money(catch),
+            carry_split=money(allocated_cents[i] - roc - pref - catch),
+            lp_amount=money(allocated_cents[i] - gp_cents[i]),
+            gp_amount=money(gp_cents[i]),
+        ))
+    return lines
@@ -1,3 +1,421 @@
+from decimal import Decimal
+from datetime import date
+
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import CommandError
+from django.db.models import Sum
 from django.test import TestCase
+from django.urls import reverse
+
+from currencies.models import Currency
+from investors.models import Investor
+from investee_companies.models import InvesteeCompany, ShareCapital, ValuationReport, ShareValuation
+from manager_entities.models import EntityMembership, ManagerEntity
+from transactions.models import (
+    CapitalCall, Distribution, DrawdownReceipt,
+    InvestorCommitment, PurchaseTransaction, RedemptionTransaction
+)
+from .models import Fund, FundStats, InvestorPosition, NavSnapshot, UnitIssuance
+from core.utils.pagination import encode_cursor
+from .services.ledger import iter_ledger, ledger_page
+from .services.nav import compute_nav
+from .services.performance import compute_performance, load_index_series, xirr_many
+from .services.portfolio import compute_fund_positions
+from .services.stats import refresh_fund_stats
+
+
+class FundStatsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        cls.entity = ManagerEntity.objects.create(name="Test Manager")
+        cls.fund = Fund.objects.create(
+            name="Growth Fund I", manager_entity=cls.entity,
+            currency=cls.currency, corpus=Decimal('1000000.00')
+        )
+        cls.investor = Investor.objects.create(name="LP One", email="lp1@example.com", pan="ABCDE1234F")
+        cls.company = InvesteeCompany.objects.create(name="Acme Pvt Ltd")
+
+    def test_stats_follow_ledger_writes(self):
+        commitment = InvestorCommitment.objects.create(
+            fund=self.fund, investor=self.investor, amount_committed=Decimal('500000.00')
+        )
+        call = CapitalCall.objects.create(
+            fund=self.fund, investor=self.investor, due_date=date(2025, 1, 31),
+            amount_called=Decimal('100000.00'), purpose="Drawdown 1", reference="CC-1"
+        )
+        DrawdownReceipt.objects.create(
+            fund=self.fund, investor=self.investor, capital_call=call,
+            amount_received=Decimal('100000.00'), date_received=date(2025, 1, 20),
+            transaction_reference="UTR1"
+        )
+        PurchaseTransaction.objects.create(
+            fund=self.fund, investee_company=self.company,
+            quantity=Decimal('100.00'), price_per_share=Decimal('250.00')
+        )
+        Distribution.objects.create(fund=self.fund, investor=self.investor, gross_amount=Decimal('5000.00'))
+
+        commitment.amount_committed = Decimal('600000.00')
+        commitment.save()
+        call.delete()
+
+        stats = FundStats.objects.get(fund=self.fund)
+        self.assertEqual(stats.total_committed, Decimal('600000.00'))
+        self.assertEqual(stats.commitment_count, 1)
+        self.assertEqual(stats.total_called, Decimal('0.00'))
+        self.assertEqual(stats.total_received, Decimal('100000.00'))
+        self.assertEqual(stats.total_invested, Decimal('25000.00'))
+        self.assertEqual(stats.total_distributed, Decimal('5000.00'))
+
+        # Incremental state must agree with a full rebuild
+        rebuilt = refresh_fund_stats([self.fund.pk])[self.fund.pk]
+        self.assertEqual(rebuilt.total_committed, stats.total_committed)
+        self.assertEqual(rebuilt.total_invested, stats.total_invested)
+
+    def test_fund_properties_read_one_row(self):
+        InvestorCommitment.objects.create(
+            fund=self.fund, investor=self.investor, amount_committed=Decimal('250000.00')
+        )
+        fund = Fund.objects.select_related('stats').get(pk=self.fund.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(fund.total_committed, Decimal('250000.00'))
+            self.assertEqual(fund.raised_percentage, Decimal('25'))
+            self.assertEqual(fund.drawdown_percentage, 0)
+
+
+class FundAddViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        cls.entity = ManagerEntity.objects.create(name="Launch Manager")
+        cls.user = User.objects.create_superuser("launcher", "launcher@example.com", "pw")
+        EntityMembership.objects.create(user=cls.user, entity=cls.entity, role='ADMIN')
+
+    def test_launch_posts_every_rendered_field(self):
+        self.client.force_login(self.user)
+        url = reverse('funds:fund_add')
+        response = self.client.get(url)
+        form = response.context['form']
+        # The template lays fields out by hand: each one the form requires must be on the page
+        for name in form.fields:
+            self.assertContains(response, f'name="{name}"')
+
+        data = {name: form[name].value() for name in form.fields}
+        data.update({
+            'name': "Launch Fund I", 'sebi_registration_number': "IN/AIF2/25-26/0001",
+            'currency': self.currency.pk, 'manager_entity': self.entity.pk, 'date_of_inception': '2025-04-01',
+            'carried_interest': '15',
+        })
+        response = self.client.post(url, {k: v for k, v in data.items() if v is not None})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'funds/fund_success.html')
+        fund = Fund.objects.get(name="Launch Fund I")
+        self.assertEqual((fund.manager_entity, fund.hurdle_rate, fund.carried_interest),
+                         (self.entity, Decimal('8.00'), Decimal('15.00')))
+
+
+class ComputeNavTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        entity = ManagerEntity.objects.create(name="NAV Manager")
+        cls.fund = Fund.objects.create(name="NAV Fund", manager_entity=entity, currency=currency)
+        cls.other_fund = Fund.objects.create(name="Empty Fund", manager_entity=entity, currency=currency)
+        investor = Investor.objects.create(name="LP", email="lp@example.com", pan="PQRST6789K")
+        company = InvesteeCompany.objects.create(name="Valued Co")
+        cls.share_class = ShareCapital.objects.create(investee_company=company, class_name="Series A")
+
+        receipt = DrawdownReceipt.objects.create(
+            fund=cls.fund, investor=investor, amount_received=Decimal('100000.00'),
+            date_received=date(2025, 1, 10), transaction_reference="UTR-NAV"
+        )
+        position = InvestorPosition.objects.create(fund=cls.fund, investor=investor, total_units=Decimal('10000'))
+        UnitIssuance.objects.create(
+            position=position, receipt=receipt,
+            units_issued=Decimal('10000'), nav_at_issuance=Decimal('10.00')
+        )
+        PurchaseTransaction.objects.create(
+            fund=cls.fund, investee_company=company, share_class=cls.share_class,
+            transaction_date=date(2025, 2, 1), quantity=Decimal('600.00'), price_per_share=Decimal('100.00')
+        )
+        for valuation_date, value in ((date(2025, 3, 31), '150.0000'), (date(2025, 6, 30), '200.0000')):
+            report = ValuationReport.objects.create(investee_company=company, valuation_date=valuation_date)
+            ShareValuation.objects.create(
+                valuation_report=report, share_capital=cls.share_class, per_share_value=Decimal(value)
+            )
+
+    def test_batch_nav_uses_latest_valuation_as_of(self):
+        results = compute_nav(date(2025, 4, 30))
+
+        nav = results[self.fund.pk]
+        self.assertEqual(nav['portfolio_value'], Decimal('90000.00'))
+        self.assertEqual(nav['cash_balance'], Decimal('40000.00'))
+        self.assertEqual(nav['net_assets'], Decimal('130000.00'))
+        self.assertEqual(nav['nav_per_unit'], Decimal('13.0000'))
+        self.assertIn(self.other_fund.pk, results)
+
+        snapshot = NavSnapshot.objects.get(fund=self.fund, as_on_date=date(2025, 4, 30))
+        self.assertEqual(snapshot.aum, Decimal('130000.00'))
+
+    def test_rerun_updates_snapshot_in_place(self):
+        compute_nav(date(2025, 7, 31), fund_ids=[self.fund.pk])
+        compute_nav(date(2025, 7, 31), fund_ids=[self.fund.pk])
+
+        snapshots = NavSnapshot.objects.filter(fund=self.fund, as_on_date=date(2025, 7, 31))
+        self.assertEqual(snapshots.count(), 1)
+        self.assertEqual(snapshots.get().nav_per_unit, Decimal('16.0000'))
+
+
+class FundPositionsTest(ComputeNavTest):
+
+    def test_positions_are_exact_and_as_of(self):
+        positions = compute_fund_positions(fund_ids=[self.fund.pk], as_of=date(2025, 4, 30))
+
+        (key, position), = positions.items()
+        self.assertEqual(key, (self.fund.pk, self.share_class.investee_company_id))
+        self.assertEqual(position['qty_held'], Decimal('600.0000'))
+        self.assertEqual(position['invested_cost'], Decimal('60000.00'))
+        self.assertEqual(position['current_value'], Decimal('90000.00'))
+        self.assertEqual(position['unrealised_gain_pct'], Decimal('50.00'))
+        self.assertEqual(position['last_valuation_date'], date(2025, 3, 31))
+        self.assertFalse(position['partially_valued'])
+
+    def test_gain_covers_only_valued_classes(self):
+        unvalued = ShareCapital.objects.create(
+            investee_company=self.share_class.investee_company, class_name="Series B"
+        )
+        PurchaseTransaction.objects.create(
+            fund=self.fund, investee_company=unvalued.investee_company, share_class=unvalued,
+            transaction_date=date(2025, 3, 1), quantity=Decimal('100.00'), price_per_share=Decimal('500.00')
+        )
+        position = compute_fund_positions(fund_ids=[self.fund.pk], as_of=date(2025, 4, 30))[
+            (self.fund.pk, unvalued.investee_company_id)
+        ]
+
+        self.assertEqual(position['qty_held'], Decimal('700.0000'))
+        self.assertEqual(position['invested_cost'], Decimal('110000.00'))
+        self.assertEqual(position['current_value'], Decimal('90000.00'))
+        # Series A alone: 90,000 against its 60,000 cost, not against the 110,000 held
+        self.assertEqual(position['unrealised_gain'], Decimal('30000.00'))
+        self.assertEqual(position['unrealised_gain_pct'], Decimal('50.00'))
+        self.assertEqual(position['fair_value_per_share'], Decimal('150.0000'))
+        self.assertTrue(position['partially_valued'])
+
+    def test_positions_before_first_trade_are_empty(self):
+        self.assertEqual(compute_fund_positions(as_of=date(2025, 1, 1)), {})
+
+
+class ActivityLedgerTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        entity = ManagerEntity.objects.create(name="Ledger Manager")
+        cls.fund = Fund.objects.create(name="Ledger Fund", manager_entity=entity, currency=currency)
+        other = Fund.objects.create(name="Other Fund", manager_entity=entity, currency=currency)
+        investor = Investor.objects.create(name="LP Ledger", email="ledger@example.com", pan="LEDGE1234R")
+        company = InvesteeCompany.objects.create(name="Ledger Co")
+        day1, day2 = date(2025, 1, 10), date(2025, 2, 10)
+
+        for amount in ('100.00', '200.00'):
+            InvestorCommitment.objects.create(fund=cls.fund, investor=investor, amount_committed=Decimal(amount), commitment_date=day1)
+        call = CapitalCall.objects.create(
+            fund=cls.fund, investor=investor, call_date=day1, due_date=day2,
+            amount_called=Decimal('50.00'), purpose="Drawdown", reference="LC-1"
+        )
+        DrawdownReceipt.objects.create(
+            fund=cls.fund, investor=investor, capital_call=call, amount_received=Decimal('50.00'),
+            date_received=day2, transaction_reference="UTR-1"
+        )
+        PurchaseTransaction.objects.create(
+            fund=cls.fund, investee_company=company, transaction_date=day2,
+            quantity=Decimal('10'), price_per_share=Decimal('4.00')
+        )
+        RedemptionTransaction.objects.create(
+            fund=cls.fund, investee_company=company, transaction_date=day2,
+            quantity=Decimal('5'), price_per_share=Decimal('6.00')
+        )
+        Distribution.objects.create(fund=cls.fund, investor=investor, gross_amount=Decimal('5.00'), distribution_date=day2)
+        InvestorCommitment.objects.create(fund=other, investor=investor, amount_committed=Decimal('999.00'), commitment_date=day2)
+        cls.user = User.objects.create_user("ledger", password="pw")
+
+    def test_stream_is_date_ordered_and_scoped(self):
+        entries = list(iter_ledger([self.fund.pk], chunk_size=2))
+
+        self.assertEqual(
+            [entry.kind for entry in entries],
+            ['RECEIPT', 'PURCHASE', 'REDEMPTION', 'DISTRIBUTION', 'COMMITMENT', 'COMMITMENT', 'CALL'],
+        )
+        self.assertEqual(entries[1].amount, Decimal('40'))
+        self.assertEqual(entries[0].reference, 'UTR-1')
+        # Same-day rows of one kind: newest row first
+        self.assertEqual([e.amount for e in entries if e.kind == 'COMMITMENT'], [Decimal('200.00'), Decimal('100.00')])
+
+    def test_keyset_pages_walk_both_ways(self):
+        expected = list(iter_ledger([self.fund.pk]))
+
+        pages, cursor = [], None
+        while True:
+            with self.assertNumQueries(6):
+                page = ledger_page([self.fund.pk], after=cursor, per_page=3)
+            pages.append(page)
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual([entry for page in pages for entry in page['rows']], expected)
+        self.assertEqual([len(page['rows']) for page in pages], [3, 3, 1])
+
+        back = ledger_page([self.fund.pk], before=pages[-1]['previous_cursor'], per_page=3)
+        self.assertEqual(back['rows'], pages[1]['rows'])
+        first = ledger_page([self.fund.pk], before=back['previous_cursor'], per_page=3)
+        self.assertEqual(first['rows'], pages[0]['rows'])
+        self.assertIsNone(first['previous_cursor'])
+
+        # Tampered cursors read the first page
+        for token in (encode_cursor(['2025-01-10', 'RECEIPT', 1]), encode_cursor([date(2025, 1, 10), ['RECEIPT'], 1]),
+                      'e30', 'W3siZCI6IngifV0'):
+            self.assertEqual(ledger_page([self.fund.pk], after=token, per_page=3)['rows'], pages[0]['rows'])
+
+    def test_activity_log_and_exports(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('funds:activity-log', args=[self.fund.pk]))
+        self.assertEqual(len(response.context['entries']), 7)
+
+        export_url = reverse('funds:activity-export', args=[self.fund.pk])
+        lines = b''.join(self.client.get(export_url).streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'date,kind,pk,fund_id,fund_name,counterparty,amount,reference')
+        self.assertEqual(len(lines), 8)
+
+        rows = b''.join(self.client.get(export_url, {'format': 'ndjson'}).streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(rows[0])['kind'], 'RECEIPT')
+        self.assertEqual(json.loads(rows[-1])['date'], '2025-01-10')
+
+
+class PerformanceEngineTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        entity = ManagerEntity.objects.create(name="Performance Manager")
+        cls.fund = Fund.objects.create(name="Performance Fund", manager_entity=entity, currency=currency)
+        cls.idle_fund = Fund.objects.create(name="Idle Fund", manager_entity=entity, currency=currency)
+        cls.lp_a = Investor.objects.create(name="LP A", email="a@example.com", pan="AAAAA1111A")
+        cls.lp_b = Investor.objects.create(name="LP B", email="b@example.com", pan="BBBBB2222B")
+
+        receipt = DrawdownReceipt.objects.create(
+            fund=cls.fund, investor=cls.lp_a, amount_received=Decimal('600.00'),
+            date_received=date(2024, 1, 1), transaction_reference="UTR-A"
+        )
+        DrawdownReceipt.objects.create(
+            fund=cls.fund, investor=cls.lp_b, amount_received=Decimal('400.00'),
+            date_received=date(2024, 1, 1), transaction_reference="UTR-B"
+        )
+        position = InvestorPosition.objects.create(fund=cls.fund, investor=cls.lp_a, total_units=Decimal('60'))
+        UnitIssuance.objects.create(position=position, receipt=receipt, units_issued=Decimal('60'), nav_at_issuance=Decimal('10.00'))
+        Distribution.objects.create(fund=cls.fund, investor=cls.lp_a, gross_amount=Decimal('300.00'), distribution_date=date(2024, 7, 1))
+        NavSnapshot.objects.create(
+            fund=cls.fund, as_on_date=date(2024, 12, 31), nav_per_unit=Decimal('12.0000'),
+            aum=Decimal('1000.00'), units_outstanding=Decimal('100')
+        )
+
+    def test_xirr_matches_reference_values(self):
+        excel_example = [
+            (date(2008, 1, 1), -10000), (date(2008, 3, 1), 2750), (date(2008, 10, 30), 4250),
+            (date(2009, 2, 15), 3250), (date(2009, 4, 1), 2750),
+        ]
+        heavy_loss = [(date(2021, 1, 1), -1000), (date(2022, 1, 1), 1)]
+        rates = xirr_many([
+            [(date(2025, 1, 1), -1000), (date(2026, 1, 1), 1100)],
+            excel_example,
+            heavy_loss,
+            [(date(2024, 1, 1), -1000)],
+            [],
+        ])
+
+        self.assertAlmostEqual(rates[0], 0.10, places=9)
+        self.assertAlmostEqual(rates[1], 0.373362535, places=6)
+        self.assertAlmostEqual(rates[2], -0.999, places=6)
+        self.assertEqual(rates[3:], [None, None])
+
+    def test_fund_and_investor_multiples(self):
+        with self.assertNumQueries(4):
+            funds = compute_performance(as_of=date(2024, 12, 31))
+        fund = funds[self.fund.pk]
+        self.assertEqual((fund['paid_in'], fund['distributed'], fund['residual']),
+                         (Decimal('1000.00'), Decimal('300.00'), Decimal('1000.00')))
+        self.assertEqual((fund['dpi'], fund['rvpi'], fund['tvpi']), (Decimal('0.3'), Decimal('1'), Decimal('1.3')))
+        self.assertGreater(fund['irr'], 0.3)
+        self.assertIsNone(fund['pme'])
+        self.assertEqual(funds[self.idle_fund.pk]['tvpi'], 0)
+
+        investors = compute_performance([self.fund.pk], as_of=date(2024, 12, 31), by_investor=True)
+        # LP A: 60 units at 12.00; LP B has no units yet, so the AUM the units leave over
+        self.assertEqual(investors[(self.fund.pk, self.lp_a.pk)]['residual'], Decimal('720.00'))
+        self.assertEqual(investors[(self.fund.pk, self.lp_b.pk)]['residual'], Decimal('280.00'))
+        self.assertEqual(sum(m['residual'] for m in investors.values()), fund['residual'])
+        self.assertLess(investors[(self.fund.pk, self.lp_b.pk)]['irr'], 0)
+
+    def test_ks_pme_against_index(self):
+        flat = load_index_series(["date,level", "2023-12-31,100", "2024-12-31,100"])
+        doubled = load_index_series(["2024-01-01,100", "2024-07-01,150", "2024-12-31,200"])
+
+        fund = compute_performance([self.fund.pk], as_of=date(2024, 12, 31), index=flat)[self.fund.pk]
+        self.assertAlmostEqual(fund['pme'], 1.3)
+        fund = compute_performance([self.fund.pk], as_of=date(2024, 12, 31), index=doubled)[self.fund.pk]
+        # (300 * 200/150 + 1000) / (1000 * 200/100)
+        self.assertAlmostEqual(fund['pme'], 0.7)
+
+    def test_report_view_and_batch_command(self):
+        user = User.objects.create_user("perf", password="pw")
+        self.client.force_login(user)
+        response = self.client.get(reverse('funds:performance-report', args=[self.fund.pk]), {'as_of': '2024-12-31'})
+        self.assertEqual(response.context['performance_data']['tvpi'], Decimal('1.3'))
+        self.assertEqual([row['investor'] for row in response.context['investor_rows']], ["LP A", "LP B"])
+
+        upload = SimpleUploadedFile("index.csv", "date,level\n2024-01-01,100\n".encode('utf-16'))
+        response = self.client.post(
+            reverse('funds:performance-report', args=[self.fund.pk]) + '?as_of=2024-12-31', {'index': upload}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['has_benchmark'])
+        self.assertIn("UTF-8", [str(m) for m in response.context['messages']][0])
+
+        out = StringIO()
+        call_command('performance_report', as_of='2024-12-31', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'level,fund_id,investor_id,paid_in,distributed,residual,dpi,rvpi,tvpi,irr,pme')
+        self.assertEqual(len(lines), 1 + 2 + 2)
+
+
+class SyntheticBookTest(TestCase):
+
+    def test_generates_a_consistent_seeded_book(self):
+        out = StringIO()
+        call_command(
+            'generate_synthetic_book', '--seed', '7', '--entities', '2', '--funds', '2', '--investors', '30',
+            '--lps', '10', '--calls', '3', '--companies', '15', '--trades', '6', '--years', '2',
+            '--batch-size', '50', stdout=out,
+        )
+        self.assertIn('Generated', out.getvalue())
+
+        funds = Fund.objects.filter(name__startswith="SYN7 ")
+        self.assertEqual(funds.count(), 4)
+        self.assertEqual(InvestorCommitment.objects.filter(fund__in=funds).count(), 40)
+        self.assertEqual(CapitalCall.objects.filter(fund__in=funds).count(), 120)
+        # Every paid call has exactly its receipt, and FundStats saw the bulk inserts
+        paid = CapitalCall.objects.filter(fund__in=funds, is_fully_paid=True)
+        self.assertEqual(DrawdownReceipt.objects.filter(capital_call__in=paid).count(), paid.count())
+        fund = funds.first()
+        received = DrawdownReceipt.objects.filter(fund=fund).aggregate(total=Sum('amount_received'))['total']
+        self.assertEqual(FundStats.objects.get(fund=fund).total_received, received)
 
-# Create your tests here.
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_book', '--seed', '7', stdout=StringIO())
@@ -13,6 +13,8 @@ urlpatterns = [
     path('<int:pk>/portfolio/', views.fund_portfolio, name='fund_portfolio'),
     path('<int:pk>/performance/', views.fund_performance, name='performance-report'),
     path('<int:pk>/activity/', views.activity_log, name='activity-log'),
+    path('<int:pk>/activity/export/', views.activity_export, name='activity-export'),
+    path('<int:pk>/nav/', views.calculate_nav_view, name='calculate-nav'),
 
     # --- Compliance ---
     path('<int:pk>/stewardship/log/', views.log_stewardship_engagement, name='log_stewardship'),
@@ -21,6 +23,8 @@ urlpatterns = [
     # --- Transactions (Wrapper Routes) ---
     path('<int:pk>/commitment/add/', views.add_commitment, name='add-commitment'),
     path('<int:pk>/call/create/', views.create_capital_call, name='create-call'),
+    path('<int:pk>/call/drawdown/', views.issue_drawdown, name='issue-drawdown'),
     path('<int:pk>/receipt/add/', views.add_receipt, name='add-receipt'),
     path('<int:pk>/distribution/add/', views.add_distribution, name='add-distribution'),
+    path('<int:pk>/distribution/waterfall/', views.distribute_waterfall, name='distribute-waterfall'),
 ]
\ No newline at end of file
@@ -1,17 +1,28 @@
 # funds/utils.py
 from manager_entities.models import ManagerEntity
 
+_UNSET = object()
+
+
 def get_current_manager_entity(request):
-    active_id = request.session.get('active_entity_id')
-    if active_id:
-        return ManagerEntity.objects.filter(id=active_id).first()
-    
-    # Fallback to the first associated entity if session is empty
-    first_membership = request.user.memberships.first()
-    if first_membership:
-        request.session['active_entity_id'] = first_membership.entity.id
-        return first_membership.entity
-    return None
+    """
+    Returns the ManagerEntity active for this request, querying it at most
+    once. The id is resolved by ActiveEntityMiddleware.
+    """
+    # DRF wraps the HttpRequest; cache on the underlying one
+    request = getattr(request, '_request', request)
+    entity = getattr(request, '_active_manager_entity', _UNSET)
+    if entity is not _UNSET:
+        return entity
+
+    if not hasattr(request, 'active_entity_id'):
+        from manager_entities.middleware import ActiveEntityMiddleware
+        ActiveEntityMiddleware.resolve(request)
+
+    active_id = request.active_entity_id
+    entity = ManagerEntity.objects.filter(id=active_id).first() if active_id else None
+    request._active_manager_entity = entity
+    return entity
 
 class ManagerEntityMixin:
     """Mixin to auto-provide manager_entity to all views."""
@@ -1,9 +1,11 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Sum
 from django.utils import timezone
 from decimal import Decimal
+from datetime import date
 from django.utils.text import slugify
 
 import json
@@ -15,10 +17,11 @@ from rest_framework.permissions import IsAuthenticated
 
 # Local Models & Serializers
 from .models import Fund, StewardshipEngagement, NavSnapshot
-from manager_entities.models import ManagerEntity
 from .forms import FundForm, StewardshipEngagementForm, NavSnapshotForm
 from transactions.forms import DrawdownReceiptForm, DistributionForm, InvestorCommitmentForm, CapitalCallForm
 from .serializers import FundSerializer
+from .utils import get_current_manager_entity
+from .services.ledger import export_lines, iter_ledger, ledger_page
 
 # FIXED IMPORT: Now pointing to analytics.py to avoid conflict with services/ folder
 from .analytics import FundAnalyticsService
@@ -41,24 +44,9 @@ class FundViewSet(viewsets.ModelViewSet):
         manager_entity = get_current_manager_entity(self.request)
         return Fund.objects.filter(
             manager_entity=manager_entity
-        ).order_by('-date_of_inception')
+        ).select_related('stats', 'currency').order_by('-date_of_inception')
 # =========================================================
 
-def get_current_manager_entity(request):
-    """
-    Retrieves the Manager Entity currently active in the user's session.
-    """
-    active_id = request.session.get('active_entity_id')
-    if active_id:
-        return ManagerEntity.objects.filter(id=active_id).first()
-    
-    # Fallback to the first associated entity if session is empty
-    first_membership = request.user.memberships.first()
-    if first_membership:
-        request.session['active_entity_id'] = first_membership.entity.id
-        return first_membership.entity
-    return None
-
 # =========================================================
 #  CORE FUND MANAGEMENT
 # =========================================================
@@ -68,48 +56,44 @@ def calculate_nav_view(request, pk):
     """
     The NAV Computation Workspace.
     Calculates Assets - Liabilities to derive Per Unit Value.
+    Uses the batch NAV engine for a single fund; POST publishes the snapshot.
     """
-    from transactions.models import PurchaseTransaction, DrawdownReceipt, Distribution
+    from .services.nav import compute_nav
 
-    fund = get_object_or_404(Fund, pk=pk)
-    
-    # 1. Asset Side: Portfolio Fair Value
-    # In a real app, this pulls from the latest ShareValuation of investee companies
-    portfolio_value = PurchaseTransaction.objects.filter(fund=fund).aggregate(
-        total=Sum(F('quantity') * F('exchange_rate')) # Simplified logic
-    )['total'] or Decimal('0.00')
+    fund = get_object_or_404(Fund.objects.select_related('currency'), pk=pk)
 
-    # 2. Asset Side: Cash Balance
-    total_inflow = DrawdownReceipt.objects.filter(capital_call__fund=fund).aggregate(Sum('amount_received'))['amount_received__sum'] or 0
-    total_outflow = Distribution.objects.filter(fund=fund).aggregate(Sum('gross_amount'))['gross_amount__sum'] or 0
-    cash_balance = total_inflow - total_outflow - portfolio_value # Simplistic cash drag
+    as_of = timezone.now().date()
+    if request.GET.get('as_of'):
+        try:
+            as_of = date.fromisoformat(request.GET['as_of'])
+        except ValueError:
+            messages.error(request, "Invalid valuation date, showing today's NAV.")
 
-    # 3. Units Outstanding
-    total_units = fund.nav_snapshots.latest('as_on_date').units_outstanding if fund.nav_snapshots.exists() else Decimal('1.0')
+    publish = request.method == "POST"
+    nav = compute_nav(as_of, fund_ids=[fund.pk], persist=publish)[fund.pk]
 
-    # 4. NAV Calculation
-    net_assets = portfolio_value + cash_balance
-    nav_per_unit = net_assets / total_units if total_units > 0 else 0
+    if publish:
+        messages.success(request, f"NAV of {nav['nav_per_unit']} published for {as_of:%d %b %Y}.")
+        return redirect('funds:fund_detail', pk=fund.pk)
 
     context = {
         'fund': fund,
-        'portfolio_value': portfolio_value,
-        'cash_balance': cash_balance,
-        'net_assets': net_assets,
-        'total_units': total_units,
-        'nav_per_unit': nav_per_unit,
+        'as_of': as_of,
+        'portfolio_value': nav['portfolio_value'],
+        'cash_balance': nav['cash_balance'],
+        'net_assets': nav['net_assets'],
+        'total_units': nav['units_outstanding'],
+        'nav_per_unit': nav['nav_per_unit'],
     }
     return render(request, 'funds/nav_computation.html', context)
 
 @login_required
 def portal_funds_list(request):
     manager_entity = get_current_manager_entity(request)
+    # Totals come from the materialized FundStats row, joined in the same query
     funds = Fund.objects.filter(
         manager_entity=manager_entity
-    ).order_by('-date_of_inception')
-
-    for f in funds:
-        f.stats_committed = f.total_committed
+    ).select_related('stats', 'currency').order_by('-date_of_inception')
 
     return render(request, "funds/funds_list.html", {
         "funds": funds,
@@ -149,9 +133,9 @@ def fund_add(request):
 
 @login_required
 def fund_detail(request, pk):
-    fund = get_object_or_404(Fund, pk=pk)
+    fund = get_object_or_404(Fund.objects.select_related('stats'), pk=pk)
     
-    # 1. Financial Totals (Calling the @property methods from your Fund model)
+    # 1. Financial Totals (Read from the materialized FundStats row)
     total_committed = fund.total_committed
     total_called = fund.total_called
     total_invested = fund.total_invested_capital
@@ -181,7 +165,7 @@ def fund_detail(request, pk):
         'drawdown_percent': drawdown_percent,
         'cap_table': investor_positions, # Passed to the {% for position in cap_table %} loop
         'total_fund_units': total_fund_units,
-        'total_lp_count': fund.commitments.count(),
+        'total_lp_count': fund.lp_count,
         'active_portfolio_count': active_portfolio_count,
     }
     return render(request, 'funds/fund_detail.html', context)
@@ -192,30 +176,11 @@ def fund_detail(request, pk):
 
 @login_required
 def fund_portfolio(request, pk):
-    fund = get_object_or_404(Fund, pk=pk)
-    # Note: If your valuation logic is in 'services/valuation_nav.py' (top level or funds level)
-    # Ensure this import path matches your actual folder structure.
-    # If it is in funds/services/valuation_nav.py, import as:
-    # from .services.valuation_nav import get_fund_holdings
-    try:
-        from services.valuation_nav import get_fund_holdings
-    except ImportError:
-        # Fallback if user placed it inside funds/services/
-        from .services.valuation_nav import get_fund_holdings
-
-    holdings_dict = get_fund_holdings(fund)
-    
-    # Flatten for template
-    holdings_list = []
-    for key, data in holdings_dict.items():
-        # Fetch company name
-        from investee_companies.models import InvesteeCompany, ShareCapital
-        comp = InvesteeCompany.objects.get(pk=data['company_id'])
-        sc = ShareCapital.objects.get(pk=data['share_capital_id'])
-        
-        data['company_name'] = comp.name
-        data['share_class'] = sc.class_name
-        holdings_list.append(data)
+    fund = get_object_or_404(Fund.objects.select_related('currency'), pk=pk)
+    from transactions.services import PortfolioService
+
+    # One grouped query; company and share class names are joined in
+    holdings_list = PortfolioService.get_fund_holdings(fund)
 
     return render(request, "funds/fund_portfolio.html", {
         "fund": fund, 
@@ -224,14 +189,75 @@ def fund_portfolio(request, pk):
 
 @login_required
 def fund_performance(request, pk):
+    """
+    Fund and per-LP performance (IRR, TVPI, DPI, RVPI) as of ?as_of=.
+    POSTing a benchmark CSV (`date,level` rows) adds the KS-PME column.
+    """
+    from investors.models import Investor
+    from .services.performance import compute_performance, load_index_series
+
     fund = get_object_or_404(Fund, pk=pk)
-    return render(request, "funds/performance_report.html", {"fund": fund})
+
+    as_of = timezone.now().date()
+    if request.GET.get('as_of'):
+        try:
+            as_of = date.fromisoformat(request.GET['as_of'])
+        except ValueError:
+            messages.error(request, "Invalid report date, showing performance as of today.")
+
+    index = None
+    if request.method == "POST" and request.FILES.get('index'):
+        try:
+            lines = request.FILES['index'].read().decode('utf-8-sig').splitlines()
+        except UnicodeDecodeError:
+            messages.error(request, "The benchmark file must be a UTF-8 encoded CSV.")
+        else:
+            index = load_index_series(lines)
+            if not index[0]:
+                messages.error(request, "The benchmark file has no `date,level` rows.")
+                index = None
+
+    performance_data = compute_performance([fund.pk], as_of=as_of, index=index)[fund.pk]
+    by_investor = compute_performance([fund.pk], as_of=as_of, index=index, by_investor=True)
+    for metrics in [performance_data, *by_investor.values()]:
+        metrics['irr_percent'] = None if metrics['irr'] is None else metrics['irr'] * 100
+    names = dict(Investor.objects.filter(pk__in=[k[1] for k in by_investor]).values_list('pk', 'name'))
+    investor_rows = sorted(
+        ({'investor': names.get(investor_id), **metrics} for (_, investor_id), metrics in by_investor.items()),
+        key=lambda row: row['paid_in'], reverse=True,
+    )
+
+    return render(request, "funds/fund_performance_report.html", {
+        "fund": fund,
+        "as_of": as_of,
+        "performance_data": performance_data,
+        "investor_rows": investor_rows,
+        "has_benchmark": index is not None,
+    })
 
 @login_required
 def activity_log(request, pk):
     fund = get_object_or_404(Fund, pk=pk)
-    # Fetch all transactions unioned (simplified) or separate lists
-    return render(request, "funds/activity_log.html", {"fund": fund})
+    # Unified, keyset-paginated ledger across every transaction table
+    page = ledger_page([fund.pk], after=request.GET.get('after'), before=request.GET.get('before'))
+    return render(request, "funds/activity_log.html", {
+        "fund": fund,
+        "entries": page['rows'],
+        "next_cursor": page['next_cursor'],
+        "previous_cursor": page['previous_cursor'],
+    })
+
+@login_required
+def activity_export(request, pk):
+    """Streams the fund's full ledger as CSV (default) or NDJSON (?format=ndjson)."""
+    fund = get_object_or_404(Fund, pk=pk)
+    fmt = 'ndjson' if request.GET.get('format') == 'ndjson' else 'csv'
+    response = StreamingHttpResponse(
+        export_lines(iter_ledger([fund.pk]), fmt),
+        content_type='application/x-ndjson' if fmt == 'ndjson' else 'text/csv',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{slugify(fund.name)}-ledger.{fmt}"'
+    return response
 
 # =========================================================
 #  COMPLIANCE ACTIONS
@@ -298,6 +324,67 @@ def create_capital_call(request, pk):
         
     return render(request, "transactions/add_capitalcall.html", {"fund": fund, "form": form})
 
+@login_required
+def issue_drawdown(request, pk):
+    """Calls capital from every committed investor at once (pro-rata)."""
+    from transactions.forms import ProRataCallForm
+    from transactions.services import CapitalCallService
+
+    fund = get_object_or_404(Fund.objects.select_related('currency'), pk=pk)
+    form = ProRataCallForm(request.POST or None)
+
+    if request.method == "POST" and form.is_valid():
+        data = form.cleaned_data
+        percent = data['value'] if data['basis'] == 'PERCENT' else None
+        amount = data['value'] if data['basis'] == 'AMOUNT' else None
+        try:
+            calls = CapitalCallService.issue(
+                fund, data['call_date'], data['due_date'], data['purpose'], percent=percent, amount=amount
+            )
+        except ValueError as exc:
+            form.add_error('value', str(exc))
+        else:
+            total = sum((call.amount_called for call in calls), Decimal('0'))
+            messages.success(request, f"Issued {len(calls)} capital calls totalling {total:,.2f}.")
+            return redirect('funds:fund_detail', pk=fund.pk)
+
+    balances = CapitalCallService.balances(fund)
+    return render(request, "funds/issue_drawdown.html", {
+        "fund": fund,
+        "form": form,
+        "lp_count": len(balances),
+        "total_committed": sum((committed for committed, _ in balances.values()), Decimal('0')),
+        "total_unfunded": sum((unfunded for _, unfunded in balances.values()), Decimal('0')),
+    })
+
+@login_required
+def distribute_waterfall(request, pk):
+    """Distributes a fund-level amount to every LP through the carry waterfall."""
+    from transactions.forms import WaterfallDistributionForm
+    from transactions.services import DistributionService
+
+    fund = get_object_or_404(Fund.objects.select_related('currency'), pk=pk)
+    form = WaterfallDistributionForm(request.POST or None)
+
+    if request.method == "POST" and form.is_valid():
+        data = form.cleaned_data
+        try:
+            distributions, lines = DistributionService.issue(
+                fund, data['distribution_date'], data['amount'],
+                tds_rate=data['tds_rate'], distribution_type=data['distribution_type'],
+            )
+        except ValueError as exc:
+            form.add_error('amount', str(exc))
+        else:
+            to_lps = sum((d.gross_amount for d in distributions), Decimal('0'))
+            to_gp = sum((line.gp_amount for line in lines), Decimal('0'))
+            messages.success(
+                request, f"Distributed {to_lps:,.2f} to {len(distributions)} investors; {to_gp:,.2f} carried interest to the GP."
+            )
+            return redirect('funds:fund_detail', pk=fund.pk)
+
+    return render(request, "funds/distribute_waterfall.html", {"fund": fund, "form": form})
+
 @login_required
 def add_receipt(request, pk):
     fund = get_object_or_404(Fund, pk=pk)
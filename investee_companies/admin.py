@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     InvesteeCompany, ShareCapital, Shareholding, 
     ValuationReport, ShareValuation, CorporateAction, 
-    CompanyFinancials
+    CompanyFinancials, ShareMovement
 )
 
 class ShareCapitalInline(admin.TabularInline):
@@ -34,6 +34,19 @@ class ShareholdingAdmin(admin.ModelAdmin):
     list_filter = ("investee_company",)
     autocomplete_fields = ['investor']
 
+@admin.register(ShareMovement)
+class ShareMovementAdmin(admin.ModelAdmin):
+    # Append-only ledger: rows are written by the shareholding and corporate action flows
+    list_display = ("movement_date", "investee_company", "share_capital", "is_pool", "investor", "holder_name", "movement_type", "quantity")
+    list_filter = ("movement_type", "is_pool", "investee_company")
+    search_fields = ("investee_company__name", "holder_name", "investor__name")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 @admin.register(ValuationReport)
 class ValuationReportAdmin(admin.ModelAdmin):
     list_display = ("investee_company", "valuation_date")
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class InvesteeCompaniesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'investee_companies'
+
+    def ready(self):
+        import investee_companies.signals  # noqa: F401
@@ -1,4 +1,5 @@
 from django import forms
+from django.utils import timezone
 from django.forms import modelformset_factory
 from .models import InvesteeCompany, Shareholding, ValuationReport, ShareValuation, ShareCapital
 
@@ -22,7 +23,14 @@ class ShareCapitalForm(forms.ModelForm):
     """
     Form to define a share class (Equity, Series A, etc.).
     FIXED: Added 'issued_shares' to allow editing Paid-up Units.
+    effective_date dates a change to an existing class in the share movement ledger.
     """
+    effective_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': INPUT_STYLE, 'type': 'date'}),
+        help_text="When a change to units or face value takes effect (defaults to today)",
+    )
+
     class Meta:
         model = ShareCapital
         fields = ['share_type', 'class_name', 'face_value', 'issued_shares', 'authorized_capital', 'as_on_date']
@@ -49,7 +57,13 @@ class ShareholdingForm(forms.ModelForm):
     Requirements:
     1. Filter instrument selection to the company.
     2. Support for linking to internal Investor registry or manual name.
+    3. Date the holding takes effect, for the share movement ledger.
     """
+    effective_date = forms.DateField(
+        initial=timezone.localdate,
+        widget=forms.DateInput(attrs={'class': INPUT_STYLE, 'type': 'date'}),
+    )
+
     class Meta:
         model = Shareholding
         fields = ['investor', 'holder_name', 'share_capital', 'number_of_shares']
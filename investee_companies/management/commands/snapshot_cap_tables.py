@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+
+from investee_companies.models import InvesteeCompany, ShareMovement
+from investee_companies.services import take_snapshot
+
+
+def quarter_end(day):
+    """The last quarter-end on or before `day`."""
+    first_of_quarter = date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    if day.month % 3 == 0 and (day + timedelta(days=1)).month != day.month:
+        return day
+    return first_of_quarter - timedelta(days=1)
+
+
+class Command(BaseCommand):
+    help = 'Stores point-in-time cap table snapshots (run after each quarter-end)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', action='append', dest='dates',
+                            help='Snapshot date (YYYY-MM-DD, repeatable). Defaults to the last quarter-end.')
+        parser.add_argument('--all-quarter-ends', action='store_true', dest='all_quarter_ends',
+                            help='Snapshot every quarter-end since the first share movement')
+        parser.add_argument('--company', type=int, action='append', dest='company_ids',
+                            help='Restrict to this investee company id (repeatable)')
+
+    def handle(self, *args, **options):
+        try:
+            dates = {date.fromisoformat(d) for d in options['dates'] or []}
+        except ValueError as exc:
+            raise CommandError(f"Invalid --date: {exc}")
+
+        today = date.today()
+        if options['all_quarter_ends']:
+            first = ShareMovement.objects.aggregate(first=Min('movement_date'))['first']
+            day = quarter_end(today)
+            while first and day >= first:
+                dates.add(day)
+                day = quarter_end(day.replace(day=1) - timedelta(days=1))
+        if not dates:
+            dates.add(quarter_end(today))
+
+        companies = InvesteeCompany.objects.order_by('pk')
+        if options['company_ids']:
+            companies = companies.filter(pk__in=options['company_ids'])
+
+        count = 0
+        for company in companies.iterator():
+            # Oldest first, so each snapshot starts from the one before it
+            for day in sorted(dates):
+                take_snapshot(company, day)
+                count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {count} cap table snapshots for {len(dates)} dates.'
+        ))
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """
+    Opening movements for the balances that predate the ledger, dated to
+    each class's 'as on' date: earlier history (e.g. executed splits) is
+    not recoverable.
+    """
+    ShareCapital = apps.get_model('investee_companies', 'ShareCapital')
+    Shareholding = apps.get_model('investee_companies', 'Shareholding')
+    ShareMovement = apps.get_model('investee_companies', 'ShareMovement')
+
+    as_on = {}
+    movements = []
+    for sc in ShareCapital.objects.all().iterator():
+        as_on[sc.pk] = sc.as_on_date
+        movements.append(ShareMovement(
+            investee_company_id=sc.investee_company_id, share_capital_id=sc.pk, is_pool=True,
+            movement_date=sc.as_on_date, movement_type='ISSUE', quantity=sc.issued_shares, face_value=sc.face_value,
+        ))
+    for h in Shareholding.objects.all().iterator():
+        movements.append(ShareMovement(
+            investee_company_id=h.investee_company_id, share_capital_id=h.share_capital_id, shareholding_id=h.pk,
+            investor_id=h.investor_id, holder_name='' if h.investor_id else h.holder_name,
+            movement_date=as_on[h.share_capital_id], movement_type='ISSUE', quantity=h.number_of_shares,
+        ))
+    ShareMovement.objects.bulk_create(movements, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investee_companies', '0001_initial'),
+        ('investors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CapTableSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of_date', models.DateField()),
+                ('balances', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('investee_company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cap_table_snapshots', to='investee_companies.investeecompany')),
+            ],
+            options={
+                'ordering': ['-as_of_date'],
+                'unique_together': {('investee_company', 'as_of_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ShareMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_pool', models.BooleanField(default=False, help_text="Change to the class's issued shares, not a holder's")),
+                ('holder_name', models.CharField(blank=True, max_length=255)),
+                ('movement_date', models.DateField()),
+                ('movement_type', models.CharField(choices=[('ISSUE', 'Issue / Opening Balance'), ('ADJUSTMENT', 'Adjustment'), ('CANCELLATION', 'Cancellation'), ('SPLIT', 'Stock Split'), ('BONUS', 'Bonus Issue'), ('MERGER', 'Merger / Amalgamation')], default='ADJUSTMENT', max_length=20)),
+                ('quantity', models.DecimalField(decimal_places=4, help_text='Signed change in shares', max_digits=18)),
+                ('face_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('corporate_action', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='investee_companies.corporateaction')),
+                ('investee_company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='share_movements', to='investee_companies.investeecompany')),
+                ('investor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='investors.investor')),
+                ('share_capital', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='investee_companies.sharecapital')),
+                ('shareholding', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='investee_companies.shareholding')),
+            ],
+            options={
+                'ordering': ['movement_date', 'id'],
+                'indexes': [models.Index(fields=['investee_company', 'movement_date'], name='investee_co_investe_28023f_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investee_companies', '0002_share_movement_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sharemovement',
+            name='share_capital',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='movements', to='investee_companies.sharecapital'),
+        ),
+    ]
@@ -64,6 +64,66 @@ class Shareholding(models.Model):
         """Calculates value based on current Face Value (Units * Face Value)"""
         return self.number_of_shares * self.share_capital.face_value
 
+class ShareMovement(models.Model):
+    """
+    Append-only ledger of every change to a share class: the issued pool
+    (is_pool) and each holder's balance. Summing the movements up to a date
+    gives the cap table on that date; CapTableSnapshot stores those sums so
+    a replay only needs the movements after the nearest snapshot.
+    """
+    MOVEMENT_TYPES = [
+        ('ISSUE', 'Issue / Opening Balance'),
+        ('ADJUSTMENT', 'Adjustment'),
+        ('CANCELLATION', 'Cancellation'),
+        ('SPLIT', 'Stock Split'),
+        ('BONUS', 'Bonus Issue'),
+        ('MERGER', 'Merger / Amalgamation'),
+    ]
+    investee_company = models.ForeignKey(InvesteeCompany, on_delete=models.CASCADE, related_name='share_movements')
+    # Append-only: a class with history cannot be deleted on its own, only with its company
+    share_capital = models.ForeignKey(ShareCapital, on_delete=models.RESTRICT, related_name='movements')
+    is_pool = models.BooleanField(default=False, help_text="Change to the class's issued shares, not a holder's")
+
+    # Holder identity is copied so history survives edits to the Shareholding
+    shareholding = models.ForeignKey(Shareholding, on_delete=models.SET_NULL, null=True, blank=True, related_name='movements')
+    investor = models.ForeignKey('investors.Investor', on_delete=models.SET_NULL, null=True, blank=True)
+    holder_name = models.CharField(max_length=255, blank=True)
+
+    movement_date = models.DateField()
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPES, default='ADJUSTMENT')
+    quantity = models.DecimalField(max_digits=18, decimal_places=4, help_text="Signed change in shares")
+    # Pool rows only: the face value in effect after the movement
+    face_value = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    corporate_action = models.ForeignKey('CorporateAction', on_delete=models.SET_NULL, null=True, blank=True, related_name='movements')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['movement_date', 'id']
+        indexes = [models.Index(fields=['investee_company', 'movement_date'])]
+
+    def __str__(self):
+        holder = "Issued pool" if self.is_pool else (self.holder_name or self.investor_id)
+        return f"{self.movement_date} {holder}: {self.quantity:+}"
+
+class CapTableSnapshot(models.Model):
+    """
+    Cap table balances of a company at the close of as_of_date, as
+    {share_capital_id: {"issued", "face_value", "holders": [[investor_id, holder_name, shares], ...]}}
+    with amounts as strings. A cache over ShareMovement: recording a movement
+    on or before as_of_date deletes the snapshot.
+    """
+    investee_company = models.ForeignKey(InvesteeCompany, on_delete=models.CASCADE, related_name='cap_table_snapshots')
+    as_of_date = models.DateField()
+    balances = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-as_of_date']
+        unique_together = ['investee_company', 'as_of_date']
+
+    def __str__(self):
+        return f"{self.investee_company} cap table @ {self.as_of_date}"
+
 class CorporateAction(models.Model):
     """
     Audit trail for Bonus Issues, Splits, and Mergers.
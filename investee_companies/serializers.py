@@ -25,6 +25,17 @@ class ShareholdingSerializer(serializers.ModelSerializer):
             'number_of_shares', 'face_value'
         ]
 
+class CapTablePositionSerializer(serializers.Serializer):
+    """A holder's balance in a share class on `as_of_date`, rebuilt from the share movement ledger."""
+    share_capital = serializers.IntegerField()
+    share_class = serializers.CharField()
+    share_type = serializers.CharField()
+    investor = serializers.IntegerField(allow_null=True)
+    holder_name_display = serializers.CharField()
+    number_of_shares = serializers.DecimalField(max_digits=18, decimal_places=4)
+    face_value = serializers.DecimalField(max_digits=10, decimal_places=2)
+    as_of_date = serializers.DateField()
+
 class CompanySerializer(serializers.ModelSerializer):
     share_classes = ShareCapitalSerializer(many=True, read_only=True)
     
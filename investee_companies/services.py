@@ -0,0 +1,200 @@
+# investee_companies/services.py
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CapTableSnapshot, CorporateAction, ShareCapital, ShareMovement, Shareholding
+
+SHARES = Decimal('0.0001')
+PAISE = Decimal('0.01')
+
+
+def as_date(value):
+    """DateField values set from timezone.now defaults are still datetimes until reloaded."""
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def holder_key(holding):
+    """(share_capital_id, investor_id, holder_name) a balance is kept under; linked holders ignore the manual name."""
+    return (holding.share_capital_id, holding.investor_id, '' if holding.investor_id else holding.holder_name)
+
+
+def holding_movement(holding, quantity, movement_date, movement_type='ADJUSTMENT', **extra):
+    """An unsaved ledger row changing the balance of `holding`'s holder by `quantity`."""
+    share_capital_id, investor_id, holder_name = holder_key(holding)
+    fields = dict(
+        investee_company_id=holding.investee_company_id, share_capital_id=share_capital_id,
+        shareholding_id=holding.pk, investor_id=investor_id, holder_name=holder_name,
+        movement_date=movement_date, movement_type=movement_type, quantity=quantity,
+    )
+    fields.update(extra)
+    return ShareMovement(**fields)
+
+
+def pool_movement(share_class, quantity, movement_date, movement_type='ADJUSTMENT', **extra):
+    """An unsaved ledger row changing `share_class`'s issued shares, at its current face value."""
+    fields = dict(
+        investee_company_id=share_class.investee_company_id, share_capital_id=share_class.pk, is_pool=True,
+        movement_date=movement_date, movement_type=movement_type, quantity=quantity,
+        face_value=share_class.face_value,
+    )
+    fields.update(extra)
+    return ShareMovement(**fields)
+
+
+def record_movements(movements):
+    """
+    Appends `movements` to the ledger and deletes the snapshots they make
+    stale: those of the same company on or after the earliest movement.
+    Holder rows that change nothing are dropped.
+    """
+    movements = [m for m in movements if m.is_pool or m.quantity]
+    if not movements:
+        return []
+    ShareMovement.objects.bulk_create(movements)
+
+    earliest = {}
+    for m in movements:
+        movement_date = as_date(m.movement_date)
+        earliest[m.investee_company_id] = min(earliest.get(m.investee_company_id, movement_date), movement_date)
+    for company_id, movement_date in earliest.items():
+        CapTableSnapshot.objects.filter(investee_company_id=company_id, as_of_date__gte=movement_date).delete()
+    return movements
+
+
+def _decode(balances):
+    return {
+        int(share_capital_id): {
+            'issued': Decimal(entry['issued']),
+            'face_value': Decimal(entry['face_value']) if entry['face_value'] is not None else None,
+            'holders': {(investor_id, name): Decimal(shares) for investor_id, name, shares in entry['holders']},
+        }
+        for share_capital_id, entry in balances.items()
+    }
+
+
+def _encode(balances):
+    return {
+        str(share_capital_id): {
+            'issued': str(entry['issued']),
+            'face_value': str(entry['face_value']) if entry['face_value'] is not None else None,
+            'holders': [[investor_id, name, str(shares)] for (investor_id, name), shares in entry['holders'].items()],
+        }
+        for share_capital_id, entry in balances.items()
+    }
+
+
+def cap_table_as_of(company, as_of):
+    """
+    Balances of `company`'s share classes at the close of `as_of`:
+
+      {share_capital_id: {'issued': shares, 'face_value': value or None,
+                          'holders': {(investor_id, holder_name): shares}}}
+
+    Starts from the latest snapshot on or before `as_of` and adds the
+    movements dated after it, so the replay stays short. Holders with a
+    nil balance are left out.
+    """
+    snapshot = CapTableSnapshot.objects.filter(investee_company=company, as_of_date__lte=as_of).first()
+    balances = _decode(snapshot.balances) if snapshot else {}
+
+    movements = ShareMovement.objects.filter(investee_company=company, movement_date__lte=as_of)
+    if snapshot:
+        movements = movements.filter(movement_date__gt=snapshot.as_of_date)
+    rows = movements.order_by('movement_date', 'id').values_list(
+        'share_capital_id', 'is_pool', 'investor_id', 'holder_name', 'quantity', 'face_value'
+    )
+    for share_capital_id, is_pool, investor_id, holder_name, quantity, face_value in rows:
+        entry = balances.setdefault(share_capital_id, {'issued': Decimal('0'), 'face_value': None, 'holders': {}})
+        if is_pool:
+            entry['issued'] += quantity
+            entry['face_value'] = face_value
+        else:
+            key = (investor_id, holder_name)
+            entry['holders'][key] = entry['holders'].get(key, Decimal('0')) + quantity
+
+    for entry in balances.values():
+        entry['holders'] = {key: shares for key, shares in entry['holders'].items() if shares}
+    return balances
+
+
+def cap_table_positions(company, as_of=None):
+    """
+    [(share_class, issued, face_value, [(investor_id, holder, shares), ...])]
+    for each share class of `company`: the live Shareholding rows, or with
+    `as_of` the ledger balances at the close of that date (classes issued
+    later are left out).
+    """
+    from investors.models import Investor
+
+    share_classes = list(company.share_classes.order_by('pk'))
+    if as_of is None:
+        holders = {}
+        for h in Shareholding.objects.filter(investee_company=company).select_related('investor').order_by('pk'):
+            holders.setdefault(h.share_capital_id, []).append((h.investor_id, h.display_holder, h.number_of_shares))
+        return [(sc, sc.issued_shares, sc.face_value, holders.get(sc.pk, [])) for sc in share_classes]
+
+    balances = cap_table_as_of(company, as_of)
+    investor_ids = {investor_id for entry in balances.values() for investor_id, _ in entry['holders'] if investor_id}
+    names = dict(Investor.objects.filter(pk__in=investor_ids).values_list('pk', 'name'))
+    positions = []
+    for sc in share_classes:
+        entry = balances.get(sc.pk)
+        if entry is None:
+            continue
+        holders = sorted(
+            ((investor_id, names.get(investor_id) or name, shares) for (investor_id, name), shares in entry['holders'].items()),
+            key=lambda row: row[1],
+        )
+        positions.append((sc, entry['issued'], entry['face_value'] or sc.face_value, holders))
+    return positions
+
+
+def take_snapshot(company, as_of):
+    """Stores (or refreshes) the cap table of `company` at the close of `as_of`."""
+    snapshot, _ = CapTableSnapshot.objects.update_or_create(
+        investee_company=company, as_of_date=as_of,
+        defaults={'balances': _encode(cap_table_as_of(company, as_of))},
+    )
+    return snapshot
+
+
+@transaction.atomic
+def execute_corporate_action(company, share_class, action_type, action_date, ratio_from, ratio_to):
+    """
+    Applies a split, bonus or merger ratio to a share class: its issued
+    pool, face value (splits) and every holding, ledgering each change on
+    `action_date`. Returns the executed CorporateAction.
+    """
+    multiplier = Decimal(ratio_to) / Decimal(ratio_from)
+    share_class = ShareCapital.objects.select_for_update().get(pk=share_class.pk)
+    action = CorporateAction.objects.create(
+        investee_company=company, target_class=share_class, action_type=action_type,
+        action_date=action_date, ratio_from=ratio_from, ratio_to=ratio_to, is_executed=True,
+    )
+
+    issued = (share_class.issued_shares * multiplier).quantize(SHARES)
+    face_value = share_class.face_value
+    if action_type == 'SPLIT':
+        face_value = (face_value / multiplier).quantize(PAISE)
+    movements = [pool_movement(
+        share_class, issued - share_class.issued_shares, action_date, action_type,
+        face_value=face_value, corporate_action=action,
+    )]
+    ShareCapital.objects.filter(pk=share_class.pk).update(issued_shares=issued, face_value=face_value)
+
+    holdings = list(Shareholding.objects.select_for_update().filter(share_capital=share_class))
+    for holding in holdings:
+        shares = (holding.number_of_shares * multiplier).quantize(SHARES)
+        movements.append(holding_movement(
+            holding, shares - holding.number_of_shares, action_date, action_type, corporate_action=action,
+        ))
+        holding.number_of_shares = shares
+    Shareholding.objects.bulk_update(holdings, ['number_of_shares'])
+
+    record_movements(movements)
+    return action
@@ -0,0 +1,78 @@
+# investee_companies/signals.py
+from decimal import Decimal
+
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ShareCapital, Shareholding
+from .services import as_date, holder_key, holding_movement, pool_movement, record_movements
+
+
+def _deleted_directly(origin, model):
+    """False when the row goes as part of a cascade (e.g. its company was deleted)."""
+    return isinstance(origin, model) or (isinstance(origin, QuerySet) and origin.model is model)
+
+
+# --- Share movement ledger ---
+
+@receiver(pre_save, sender=ShareCapital)
+@receiver(pre_save, sender=Shareholding)
+def remember_previous_balance(sender, instance, raw=False, **kwargs):
+    """Keeps the stored row so an edit can be ledgered as a delta."""
+    instance._ledger_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._ledger_previous = sender._default_manager.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=ShareCapital)
+def record_pool_change(sender, instance, raw=False, **kwargs):
+    """
+    Ledgers a new class's opening issue on its 'as on' date, and later
+    issued-share or face-value edits on `instance.effective_date` (today
+    when the caller does not set one), so they leave earlier cap tables as
+    they were.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_ledger_previous', None)
+    issued = Decimal(str(instance.issued_shares))
+    if previous is None:
+        record_movements([pool_movement(instance, issued, as_date(instance.as_on_date), 'ISSUE')])
+    elif issued != previous.issued_shares or Decimal(str(instance.face_value)) != previous.face_value:
+        movement_date = getattr(instance, 'effective_date', None) or timezone.localdate()
+        record_movements([pool_movement(instance, issued - previous.issued_shares, movement_date)])
+
+
+@receiver(post_save, sender=Shareholding)
+def record_holding_change(sender, instance, raw=False, **kwargs):
+    """
+    Ledgers a new or edited holding on `instance.effective_date` (today
+    when the caller does not set one). Moving a holding to another holder
+    or class closes the old balance and opens the new one.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_ledger_previous', None)
+    movement_date = getattr(instance, 'effective_date', None) or timezone.localdate()
+    shares = Decimal(str(instance.number_of_shares))
+    if previous is None:
+        movements = [holding_movement(instance, shares, movement_date, 'ISSUE')]
+    elif holder_key(previous) == holder_key(instance):
+        movements = [holding_movement(instance, shares - previous.number_of_shares, movement_date)]
+    else:
+        movements = [
+            holding_movement(previous, -previous.number_of_shares, movement_date),
+            holding_movement(instance, shares, movement_date),
+        ]
+    record_movements(movements)
+
+
+@receiver(post_delete, sender=Shareholding)
+def record_holding_deletion(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(origin, Shareholding):
+        record_movements([holding_movement(
+            instance, -instance.number_of_shares, timezone.localdate(), 'CANCELLATION', shareholding_id=None,
+        )])
@@ -1,3 +1,159 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import RestrictedError
 from django.test import TestCase
+from django.urls import reverse
+
+from investors.models import Investor
+from .models import CapTableSnapshot, InvesteeCompany, ShareCapital, ShareMovement, Shareholding
+from .services import cap_table_as_of, execute_corporate_action, take_snapshot
+
+
+class AsOfCapTableTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.investor = Investor.objects.create(name="LP One", email="lp1@example.com", pan="ABCDE1234F")
+        cls.company = InvesteeCompany.objects.create(name="Acme Robotics")
+        cls.equity = ShareCapital.objects.create(
+            investee_company=cls.company, class_name="Common", issued_shares=Decimal('1000'),
+            face_value=Decimal('10.00'), as_on_date=date(2024, 1, 1),
+        )
+        cls.holding = Shareholding(
+            investee_company=cls.company, investor=cls.investor, share_capital=cls.equity,
+            number_of_shares=Decimal('400'),
+        )
+        cls.holding.effective_date = date(2024, 2, 1)
+        cls.holding.save()
+        execute_corporate_action(cls.company, cls.equity, 'SPLIT', date(2024, 6, 30), 1, 2)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def balances(self, as_of):
+        entry = cap_table_as_of(self.company, as_of)[self.equity.pk]
+        return entry['issued'], entry['face_value'], entry['holders']
+
+    def test_history_survives_corporate_actions(self):
+        self.equity.refresh_from_db()
+        self.assertEqual((self.equity.issued_shares, self.equity.face_value), (Decimal('2000'), Decimal('5.00')))
+        key = (self.investor.pk, '')
+        self.assertEqual(cap_table_as_of(self.company, date(2023, 12, 31)), {})
+        self.assertEqual(self.balances(date(2024, 1, 31)), (Decimal('1000'), Decimal('10.00'), {}))
+        self.assertEqual(self.balances(date(2024, 3, 31)), (Decimal('1000'), Decimal('10.00'), {key: Decimal('400')}))
+        self.assertEqual(self.balances(date(2024, 6, 30)), (Decimal('2000'), Decimal('5.00'), {key: Decimal('800')}))
+
+    def test_edits_and_deletions_are_ledgered(self):
+        holder = Shareholding(investee_company=self.company, holder_name="Founder", share_capital=self.equity,
+                              number_of_shares=Decimal('300'))
+        holder.effective_date = date(2024, 8, 1)
+        holder.save()
+        holder.number_of_shares = Decimal('250')
+        holder.effective_date = date(2024, 9, 1)
+        holder.save()
+        _, _, holders = self.balances(date(2024, 8, 31))
+        self.assertEqual(holders[(None, 'Founder')], Decimal('300'))
+        _, _, holders = self.balances(date(2024, 9, 1))
+        self.assertEqual(holders[(None, 'Founder')], Decimal('250'))
+
+        holder.delete()
+        self.assertNotIn((None, 'Founder'), cap_table_as_of(self.company, date.today())[self.equity.pk]['holders'])
+        self.assertEqual(
+            ShareMovement.objects.filter(holder_name="Founder").order_by('pk').last().movement_type, 'CANCELLATION'
+        )
+
+    def test_pool_edits_are_dated_when_they_take_effect(self):
+        self.equity.refresh_from_db()
+        self.equity.issued_shares = Decimal('2500')
+        self.equity.effective_date = date(2024, 9, 1)
+        self.equity.save()
+        self.assertEqual(self.balances(date(2024, 8, 31))[0], Decimal('2000'))
+        self.assertEqual(self.balances(date(2024, 9, 1))[0], Decimal('2500'))
+
+        # Without an effective date the change lands today, not on the class's 'as on' date
+        equity = ShareCapital.objects.get(pk=self.equity.pk)
+        equity.issued_shares = Decimal('2600')
+        equity.save()
+        self.assertEqual(ShareMovement.objects.filter(share_capital=self.equity).last().movement_date, date.today())
+        self.assertEqual(self.balances(date(2024, 12, 31))[0], Decimal('2500'))
+
+    def test_capital_structure_edit_takes_an_effective_date(self):
+        self.equity.refresh_from_db()
+        response = self.client.post(reverse('investee_companies:manage-capital', args=[self.company.pk]), {
+            'capital-TOTAL_FORMS': '1', 'capital-INITIAL_FORMS': '1',
+            'capital-MIN_NUM_FORMS': '0', 'capital-MAX_NUM_FORMS': '1000',
+            'capital-0-id': self.equity.pk, 'capital-0-share_type': 'EQUITY', 'capital-0-class_name': 'Common',
+            'capital-0-face_value': '5.00', 'capital-0-issued_shares': '3000', 'capital-0-authorized_capital': '0',
+            'capital-0-as_on_date': '2024-01-01', 'capital-0-effective_date': '2024-10-15',
+        })
+        self.assertRedirects(response, reverse('investee_companies:portal-detail', args=[self.company.pk]),
+                             fetch_redirect_response=False)
+        self.assertEqual(self.balances(date(2024, 10, 14))[0], Decimal('2000'))
+        self.assertEqual(self.balances(date(2024, 10, 15))[0], Decimal('3000'))
+
+    def test_snapshot_replaces_the_replay_until_a_backdated_movement(self):
+        take_snapshot(self.company, date(2024, 6, 30))
+        with self.assertNumQueries(2):
+            self.assertEqual(self.balances(date(2024, 12, 31))[0], Decimal('2000'))
+
+        late = Shareholding(investee_company=self.company, holder_name="ESOP Trust", share_capital=self.equity,
+                            number_of_shares=Decimal('100'))
+        late.effective_date = date(2024, 5, 1)
+        late.save()
+        self.assertFalse(CapTableSnapshot.objects.filter(investee_company=self.company).exists())
+        # 100 pre-split shares, not doubled by the split recorded before them
+        self.assertEqual(self.balances(date(2024, 6, 30))[2][(None, 'ESOP Trust')], Decimal('100'))
+
+    def test_share_class_history_is_kept(self):
+        take_snapshot(self.company, date(2024, 6, 30))
+        with self.assertRaises(RestrictedError):
+            self.equity.delete()
+
+        response = self.client.post(reverse('investee_companies:manage-capital', args=[self.company.pk]), {
+            'capital-TOTAL_FORMS': '1', 'capital-INITIAL_FORMS': '1',
+            'capital-MIN_NUM_FORMS': '0', 'capital-MAX_NUM_FORMS': '1000',
+            'capital-0-id': self.equity.pk, 'capital-0-share_type': 'EQUITY', 'capital-0-class_name': 'Common',
+            'capital-0-face_value': '5.00', 'capital-0-issued_shares': '2000', 'capital-0-authorized_capital': '0',
+            'capital-0-as_on_date': '2024-01-01', 'capital-0-DELETE': 'on',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "cannot be deleted")
+        self.assertTrue(ShareCapital.objects.filter(pk=self.equity.pk).exists())
+        self.assertTrue(CapTableSnapshot.objects.filter(investee_company=self.company).exists())
+        self.assertEqual(self.balances(date(2024, 3, 31))[0], Decimal('1000'))
+
+        # The ledger still goes with its company
+        self.company.delete()
+        self.assertFalse(ShareMovement.objects.exists())
+
+    def test_cap_table_view_and_api_as_of(self):
+        response = self.client.get(reverse('investee_companies:cap-table', args=[self.company.pk]), {'as_of': '2024-03-31'})
+        self.assertEqual(response.status_code, 200)
+        [group] = response.context['cap_table_data']
+        self.assertEqual(group['total_shares'], Decimal('1000'))
+        self.assertEqual([(r['holder'], r['number_of_shares']) for r in group['rows']],
+                         [("LP One", Decimal('400')), ("Other Shareholders (Unclassified)", Decimal('600'))])
+
+        response = self.client.get(reverse('investee_companies:cap-table', args=[self.company.pk]))
+        [group] = response.context['cap_table_data']
+        self.assertEqual(group['rows'][0]['number_of_shares'], Decimal('800'))
+
+        url = reverse('company-cap-table', args=[self.company.pk])
+        data = self.client.get(url, {'as_of': '2024-03-31'}).json()
+        self.assertEqual([(row['holder_name_display'], row['number_of_shares'], row['face_value']) for row in data],
+                         [("LP One", "400.0000", "10.00")])
+        self.assertEqual(self.client.get(url, {'as_of': '31/03/2024'}).status_code, 400)
 
-# Create your tests here.
+    def test_snapshot_command_covers_quarter_ends(self):
+        out = StringIO()
+        call_command('snapshot_cap_tables', '--all-quarter-ends', '--company', str(self.company.pk), stdout=out)
+        self.assertIn('cap table snapshots', out.getvalue())
+        snapshot_dates = list(CapTableSnapshot.objects.filter(investee_company=self.company)
+                              .order_by('as_of_date').values_list('as_of_date', flat=True))
+        self.assertEqual(snapshot_dates[:3], [date(2024, 3, 31), date(2024, 6, 30), date(2024, 9, 30)])
+        self.assertEqual(self.balances(date(2024, 4, 15))[2], {(self.investor.pk, ''): Decimal('400')})
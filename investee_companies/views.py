@@ -3,6 +3,9 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Sum, F, Q, ExpressionWrapper, DecimalField
 from django.db import transaction
+from django.db.models import RestrictedError
+from django.utils import timezone
+from datetime import date
 from decimal import Decimal
 import json
 
@@ -10,6 +13,7 @@ import json
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 # Local Imports
@@ -24,8 +28,9 @@ from .forms import (
 from .serializers import (
     CompanySerializer, ShareValuationSerializer, 
     CompanyFinancialsSerializer, CorporateActionSerializer,
-    ShareholdingSerializer
+    ShareholdingSerializer, CapTablePositionSerializer
 )
+from .services import cap_table_positions, execute_corporate_action as apply_corporate_action
 
 # Cross-App Imports (For Cost Basis Calculation)
 # We use string references in models, but here we need the actual model for querying
@@ -36,16 +41,33 @@ from transactions.models import PurchaseTransaction
 # =========================================================
 
 class CompanyViewSet(viewsets.ModelViewSet):
-    queryset = InvesteeCompany.objects.all().order_by('name')
+    queryset = InvesteeCompany.objects.prefetch_related('share_classes').order_by('name')
     serializer_class = CompanySerializer
     permission_classes = [IsAuthenticated]
 
     @action(detail=True, methods=['get'])
     def cap_table(self, request, pk=None):
+        """Current shareholdings, or with ?as_of=YYYY-MM-DD the holder balances on that date."""
         company = self.get_object()
-        holdings = Shareholding.objects.filter(investee_company=company)
-        serializer = ShareholdingSerializer(holdings, many=True)
-        return Response(serializer.data)
+        if not request.query_params.get('as_of'):
+            holdings = Shareholding.objects.filter(investee_company=company).select_related('investor', 'share_capital')
+            serializer = ShareholdingSerializer(holdings, many=True)
+            return Response(serializer.data)
+
+        try:
+            as_of = date.fromisoformat(request.query_params['as_of'])
+        except ValueError:
+            raise ValidationError({'as_of': "Use the YYYY-MM-DD format."})
+        rows = [
+            {
+                'share_capital': sc.pk, 'share_class': sc.class_name, 'share_type': sc.share_type,
+                'investor': investor_id, 'holder_name_display': holder,
+                'number_of_shares': shares, 'face_value': face_value, 'as_of_date': as_of,
+            }
+            for sc, _, face_value, holders in cap_table_positions(company, as_of)
+            for investor_id, holder, shares in holders
+        ]
+        return Response(CapTablePositionSerializer(rows, many=True).data)
 
 class ShareValuationViewSet(viewsets.ModelViewSet):
     queryset = ShareValuation.objects.all().select_related('valuation_report', 'share_capital')
@@ -170,17 +192,25 @@ def manage_capital_structure(request, pk):
             prefix='capital'
         )
         if formset.is_valid():
-            instances = formset.save(commit=False)
-            for instance in instances:
-                instance.investee_company = company
-                instance.save()
-            
-            # Handle Deletions
-            for obj in formset.deleted_objects:
-                obj.delete()
-                
-            messages.success(request, "Capital structure updated successfully.")
-            return redirect('investee_companies:portal-detail', pk=company.pk)
+            for form in formset.forms:
+                # Read by the share movement ledger signal for edits to existing classes
+                form.instance.effective_date = form.cleaned_data.get('effective_date')
+            try:
+                with transaction.atomic():
+                    instances = formset.save(commit=False)
+                    for instance in instances:
+                        instance.investee_company = company
+                        instance.save()
+
+                    # Handle Deletions
+                    for obj in formset.deleted_objects:
+                        obj.delete()
+            except RestrictedError:
+                # The share movement ledger keeps every class that has history
+                messages.error(request, "Share classes with recorded share movements cannot be deleted.")
+            else:
+                messages.success(request, "Capital structure updated successfully.")
+                return redirect('investee_companies:portal-detail', pk=company.pk)
         else:
             messages.error(request, "Please correct the errors below.")
     else:
@@ -199,55 +229,54 @@ def cap_table_view(request, pk):
     """
     Detailed Cap Table with Residual Calculation for "Other Shareholders".
     Total per class remains constant = ShareCapital.issued_shares.
+    With ?as_of=YYYY-MM-DD the balances are rebuilt from the share movement ledger.
     """
     company = get_object_or_404(InvesteeCompany, pk=pk)
-    share_classes = company.share_classes.all()
-    
+
+    as_of = None
+    if request.GET.get('as_of'):
+        try:
+            as_of = date.fromisoformat(request.GET['as_of'])
+        except ValueError:
+            messages.error(request, "Invalid date, showing the current cap table.")
+    positions = cap_table_positions(company, as_of)
+
     # Calculate global totals for percentage calculations
-    grand_total_pool = share_classes.aggregate(t=Sum('issued_shares'))['t'] or Decimal('0')
-    
-    grouped = {}
-    for sc in share_classes:
-        # 1. Get all specific shareholders for this class
-        holdings = Shareholding.objects.filter(share_capital=sc).select_related('investor')
-        
-        pool_total = sc.issued_shares
-        known_units = holdings.aggregate(t=Sum('number_of_shares'))['t'] or Decimal('0')
+    grand_total_pool = sum((issued for _, issued, _, _ in positions), Decimal('0'))
+
+    cap_table_data = []
+    for sc, pool_total, face_value, holders in positions:
+        known_units = sum((shares for _, _, shares in holders), Decimal('0'))
         residual_units = pool_total - known_units
-        
-        rows = []
-        # Add specific holders
-        for h in holdings:
-            rows.append({
-                'holder': h.display_holder,
-                'number_of_shares': h.number_of_shares,
-                'total_face_value': h.number_of_shares * sc.face_value,
-                'percent_of_class': (h.number_of_shares / pool_total * 100) if pool_total > 0 else 0,
-                'percent_of_total': (h.number_of_shares / grand_total_pool * 100) if grand_total_pool > 0 else 0
+
+        def row(holder, units, **extra):
+            return dict(extra, **{
+                'holder': holder,
+                'number_of_shares': units,
+                'total_face_value': units * face_value,
+                'percent_of_class': (units / pool_total * 100) if pool_total > 0 else 0,
+                'percent_of_total': (units / grand_total_pool * 100) if grand_total_pool > 0 else 0,
             })
-            
-        # 2. Add "Other Shareholders" if there's a residual balance
+
+        # 1. Specific holders
+        rows = [row(holder, shares, investor=investor_id) for investor_id, holder, shares in holders]
+        # 2. "Other Shareholders" if there's a residual balance
         if residual_units > 0:
-            rows.append({
-                'holder': "Other Shareholders (Unclassified)",
-                'is_residual': True,
-                'number_of_shares': residual_units,
-                'total_face_value': residual_units * sc.face_value,
-                'percent_of_class': (residual_units / pool_total * 100) if pool_total > 0 else 0,
-                'percent_of_total': (residual_units / grand_total_pool * 100) if grand_total_pool > 0 else 0
-            })
-            
-        grouped[sc.id] = {
-            'label': f"{sc.class_name} ({sc.get_share_type_display()})",
+            rows.append(row("Other Shareholders (Unclassified)", residual_units, is_residual=True))
+
+        cap_table_data.append({
+            'share_class': sc,
             'rows': rows,
-            'total_units': pool_total,
-            'total_face_value': pool_total * sc.face_value
-        }
+            'face_value': face_value,
+            'total_shares': pool_total,
+            'total_face_value': pool_total * face_value,
+        })
 
     return render(request, 'investee_companies/cap_table.html', {
         'company': company,
-        'grouped': grouped,
-        'grand_total_pool': grand_total_pool
+        'cap_table_data': cap_table_data,
+        'grand_total_pool': grand_total_pool,
+        'as_of': as_of,
     })
 
 @login_required
@@ -259,6 +288,7 @@ def add_shareholding(request, pk):
         if form.is_valid():
             holding = form.save(commit=False)
             holding.investee_company = company
+            holding.effective_date = form.cleaned_data['effective_date']
             holding.save()
             messages.success(request, "Holding record successfully added.")
             return redirect('investee_companies:cap-table', pk=company.pk)
@@ -314,34 +344,16 @@ def execute_corporate_action(request, pk):
         ratio_from = int(request.POST.get('ratio_from', 1))
         ratio_to = int(request.POST.get('ratio_to', 1))
         
-        target_class = get_object_or_404(ShareCapital, id=target_class_id)
-        multiplier = Decimal(ratio_to) / Decimal(ratio_from)
+        target_class = get_object_or_404(ShareCapital, id=target_class_id, investee_company=company)
+        action_date = request.POST.get('action_date')
+        try:
+            action_date = date.fromisoformat(action_date) if action_date else timezone.localdate()
+        except ValueError:
+            messages.error(request, "Invalid action date.")
+            return redirect('investee_companies:add-corporate-action', pk=company.pk)
 
-        with transaction.atomic():
-            # 1. Update Master Pool
-            target_class.issued_shares = F('issued_shares') * multiplier
-            
-            # 2. Update Face Value if Split
-            if action_type == 'SPLIT':
-                target_class.face_value = F('face_value') / multiplier
-            
-            target_class.save()
-
-            # 3. Update specific shareholder ledgers
-            Shareholding.objects.filter(share_capital=target_class).update(
-                number_of_shares = F('number_of_shares') * multiplier
-            )
-
-            # 4. Log Action
-            CorporateAction.objects.create(
-                investee_company=company,
-                target_class=target_class,
-                action_type=action_type,
-                action_date=request.POST.get('action_date'),
-                ratio_from=ratio_from,
-                ratio_to=ratio_to,
-                is_executed=True
-            )
+        # Updates the pool, face value and holdings, and ledgers every change on the action date
+        apply_corporate_action(company, target_class, action_type, action_date, ratio_from, ratio_to)
 
         messages.success(request, f"Corporate action {action_type} executed. Pool and individual holdings updated.")
         return redirect('investee_companies:portal-detail', pk=company.pk)
@@ -60,8 +60,14 @@ class Investor(models.Model):
     def __str__(self):
         return self.name
 
+    # The totals below cover every fund. They prefer the unscoped annotations
+    # added by InvestorService.with_capital_totals and only query when they
+    # are absent; entity-scoped totals are annotated under entity_* names.
+
     @property
     def total_committed(self):
+        if hasattr(self, 'committed_total'):
+            return self.committed_total
         from transactions.models import InvestorCommitment
         return InvestorCommitment.objects.filter(investor=self).aggregate(
             total=models.Sum('amount_committed')
@@ -69,6 +75,8 @@ class Investor(models.Model):
 
     @property
     def total_contributed(self):
+        if hasattr(self, 'contributed_total'):
+            return self.contributed_total
         from transactions.models import DrawdownReceipt
         return DrawdownReceipt.objects.filter(investor=self).aggregate(
             total=models.Sum('amount_received')
@@ -24,6 +24,10 @@ class InvestorSerializer(serializers.ModelSerializer):
     uncalled_commitment = serializers.DecimalField(
         max_digits=18, decimal_places=2, read_only=True
     )
+    # Totals over the active manager entity's funds; omitted without one
+    entity_committed = serializers.DecimalField(max_digits=18, decimal_places=2, read_only=True)
+    entity_contributed = serializers.DecimalField(max_digits=18, decimal_places=2, read_only=True)
+    entity_uncalled = serializers.DecimalField(max_digits=18, decimal_places=2, read_only=True)
     
     # Nested documents for the detail view
     documents = InvestorDocumentSerializer(many=True, read_only=True)
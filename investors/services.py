@@ -0,0 +1,43 @@
+from decimal import Decimal
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+class InvestorService:
+
+    @staticmethod
+    def _total(model, field, manager_entity_id=None):
+        """Correlated subquery summing `field` of `model` for the outer investor."""
+        rows = model.objects.filter(investor=OuterRef('pk'))
+        if manager_entity_id is not None:
+            rows = rows.filter(fund__manager_entity_id=manager_entity_id)
+        total = rows.order_by().values('investor').annotate(total=Sum(field)).values('total')
+        return Coalesce(
+            Subquery(total, output_field=DecimalField(max_digits=20, decimal_places=2)),
+            Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=20, decimal_places=2),
+        )
+
+    @staticmethod
+    def with_capital_totals(queryset, manager_entity_id=None):
+        """
+        Annotates committed_total, contributed_total and uncalled_total (every
+        fund) on an Investor queryset, or with `manager_entity_id` the same
+        totals over that entity's funds only as entity_committed,
+        entity_contributed and entity_uncalled. Each total is an independent
+        subquery, so the sums are not multiplied by joins and cost nothing
+        extra per row.
+        """
+        from transactions.models import DrawdownReceipt, InvestorCommitment
+
+        if manager_entity_id is None:
+            names = ('committed_total', 'contributed_total', 'uncalled_total')
+        else:
+            names = ('entity_committed', 'entity_contributed', 'entity_uncalled')
+        committed, contributed, uncalled = names
+        return queryset.annotate(**{
+            committed: InvestorService._total(InvestorCommitment, 'amount_committed', manager_entity_id),
+            contributed: InvestorService._total(DrawdownReceipt, 'amount_received', manager_entity_id),
+        }).annotate(**{
+            uncalled: F(committed) - F(contributed),
+        })
@@ -1,3 +1,130 @@
+import base64
+import json
+from decimal import Decimal
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.utils.pagination import encode_cursor
+from currencies.models import Currency
+from funds.models import Fund
+from manager_entities.models import ManagerEntity
+from transactions.models import DrawdownReceipt, InvestorCommitment
+from .models import Investor
+
+
+class InvestorTestData(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="ops", password="pass")
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        cls.entity = ManagerEntity.objects.create(name="Registry Manager")
+        other_entity = ManagerEntity.objects.create(name="Other Manager")
+        fund = Fund.objects.create(name="Registry Fund", manager_entity=cls.entity, currency=currency)
+        other_fund = Fund.objects.create(name="Other Fund", manager_entity=other_entity, currency=currency)
+
+        cls.investors = {}
+        for i, (name, committed, received) in enumerate((
+            ("Asha", '300', '100'), ("Bharat", '500', '500'), ("Chitra", '200', '0'),
+        )):
+            investor = Investor.objects.create(name=name, email=f"lp{i}@example.com", pan=f"ABCDE{i:04d}F")
+            investor.manager_entities.add(cls.entity)
+            InvestorCommitment.objects.create(fund=fund, investor=investor, amount_committed=Decimal(committed))
+            # Two receipts per investor would double the commitment under a plain join
+            for half in (Decimal(received) / 2,) * 2:
+                DrawdownReceipt.objects.create(
+                    fund=fund, investor=investor, amount_received=half,
+                    date_received=date(2025, 1, 1), transaction_reference=f"UTR-{name}"
+                )
+            InvestorCommitment.objects.create(fund=other_fund, investor=investor, amount_committed=Decimal('999'))
+            cls.investors[name] = investor
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['active_entity_id'] = self.entity.pk
+        session.save()
+
+
+
+class InvestorRegistryTest(InvestorTestData):
+
+    def names(self, response):
+        return [item['investor'].name for item in response.context['investors']]
+
+    def test_totals_are_scoped_to_active_entity(self):
+        response = self.client.get(reverse('investors:portal-list'))
+
+        rows = {item['investor'].name: item for item in response.context['investors']}
+        self.assertEqual(rows["Asha"]['total_committed'], Decimal('300'))
+        self.assertEqual(rows["Asha"]['uncalled_capital'], Decimal('200'))
+        self.assertEqual(rows["Bharat"]['funded_pct'], Decimal('100'))
+        # The model property keeps meaning every fund, whichever queryset loaded the row
+        self.assertEqual(rows["Asha"]['investor'].total_committed, Decimal('1299'))
+
+    def test_search_filters_rows(self):
+        response = self.client.get(reverse('investors:portal-list'), {'q': 'chi'})
+
+        self.assertEqual(self.names(response), ["Chitra"])
+
+    def test_sort_and_keyset_pages(self):
+        url = reverse('investors:portal-list')
+        with mock.patch('investors.views.INVESTOR_PAGE_SIZE', 2):
+            first = self.client.get(url, {'sort': '-uncalled'})
+            second = self.client.get(url, {'sort': '-uncalled', 'after': first.context['next_cursor']})
+            back = self.client.get(url, {'sort': '-uncalled', 'before': second.context['previous_cursor']})
+
+        self.assertEqual(self.names(first), ["Asha", "Chitra"])
+        self.assertEqual(self.names(second), ["Bharat"])
+        self.assertIsNone(second.context['next_cursor'])
+        self.assertEqual(self.names(back), ["Asha", "Chitra"])
+        self.assertIsNone(back.context['previous_cursor'])
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        url = reverse('investors:portal-list')
+        tampered = [
+            encode_cursor([]) + '!!', 'bm90IGpzb24',  # not base64 / not JSON
+            *(base64.urlsafe_b64encode(json.dumps(p).encode()).decode() for p in (
+                7, {'d': 'x'}, [{'d': 'x'}], [{'t': 'nope'}], [{'t': 3}], [[1, 2]], [{}],
+            )),
+        ]
+        with mock.patch('investors.views.INVESTOR_PAGE_SIZE', 2):
+            first = self.names(self.client.get(url, {'sort': '-uncalled'}))
+            for token in tampered:
+                for direction in ('after', 'before'):
+                    response = self.client.get(url, {'sort': '-uncalled', direction: token})
+                    self.assertEqual(response.status_code, 200, (direction, token))
+                    self.assertEqual(self.names(response), first)
+
+
+class InvestorApiTest(InvestorTestData):
+
+    def test_list_totals_are_not_inflated_by_joins(self):
+        response = self.client.get('/api/investors/')
+
+        rows = {row['name']: row for row in response.json()['results']}
+        # All funds count here: 300 in the registry fund plus 999 elsewhere
+        self.assertEqual(Decimal(rows["Asha"]['total_committed']), Decimal('1299'))
+        self.assertEqual(Decimal(rows["Asha"]['total_contributed']), Decimal('100'))
+        self.assertEqual(Decimal(rows["Asha"]['uncalled_commitment']), Decimal('1199'))
+        # The active entity's share is reported under its own names
+        self.assertEqual(Decimal(rows["Asha"]['entity_committed']), Decimal('300'))
+        self.assertEqual(Decimal(rows["Asha"]['entity_uncalled']), Decimal('200'))
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        self.client.get('/api/investors/')  # warm the session's membership cache
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/investors/')
+        for i in range(5):
+            Investor.objects.create(name=f"Extra {i}", email=f"extra{i}@example.com", pan=f"ZZZZZ{i:04d}Z")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/investors/')
 
-# Create your tests here.
+        self.assertEqual(response.json()['count'], 8)
+        self.assertEqual(len(large), len(small))
@@ -10,13 +10,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import generics
-from django.db.models import Q, Value
-from django.db.models.functions import Coalesce
+from django.db.models import Q
 
 # Local Imports
 from .models import Investor, InvestorDocument
 from .forms import InvestorForm, InvestorDocumentForm, BankDetailForm
 from .serializers import InvestorSerializer
+from .services import InvestorService
+from core.utils.pagination import keyset_page
 
 # Transaction Model Imports
 from transactions.models import (
@@ -30,14 +31,23 @@ from transactions.models import (
 # ==========================================
 
 class InvestorViewSet(viewsets.ModelViewSet):
-    queryset = Investor.objects.annotate(
-        annotated_commitment=Coalesce(Sum('commitments__amount_committed'), Value(0)),
-        annotated_contribution=Coalesce(Sum('receipts__amount_received'), Value(0)) 
+    # Totals are independent subqueries: joining both ledgers in one
+    # aggregate multiplied commitments by the number of receipts.
+    queryset = InvestorService.with_capital_totals(
+        Investor.objects.prefetch_related('manager_entities', 'documents')
     ).order_by('name')
     serializer_class = InvestorSerializer
     permission_classes = [IsAuthenticated]
     search_fields = ['name', 'email', 'pan']
 
+    def get_queryset(self):
+        # The active entity's share of the totals, next to the all-fund ones
+        queryset = super().get_queryset()
+        active_id = self.request.session.get('active_entity_id')
+        if active_id:
+            queryset = InvestorService.with_capital_totals(queryset, manager_entity_id=active_id)
+        return queryset
+
     @action(detail=True, methods=['get'])
     def portfolio(self, request, pk=None):
         """
@@ -61,7 +71,9 @@ class InvestorKYCView(generics.RetrieveUpdateAPIView):
     """
     Dedicated endpoint for managing KYC status (api/investors/<id>/kyc/)
     """
-    queryset = Investor.objects.all()
+    queryset = InvestorService.with_capital_totals(
+        Investor.objects.prefetch_related('manager_entities', 'documents')
+    )
     serializer_class = InvestorSerializer
     permission_classes = [IsAuthenticated]
 
@@ -73,19 +85,28 @@ class InvestorKYCView(generics.RetrieveUpdateAPIView):
 # 2. Portal Views (HTML Templates)
 # ==========================================
 
+# Registry sort options: ?sort=<key> or ?sort=-<key> for descending
+INVESTOR_SORT_FIELDS = {
+    'name': 'name',
+    'committed': 'entity_committed',
+    'uncalled': 'entity_uncalled',
+}
+INVESTOR_PAGE_SIZE = 50
+
+
 @login_required
 def portal_investor_list(request):
     """
     Registry view with support for Denomination Scaling (INR/Cr/M).
-    FIXED: Uses a wrapped data structure to ensure template compatibility.
+    Capital totals are subquery annotations scoped to the active manager
+    entity, and rows are keyset-paginated, so the page costs a fixed number
+    of queries however many LPs the entity has.
     """
     active_id = request.session.get('active_entity_id')
-    query = request.GET.get('q', '')
-    investors_queryset = Investor.objects.all().order_by('name')
-    base_investors = Investor.objects.filter(
-        manager_entities__id=active_id
-    ).distinct()
+    query = request.GET.get('q', '').strip()
+    base_investors = Investor.objects.filter(manager_entities__id=active_id)
 
+    investors = InvestorService.with_capital_totals(base_investors, manager_entity_id=active_id)
     if query:
         investors = investors.filter(
             Q(name__icontains=query) | 
@@ -93,6 +114,19 @@ def portal_investor_list(request):
             Q(email__icontains=query)
         )
 
+    # Sorting
+    sort = request.GET.get('sort', 'name')
+    if sort.lstrip('-') not in INVESTOR_SORT_FIELDS:
+        sort = 'name'
+    sort_field = INVESTOR_SORT_FIELDS[sort.lstrip('-')]
+    ordering = [f"-{sort_field}" if sort.startswith('-') else sort_field, 'pk']
+
+    page = keyset_page(
+        investors, ordering,
+        after=request.GET.get('after'), before=request.GET.get('before'),
+        per_page=INVESTOR_PAGE_SIZE,
+    )
+
     # Scale Logic
     denom = request.GET.get('denom', 'raw')
     scale = Decimal('1')
@@ -104,7 +138,7 @@ def portal_investor_list(request):
         scale = Decimal('1000000')
         suffix = "M"
 
-# 1. Total Commitments (Aggregate across all investors)
+    # 1. Total Commitments (Aggregate across all investors)
     total_committed_aggregate = InvestorCommitment.objects.filter(
         fund__manager_entity_id=active_id
     ).aggregate(total=Sum('amount_committed'))['total'] or 0
@@ -117,36 +151,31 @@ def portal_investor_list(request):
     # 3. Pending KYC Count
     pending_kyc_count = base_investors.filter(kyc_status='PENDING').count()
 
-# --- INDIVIDUAL ROW LOGIC ---
+    # --- INDIVIDUAL ROW LOGIC (current page only, totals come from annotations) ---
 
     investors_data = []
+    for investor in page['rows']:
+        committed = investor.entity_committed
+        contributed = investor.entity_contributed
 
-    for investor in base_investors.order_by('name'):
-        # Commitment for this specific investor
-        committed = InvestorCommitment.objects.filter(
-            investor=investor, 
-            fund__manager_entity_id=active_id
-        ).aggregate(total=Sum('amount_committed'))['total'] or 0
-        
-        # Contribution for this specific investor
-        contributed = DrawdownReceipt.objects.filter(
-            investor=investor, 
-            fund__manager_entity_id=active_id
-        ).aggregate(total=Sum('amount_received'))['total'] or 0
-        
         # Calculate Funded Percentage for the progress bar
         funded_pct = (contributed / committed * 100) if committed > 0 else 0
 
         investors_data.append({
             'investor': investor, # Accessible in template as item.investor.name
             'total_committed': committed / scale,
-            'uncalled_capital': (committed - contributed) / scale,
+            'uncalled_capital': investor.entity_uncalled / scale,
             'funded_pct': round(funded_pct, 2),
             'kyc_status': investor.kyc_status,
         })
 
     return render(request, 'investors/investor_list.html', {
         'investors': investors_data,
+        'investor_count': investors.count(),
+        'next_cursor': page['next_cursor'],
+        'previous_cursor': page['previous_cursor'],
+        'sort': sort,
+        'query': query,
         'total_committed_aggregate': total_committed_aggregate / scale,
         'total_contributed_aggregate': total_contributed_aggregate / scale,
         'pending_kyc_count': pending_kyc_count,
@@ -0,0 +1,80 @@
+# manager_entities/middleware.py
+import time
+
+from .models import EntityMembership, ManagerEntity
+
+# Session key holding the user's memberships as [[entity_id, entity_name, role], ...]
+MEMBERSHIPS_SESSION_KEY = 'entity_memberships'
+# Re-read memberships after this many seconds so revoked access does not linger
+MEMBERSHIPS_MAX_AGE = 300
+
+
+def load_memberships(request, force=False):
+    """
+    Returns the user's memberships from the session, querying the database
+    (once) only when the cached list is missing, stale or `force` is set.
+    """
+    cached = request.session.get(MEMBERSHIPS_SESSION_KEY)
+    if not force and cached and time.time() - cached['loaded_at'] < MEMBERSHIPS_MAX_AGE:
+        return cached['rows']
+
+    rows = [
+        [m.entity_id, m.entity.name, m.role]
+        for m in EntityMembership.objects.filter(user=request.user).select_related('entity').order_by('pk')
+    ]
+    request.session[MEMBERSHIPS_SESSION_KEY] = {'loaded_at': time.time(), 'rows': rows}
+    return rows
+
+
+def forget_memberships(request):
+    """Drops the cached membership list; the next request reloads it."""
+    request.session.pop(MEMBERSHIPS_SESSION_KEY, None)
+
+
+class ActiveEntityMiddleware:
+    """
+    Resolves the active manager entity and the user's role in it once per
+    request and exposes them as:
+
+      request.active_entity_id   - pk or None
+      request.active_role        - membership role or None
+      request.available_entities - unsaved ManagerEntity(id, name) rows for the switcher
+
+    Views that need the full row use funds.utils.get_current_manager_entity,
+    which loads it at most once per request.
+
+    Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        self.resolve(request)
+        return self.get_response(request)
+
+    @staticmethod
+    def resolve(request):
+        request.active_entity_id = None
+        request.active_role = None
+        request.available_entities = []
+
+        if request.user.is_authenticated:
+            active_id = request.session.get('active_entity_id')
+            memberships = load_memberships(request)
+            by_entity = {row[0]: row for row in memberships}
+            if active_id and active_id not in by_entity and memberships:
+                # Possibly a membership granted since the list was cached
+                memberships = load_memberships(request, force=True)
+                by_entity = {row[0]: row for row in memberships}
+
+            if active_id in by_entity:
+                request.active_role = by_entity[active_id][2]
+            elif memberships:
+                # Fallback: pick the first entity they have access to
+                active_id, _, request.active_role = memberships[0]
+                request.session['active_entity_id'] = active_id
+            # Users without memberships keep whatever the session holds
+
+            request.active_entity_id = active_id
+            request.available_entities = [ManagerEntity(id=pk, name=name) for pk, name, _ in memberships]
@@ -49,4 +49,44 @@ class ManagerEntityViewsTest(TestCase):
 
         # Refresh the object from the database and check if the name was updated
         self.manager.refresh_from_db()
-        self.assertEqual(self.manager.name, "Updated Manager Name")
\ No newline at end of file
+        self.assertEqual(self.manager.name, "Updated Manager Name")
+
+class ActiveEntityMiddlewareTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+        from .models import EntityMembership
+
+        cls.user = User.objects.create_user(username="member", password="pass")
+        cls.first = ManagerEntity.objects.create(name="First Manager")
+        cls.second = ManagerEntity.objects.create(name="Second Manager")
+        EntityMembership.objects.create(user=cls.user, entity=cls.first, role='ADMIN')
+        EntityMembership.objects.create(user=cls.user, entity=cls.second, role='COMPLIANCE')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_memberships_are_cached_in_session(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        first = self.client.get(reverse('manager_entities:manager_list'))
+        self.assertEqual(first.wsgi_request.active_entity_id, self.first.pk)
+        self.assertEqual(first.context['user_role'], 'ADMIN')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('manager_entities:manager_list'))
+        self.assertFalse(any('FROM "manager_entities_entitymembership"' in q['sql'] for q in queries))
+        self.assertEqual([m.name for m in response.context['available_managers']],
+                         ["First Manager", "Second Manager"])
+
+    def test_switch_manager_changes_role(self):
+        self.client.get(reverse('manager_entities:manager_list'))
+
+        self.client.get(reverse('manager_entities:switch_manager', args=[self.second.pk]), HTTP_REFERER='/portal/')
+        response = self.client.get(reverse('manager_entities:manager_list'))
+
+        self.assertEqual(response.wsgi_request.active_entity_id, self.second.pk)
+        self.assertEqual(response.context['user_role'], 'COMPLIANCE')
+        self.assertEqual(response.context['active_manager'].name, "Second Manager")
@@ -9,12 +9,14 @@ from django.contrib.auth.models import User
 
 from .models import ManagerEntity, EntityMembership
 from .forms import ManagerForm, PortalUserCreationForm
+from .middleware import forget_memberships
 
 @login_required
 def switch_manager(request, pk):
     # Security: Verify user has access to this specific entity
     if request.user.memberships.filter(entity_id=pk).exists():
         request.session['active_entity_id'] = pk
+        forget_memberships(request)
         messages.success(request, f"Context switched to {ManagerEntity.objects.get(pk=pk).name}")
     else:
         messages.error(request, "Access denied to this entity.")
@@ -68,6 +70,7 @@ def manager_create(request):
             
             # Set as active session immediately
             request.session['active_entity_id'] = obj.pk
+            forget_memberships(request)
             
             return redirect(reverse("manager_entities:manager_detail", args=[obj.pk]))
     else:
@@ -87,6 +90,7 @@ def manager_update(request, pk):
         form = ManagerForm(request.POST, instance=obj)
         if form.is_valid():
             form.save()
+            forget_memberships(request)  # cached switcher shows the entity name
             messages.success(request, "Entity details updated.")
             return redirect(reverse("manager_entities:manager_detail", args=[obj.pk]))
     else:
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from search.services import rebuild_index
+
+class Command(BaseCommand):
+    help = 'Rebuilds the global search index from funds, investors, companies and compliance tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        counts = rebuild_index(options['batch_size'])
+        summary = ', '.join(f'{kind.lower()}: {count}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {sum(counts.values())} documents ({summary}).'))
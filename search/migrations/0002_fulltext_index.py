@@ -0,0 +1,84 @@
+from django.db import migrations
+
+# SQLite: an external-content FTS5 table over (title, keywords), kept in step
+# with search_searchdocument by triggers. Prefix indexes on 2 and 3 characters
+# keep type-ahead lookups off the full token scan.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE search_document_fts USING fts5(
+        title, keywords,
+        content='search_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER search_document_ai AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_document_fts(rowid, title, keywords) VALUES (new.id, new.title, new.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER search_document_ad AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_document_fts(search_document_fts, rowid, title, keywords)
+        VALUES ('delete', old.id, old.title, old.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER search_document_au AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_document_fts(search_document_fts, rowid, title, keywords)
+        VALUES ('delete', old.id, old.title, old.keywords);
+        INSERT INTO search_document_fts(rowid, title, keywords) VALUES (new.id, new.title, new.keywords);
+    END
+    """,
+    "INSERT INTO search_document_fts(search_document_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS search_document_au",
+    "DROP TRIGGER IF EXISTS search_document_ad",
+    "DROP TRIGGER IF EXISTS search_document_ai",
+    "DROP TABLE IF EXISTS search_document_fts",
+]
+
+# PostgreSQL: GIN indexes for the prefix tsquery and the trigram fallback
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX search_document_tsv ON search_searchdocument
+    USING GIN (to_tsvector('simple', title || ' ' || keywords))
+    """,
+    "CREATE INDEX search_document_title_trgm ON search_searchdocument USING GIN (title gin_trgm_ops)",
+]
+POSTGRESQL_REVERSE = [
+    "DROP INDEX IF EXISTS search_document_title_trgm",
+    "DROP INDEX IF EXISTS search_document_tsv",
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_REVERSE),
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_REVERSE),
+}
+
+
+def _run(schema_editor, forward):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements:
+        for sql in statements[0 if forward else 1]:
+            schema_editor.execute(sql)
+
+
+def create_index(apps, schema_editor):
+    _run(schema_editor, forward=True)
+
+
+def drop_index(apps, schema_editor):
+    _run(schema_editor, forward=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
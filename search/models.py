@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalised copy of the searchable text of funds, investors, portfolio
+    companies and compliance tasks, kept in step by search.signals.
+
+    The full-text index over (title, keywords) lives outside the ORM: an FTS5
+    table on SQLite, GIN tsvector/trigram indexes on PostgreSQL (see the
+    0002_fulltext_index migration).
+    """
+    KIND_CHOICES = [
+        ('FUND', 'Fund'),
+        ('INVESTOR', 'Investor'),
+        ('COMPANY', 'Asset'),
+        ('TASK', 'Compliance'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    keywords = models.TextField(blank=True, help_text="PAN, email, CIN, sector and other matchable text")
+    url = models.CharField(max_length=255)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
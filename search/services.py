@@ -0,0 +1,178 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+
+from compliances.models import ComplianceTask
+from funds.models import Fund
+from investee_companies.models import InvesteeCompany
+from investors.models import Investor
+from .models import SearchDocument
+
+# FTS5 table mirroring SearchDocument on SQLite (created by migration 0002)
+FTS_TABLE = 'search_document_fts'
+SEARCH_RESULT_LIMIT = 10
+INDEX_BATCH_SIZE = 1000
+
+ICONS = {
+    'FUND': 'briefcase',
+    'INVESTOR': 'user',
+    'COMPANY': 'building-2',
+    'TASK': 'clipboard-check',
+}
+
+
+def _keywords(*values):
+    return ' '.join(str(v) for v in values if v)
+
+
+def _fund_document(fund):
+    return {
+        'title': fund.name,
+        'subtitle': f"Target: {fund.corpus}",
+        'keywords': _keywords(fund.sebi_registration_number, fund.get_category_display()),
+        'url': reverse('funds:fund_detail', args=[fund.pk]),
+    }
+
+
+def _investor_document(investor):
+    return {
+        'title': investor.name,
+        'subtitle': investor.email,
+        'keywords': _keywords(investor.pan, investor.email),
+        'url': reverse('investors:portal-detail', args=[investor.pk]),
+    }
+
+
+def _company_document(company):
+    return {
+        'title': company.name,
+        'subtitle': company.sector or '',
+        'keywords': _keywords(company.cin, company.sector),
+        'url': reverse('investee_companies:portal-detail', args=[company.pk]),
+    }
+
+
+def _task_document(task):
+    return {
+        'title': task.title,
+        'subtitle': f"Due {task.due_date:%d %b %Y}",
+        'keywords': _keywords(task.fund.name if task.fund_id else None, task.get_jurisdiction_display()),
+        'url': reverse('compliances:task-detail', args=[task.pk]),
+    }
+
+
+# model -> (document kind, builder, queryset used for bulk (re)indexing)
+INDEXED_MODELS = {
+    Fund: ('FUND', _fund_document, lambda: Fund.objects.all()),
+    Investor: ('INVESTOR', _investor_document, lambda: Investor.objects.all()),
+    InvesteeCompany: ('COMPANY', _company_document, lambda: InvesteeCompany.objects.all()),
+    ComplianceTask: ('TASK', _task_document, lambda: ComplianceTask.objects.select_related('fund')),
+}
+
+
+def index_objects(objects, batch_size=INDEX_BATCH_SIZE):
+    """
+    Upserts the search documents for a list or queryset of indexed model
+    instances (all of one model). Returns the number of documents written.
+    """
+    objects = list(objects)
+    if not objects:
+        return 0
+    kind, build, _ = INDEXED_MODELS[type(objects[0])]
+    documents = [SearchDocument(kind=kind, object_id=obj.pk, **build(obj)) for obj in objects]
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'subtitle', 'keywords', 'url', 'updated_at'],
+    )
+    return len(documents)
+
+
+def index_fund_tasks(fund):
+    """Re-indexes the compliance tasks of `fund`, whose documents carry its name."""
+    return index_objects(ComplianceTask.objects.filter(fund=fund).select_related('fund'))
+
+
+def remove_object(instance):
+    kind = INDEXED_MODELS[type(instance)][0]
+    SearchDocument.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def rebuild_index(batch_size=INDEX_BATCH_SIZE):
+    """Re-creates every search document from the source tables. Returns counts per kind."""
+    counts = {}
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for kind, _, queryset in INDEXED_MODELS.values():
+            counts[kind] = 0
+            batch = []
+            for obj in queryset().order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) == batch_size:
+                    counts[kind] += index_objects(batch, batch_size)
+                    batch = []
+            counts[kind] += index_objects(batch, batch_size)
+    return counts
+
+
+def _tokens(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _sqlite_ids(tokens, limit):
+    # Every token must match as a prefix; bm25 weighs title hits above keywords.
+    # Every match is ranked, so a broad prefix ("fu") cannot cut the best ones.
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s",
+            [match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _postgresql_ids(tokens, limit):
+    # Prefix full-text match, with trigram similarity on the title for typos
+    table = SearchDocument._meta.db_table
+    document = "to_tsvector('simple', title || ' ' || keywords)"
+    prefix = ' & '.join(f'{token}:*' for token in tokens)
+    text = ' '.join(tokens)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id FROM {table} "
+            f"WHERE {document} @@ to_tsquery('simple', %s) OR title %% %s "
+            f"ORDER BY ts_rank({document}, to_tsquery('simple', %s)) DESC, similarity(title, %s) DESC "
+            f"LIMIT %s",
+            [prefix, text, prefix, text, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_ids(tokens, limit):
+    condition = Q()
+    for token in tokens:
+        condition &= Q(title__icontains=token) | Q(keywords__icontains=token)
+    return list(SearchDocument.objects.filter(condition).order_by('title').values_list('pk', flat=True)[:limit])
+
+
+def search_documents(query, limit=SEARCH_RESULT_LIMIT):
+    """
+    Ranked prefix search over the index; every word of `query` must match the
+    start of a word in the title or keywords. Returns SearchDocuments, best first.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return []
+    if connection.vendor == 'sqlite':
+        ids = _sqlite_ids(tokens, limit)
+    elif connection.vendor == 'postgresql':
+        ids = _postgresql_ids(tokens, limit)
+    else:
+        ids = _fallback_ids(tokens, limit)
+    documents = SearchDocument.objects.in_bulk(ids)
+    return [documents[pk] for pk in ids if pk in documents]
@@ -0,0 +1,44 @@
+# search/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from compliances.models import ComplianceTask
+from funds.models import Fund
+from investee_companies.models import InvesteeCompany
+from investors.models import Investor
+from .services import index_fund_tasks, index_objects, remove_object
+
+
+@receiver(post_save, sender=Fund)
+@receiver(post_save, sender=Investor)
+@receiver(post_save, sender=InvesteeCompany)
+@receiver(post_save, sender=ComplianceTask)
+def index_saved_object(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_objects([instance])
+
+
+@receiver(pre_save, sender=Fund)
+def remember_fund_name(sender, instance, raw=False, **kwargs):
+    """Keeps the stored name so a rename can re-index the fund's tasks."""
+    instance._search_previous_name = None
+    if not raw and instance.pk is not None:
+        instance._search_previous_name = (
+            Fund.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Fund)
+def index_renamed_fund_tasks(sender, instance, created=False, raw=False, **kwargs):
+    # Task documents list the fund name among their keywords
+    previous = getattr(instance, '_search_previous_name', None)
+    if not raw and not created and previous is not None and previous != instance.name:
+        index_fund_tasks(instance)
+
+
+@receiver(post_delete, sender=Fund)
+@receiver(post_delete, sender=Investor)
+@receiver(post_delete, sender=InvesteeCompany)
+@receiver(post_delete, sender=ComplianceTask)
+def remove_deleted_object(sender, instance, **kwargs):
+    remove_object(instance)
@@ -0,0 +1,87 @@
+from io import StringIO
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from compliances.models import ComplianceTask
+from currencies.models import Currency
+from funds.models import Fund
+from investee_companies.models import InvesteeCompany
+from investors.models import Investor
+from manager_entities.models import ManagerEntity
+from .models import SearchDocument
+from .services import rebuild_index, search_documents
+
+
+class SearchIndexTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        entity = ManagerEntity.objects.create(name="Search Manager")
+        cls.fund = Fund.objects.create(name="Horizon Growth Fund", manager_entity=entity, currency=currency)
+        cls.investor = Investor.objects.create(name="Priya Raman", email="priya@example.com", pan="ABCDE1234F")
+        Investor.objects.create(name="Horace Mehta", email="horace@example.com", pan="ZYXWV9876A")
+        cls.company = InvesteeCompany.objects.create(name="Kestrel Robotics", cin="U72900KA2019PTC123456", sector="Deep Tech")
+        cls.task = ComplianceTask.objects.create(title="Horizon Quarterly Report", fund=cls.fund, due_date=date(2026, 1, 15))
+        cls.user = User.objects.create_user("searcher", password="pw")
+
+    def titles(self, query):
+        return [doc.title for doc in search_documents(query)]
+
+    def test_documents_follow_saves_and_deletes(self):
+        self.assertEqual(SearchDocument.objects.count(), 5)
+        self.investor.name = "Priya Raman-Iyer"
+        self.investor.save()
+        self.assertEqual(self.titles("iyer"), ["Priya Raman-Iyer"])
+        self.company.delete()
+        self.assertEqual(self.titles("kestrel"), [])
+
+    def test_prefix_match_on_every_word(self):
+        self.assertEqual(self.titles("Kest rob"), ["Kestrel Robotics"])
+        self.assertEqual(self.titles("kestrel finance"), [])
+        self.assertCountEqual(self.titles("hor"), ["Horizon Growth Fund", "Horace Mehta", "Horizon Quarterly Report"])
+
+    def test_matches_identifiers_and_ranks_title_hits_first(self):
+        self.assertEqual(self.titles("abcde1"), ["Priya Raman"])
+        self.assertEqual(self.titles("priya@exam"), ["Priya Raman"])
+        self.assertEqual(self.titles("U72900"), ["Kestrel Robotics"])
+        self.assertEqual(self.titles("deep"), ["Kestrel Robotics"])
+        # The task only mentions the fund in its keywords
+        self.assertEqual(self.titles("growth"), ["Horizon Growth Fund", "Horizon Quarterly Report"])
+
+    def test_renaming_a_fund_reindexes_its_tasks(self):
+        self.fund.name = "Meridian Growth Fund"
+        self.fund.save()
+        self.assertEqual(self.titles("meridian"), ["Meridian Growth Fund", "Horizon Quarterly Report"])
+
+    def test_broad_prefix_ranks_every_match(self):
+        SearchDocument.objects.bulk_create(
+            SearchDocument(kind='TASK', object_id=10000 + n, title=f"Filing {n}", keywords="orbit", url="/")
+            for n in range(1100)
+        )
+        # Indexed last, so it falls outside the first thousand matches in rowid order
+        SearchDocument.objects.create(kind='TASK', object_id=20000, title="Orbit Review", url="/")
+        self.assertEqual(self.titles("orbit")[0], "Orbit Review")
+
+    def test_rebuild_restores_the_index(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.titles("priya"), [])
+        counts = rebuild_index()
+        self.assertEqual(counts, {'FUND': 1, 'INVESTOR': 2, 'COMPANY': 1, 'TASK': 1})
+        self.assertEqual(self.titles("priya"), ["Priya Raman"])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 5)
+
+    def test_api_returns_ranked_results(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('global-search'), {'q': 'horizon gro'})
+        self.assertEqual(response.status_code, 200)
+        first = response.json()[0]
+        self.assertEqual(first['category'], 'Fund')
+        self.assertEqual(first['subtitle'], f"Target: {self.fund.corpus}")
+        self.assertEqual(first['url'], reverse('funds:fund_detail', args=[self.fund.pk]))
+        self.assertEqual(self.client.get(reverse('global-search'), {'q': 'h'}).json(), [])
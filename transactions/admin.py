@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Distribution, PurchaseTransaction, DrawdownReceipt, CapitalCall
+from .models import Distribution, PurchaseTransaction, DrawdownReceipt, CapitalCall, PurchaseLot
 
 @admin.register(Distribution)
 class DistributionAdmin(admin.ModelAdmin):
@@ -23,4 +23,9 @@ class ReceiptAdmin(admin.ModelAdmin):
         'date_received'
     )
     list_filter = ('fund', 'date_received')
-    search_fields = ('transaction_reference', 'investor__name')
\ No newline at end of file
+    search_fields = ('transaction_reference', 'investor__name')
+
+@admin.register(PurchaseLot)
+class PurchaseLotAdmin(admin.ModelAdmin):
+    list_display = ('fund', 'investee_company', 'share_class', 'acquired_on', 'quantity', 'remaining_quantity', 'cost_per_share')
+    list_filter = ('fund',)
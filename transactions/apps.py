@@ -4,4 +4,6 @@ class TransactionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'transactions'
     verbose_name = "Transactions"
-    
\ No newline at end of file
+
+    def ready(self):
+        import transactions.signals  # noqa: F401
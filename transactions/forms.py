@@ -1,3 +1,4 @@
+from decimal import Decimal
 from django import forms
 from .models import (
     CapitalCall, DrawdownReceipt, PurchaseTransaction, 
@@ -49,6 +50,32 @@ class CapitalCallForm(forms.ModelForm):
                 commitments__fund=self.fund_context
             ).distinct()
 
+class ProRataCallForm(forms.Form):
+    """One drawdown across every committed investor of a fund."""
+    BASIS_CHOICES = [
+        ('PERCENT', '% of each commitment'),
+        ('AMOUNT', 'Total amount, pro-rata to commitments'),
+    ]
+
+    basis = forms.ChoiceField(choices=BASIS_CHOICES, widget=forms.Select(attrs={'class': INPUT_STYLE}))
+    value = forms.DecimalField(
+        max_digits=20, decimal_places=2, min_value=Decimal('0.01'), label="Percentage / Amount",
+        widget=forms.NumberInput(attrs={'class': INPUT_STYLE, 'step': '0.01'})
+    )
+    call_date = forms.DateField(widget=forms.DateInput(attrs={'class': INPUT_STYLE, 'type': 'date'}))
+    due_date = forms.DateField(widget=forms.DateInput(attrs={'class': INPUT_STYLE, 'type': 'date'}))
+    purpose = forms.CharField(
+        max_length=255, widget=forms.TextInput(attrs={'class': INPUT_STYLE, 'placeholder': 'e.g. Investment in ABC Corp'})
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('basis') == 'PERCENT' and cleaned.get('value') and cleaned['value'] > 100:
+            self.add_error('value', "A percentage call cannot exceed 100%.")
+        if cleaned.get('call_date') and cleaned.get('due_date') and cleaned['due_date'] < cleaned['call_date']:
+            self.add_error('due_date', "Due date cannot be before the call date.")
+        return cleaned
+
 class DrawdownReceiptForm(forms.ModelForm):
     class Meta:
         model = DrawdownReceipt
@@ -82,6 +109,22 @@ class DrawdownReceiptForm(forms.ModelForm):
             self.fields['fund'].widget.attrs['class'] = locked_style
             self.fields['capital_call'].widget.attrs['class'] = locked_style
 
+class WaterfallDistributionForm(forms.Form):
+    """One fund-level distribution, run through the waterfall for every LP."""
+    amount = forms.DecimalField(
+        max_digits=20, decimal_places=2, min_value=Decimal('0.01'), label="Distributable Amount",
+        widget=forms.NumberInput(attrs={'class': INPUT_STYLE, 'step': '0.01', 'placeholder': 'Net exit proceeds'})
+    )
+    distribution_date = forms.DateField(widget=forms.DateInput(attrs={'class': INPUT_STYLE, 'type': 'date'}))
+    distribution_type = forms.ChoiceField(
+        choices=Distribution.DIST_TYPES, initial='PRINCIPAL', widget=forms.Select(attrs={'class': INPUT_STYLE})
+    )
+    tds_rate = forms.DecimalField(
+        max_digits=5, decimal_places=2, min_value=Decimal('0'), max_value=Decimal('100'),
+        initial=Decimal('10.00'), label="TDS on Income (%)",
+        widget=forms.NumberInput(attrs={'class': INPUT_STYLE, 'step': '0.01'})
+    )
+
 # ==========================================
 # 2. INVESTMENTS (Portfolio In/Out)
 # ==========================================
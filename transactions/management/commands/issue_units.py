@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from transactions.models import DrawdownReceipt
+from transactions.services import TransactionService
+
+class Command(BaseCommand):
+    help = 'Issues units for every drawdown receipt that has none yet (closing day batch)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fund', type=int, action='append', dest='fund_ids',
+                            help='Restrict the run to this fund id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, dest='batch_size',
+                            help='Receipts processed per transaction')
+
+    def handle(self, *args, **options):
+        pending = DrawdownReceipt.objects.filter(unit_issuance__isnull=True)
+        if options['fund_ids']:
+            pending = pending.filter(fund_id__in=options['fund_ids'])
+        receipt_ids = list(pending.order_by('pk').values_list('pk', flat=True))
+
+        issued = 0
+        size = options['batch_size']
+        for start in range(0, len(receipt_ids), size):
+            issued += len(TransactionService.process_receipts(receipt_ids[start:start + size], batch_size=size))
+
+        self.stdout.write(self.style.SUCCESS(f'Issued units for {issued} receipts.'))
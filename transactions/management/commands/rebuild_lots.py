@@ -0,0 +1,37 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from transactions.models import PurchaseTransaction, RedemptionTransaction
+from transactions.services import LotLedgerService
+
+class Command(BaseCommand):
+    help = 'Replays the FIFO lot ledger from a date onward (use after back-dated trades)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from-date', dest='from_date',
+                            help='First trade date to replay (YYYY-MM-DD). Defaults to the full history.')
+        parser.add_argument('--fund', type=int, action='append', dest='fund_ids',
+                            help='Restrict the replay to this fund id (repeatable)')
+
+    def handle(self, *args, **options):
+        try:
+            from_date = date.fromisoformat(options['from_date']) if options['from_date'] else date.min
+        except ValueError:
+            raise CommandError(f"Invalid --from-date: {options['from_date']}")
+
+        purchases = PurchaseTransaction.objects.all()
+        redemptions = RedemptionTransaction.objects.filter(transaction_date__gte=from_date)
+        if options['fund_ids']:
+            purchases = purchases.filter(fund_id__in=options['fund_ids'])
+            redemptions = redemptions.filter(fund_id__in=options['fund_ids'])
+
+        created = LotLedgerService.create_missing_lots(purchases)
+
+        # Only assets with a sale on or after the date can have stale matches
+        assets = redemptions.values_list('fund_id', 'investee_company_id', 'share_class_id').distinct()
+        replayed = 0
+        for key in assets:
+            replayed += LotLedgerService.replay(key, from_date)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} missing lots and replayed {replayed} redemptions across {len(assets)} assets.'
+        ))
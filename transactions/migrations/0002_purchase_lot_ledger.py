@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funds', '0003_fundstats'),
+        ('investee_companies', '0001_initial'),
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('acquired_on', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('remaining_quantity', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('cost_per_share', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('fund', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_lots', to='funds.fund')),
+                ('investee_company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='investee_companies.investeecompany')),
+                ('purchase', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='lot', to='transactions.purchasetransaction')),
+                ('share_class', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='investee_companies.sharecapital')),
+            ],
+            options={
+                'ordering': ['acquired_on', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LotConsumption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('redemption', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lot_consumptions', to='transactions.redemptiontransaction')),
+                ('lot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumptions', to='transactions.purchaselot')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='purchaselot',
+            index=models.Index(fields=['fund', 'investee_company', 'share_class', 'acquired_on'], name='transaction_fund_id_dbaf28_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0001_initial'),
+        ('funds', '0003_fundstats'),
+        ('investee_companies', '0001_initial'),
+        ('investors', '0001_initial'),
+        ('transactions', '0002_purchase_lot_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='capitalcall',
+            index=models.Index(fields=['fund', 'call_date'], name='transaction_fund_id_d0824e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['fund', 'distribution_date'], name='transaction_fund_id_077353_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drawdownreceipt',
+            index=models.Index(fields=['fund', 'date_received'], name='transaction_fund_id_746abb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investorcommitment',
+            index=models.Index(fields=['fund', 'commitment_date'], name='transaction_fund_id_b7db79_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasetransaction',
+            index=models.Index(fields=['fund', 'transaction_date'], name='transaction_fund_id_ff379e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='redemptiontransaction',
+            index=models.Index(fields=['fund', 'transaction_date'], name='transaction_fund_id_0be60f_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='distribution',
+            name='carried_interest',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+    ]
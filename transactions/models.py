@@ -16,6 +16,10 @@ class InvestorCommitment(models.Model):
     commitment_date = models.DateField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Activity ledger reads each table newest-first per fund
+        indexes = [models.Index(fields=['fund', 'commitment_date'])]
+
     def __str__(self):
         return f"{self.investor.name} - {self.amount_committed}"
 
@@ -41,6 +45,9 @@ class CapitalCall(models.Model):
     due_date = models.DateField(help_text="Payment due date")
     is_fully_paid = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(fields=['fund', 'call_date'])]
+
     @property
     def days_overdue(self):
         if not self.is_fully_paid and self.due_date < timezone.now().date():
@@ -66,6 +73,9 @@ class DrawdownReceipt(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['fund', 'date_received'])]
+
     def __str__(self):
         return f"Received {self.amount_received} from {self.investor.name}"
 
@@ -96,6 +106,9 @@ class PurchaseTransaction(models.Model):
     currency = models.ForeignKey('currencies.Currency', on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['fund', 'transaction_date'])]
+
     @property
     def total_amount(self):
         return self.quantity * self.price_per_share
@@ -114,6 +127,9 @@ class RedemptionTransaction(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['fund', 'transaction_date'])]
+
     @property
     def total_proceeds(self):
         return self.quantity * self.price_per_share
@@ -128,8 +144,47 @@ class Distribution(models.Model):
     distribution_type = models.CharField(max_length=20, choices=DIST_TYPES, default='PRINCIPAL')
     remarks = models.TextField(blank=True)
     tds_deducted = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # GP catch-up and carry withheld from this LP's share by the waterfall
+    carried_interest = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['fund', 'distribution_date'])]
+
     @property
     def net_amount(self):
-        return self.gross_amount - self.tds_deducted
\ No newline at end of file
+        return self.gross_amount - self.tds_deducted
+
+class PurchaseLot(models.Model):
+    """
+    FIFO lot created for every PurchaseTransaction.
+    remaining_quantity is drawn down by redemptions, so a sale only
+    touches the open lots it actually consumes.
+    """
+    purchase = models.OneToOneField(PurchaseTransaction, on_delete=models.CASCADE, related_name='lot')
+    fund = models.ForeignKey(Fund, on_delete=models.CASCADE, related_name='purchase_lots')
+    investee_company = models.ForeignKey(InvesteeCompany, on_delete=models.CASCADE)
+    share_class = models.ForeignKey(ShareCapital, on_delete=models.SET_NULL, null=True, blank=True)
+    acquired_on = models.DateField()
+    quantity = models.DecimalField(max_digits=14, decimal_places=2)
+    remaining_quantity = models.DecimalField(max_digits=14, decimal_places=2)
+    cost_per_share = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        ordering = ['acquired_on', 'id']
+        indexes = [
+            models.Index(fields=['fund', 'investee_company', 'share_class', 'acquired_on']),
+        ]
+
+    def __str__(self):
+        return f"Lot {self.acquired_on} - {self.remaining_quantity}/{self.quantity} @ {self.cost_per_share}"
+
+class LotConsumption(models.Model):
+    """Quantity of a PurchaseLot matched against a RedemptionTransaction."""
+    redemption = models.ForeignKey(RedemptionTransaction, on_delete=models.CASCADE, related_name='lot_consumptions')
+    lot = models.ForeignKey(PurchaseLot, on_delete=models.CASCADE, related_name='consumptions')
+    quantity = models.DecimalField(max_digits=14, decimal_places=2)
+    cost = models.DecimalField(max_digits=18, decimal_places=4)
+
+    def __str__(self):
+        return f"{self.quantity} from lot {self.lot_id} for redemption {self.redemption_id}"
@@ -1,101 +1,477 @@
-from decimal import Decimal
+import uuid
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
 from django.db import transaction
-from .models import CapitalCall, DrawdownReceipt, InvestorUnitIssue
-from funds.models import NavSnapshot, InvestorPosition
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import CapitalCall, DrawdownReceipt
+from funds.models import Fund, NavSnapshot, InvestorPosition
 
 class TransactionService:
-    
+    UNIT_QUANT = Decimal('0.0001')
+
     @staticmethod
-    @transaction.atomic
     def process_receipt(receipt_id):
+        """Issues units for a single receipt; see process_receipts."""
+        return TransactionService.process_receipts([receipt_id])
+
+    @staticmethod
+    def process_receipts(receipt_ids, batch_size=1000):
         """
-        1. Fetch Receipt
-        2. Find applicable NAV (Latest prior to receipt date)
-        3. Issue Units
-        4. Mark Capital Call as Paid
-        """
-        receipt = DrawdownReceipt.objects.get(id=receipt_id)
-        
-        # 1. FIND NAV (Critical Fix: Don't hardcode 10.00)
-        try:
-            latest_nav_obj = NavSnapshot.objects.filter(
-                fund=receipt.fund,
-                date__lte=receipt.receipt_date
-            ).latest('date')
-            current_nav = latest_nav_obj.nav_per_unit
-        except NavSnapshot.DoesNotExist:
-            # Fallback for Day 1
-            current_nav = Decimal('10.00')
-
-        # 2. CALCULATE UNITS
-        units_to_issue = receipt.amount_received / current_nav
-
-        # 3. UPDATE CAP TABLE (InvestorPosition)
-        position, _ = InvestorPosition.objects.get_or_create(
-            investor=receipt.investor,
-            fund=receipt.fund
-        )
-        position.total_units += units_to_issue
-        position.total_capital_contributed += receipt.amount_received
-        position.save()
-
-        # 4. LOG ISSUANCE
-        InvestorUnitIssue.objects.create(
-            fund=receipt.fund,
-            investor=receipt.investor,
-            units_issued=units_to_issue,
-            nav_at_issue=current_nav,
-            amount_paid_per_unit=current_nav,
-            transaction_currency=receipt.transaction_currency
-        )
-        
-        # 5. UPDATE CALL STATUS
-        if receipt.capital_call:
-            # Check if fully paid
-            total_paid = receipt.capital_call.receipts.aggregate(
-                models.Sum('amount_received')
-            )['amount_received__sum'] or 0
-            
-            if total_paid >= receipt.capital_call.amount_called:
-                receipt.capital_call.is_fully_paid = True
-                receipt.capital_call.save()
+        Issues units for many drawdown receipts at once (e.g. a fund's closing day).
+
+        1. Fetch the receipts still without units, each annotated with the
+           latest NAV on or before its date (one query; INITIAL_NAV on Day 1)
+        2. Lock the cap table rows, creating the missing ones first
+        3. Add units and capital to the positions with one bulk update
+        4. Bulk-create the UnitIssuance log
+        5. Mark the calls whose receipts now cover them as paid (one UPDATE)
+
+        Receipts that already have units are skipped, so re-running a batch is
+        safe. Returns the created UnitIssuance rows.
+        """
+        from funds.models import UnitIssuance
+        from funds.services.nav import INITIAL_NAV
+
+        with transaction.atomic():
+            # 1. FIND NAV per receipt date (Critical Fix: Don't hardcode 10.00)
+            nav = NavSnapshot.objects.filter(
+                fund=OuterRef('fund_id'), as_on_date__lte=OuterRef('date_received')
+            ).order_by('-as_on_date').values('nav_per_unit')[:1]
+            receipts = list(
+                DrawdownReceipt.objects.filter(pk__in=receipt_ids, unit_issuance__isnull=True)
+                .annotate(nav=Coalesce(
+                    Subquery(nav), Value(INITIAL_NAV),
+                    output_field=DecimalField(max_digits=15, decimal_places=4),
+                ))
+                .order_by('pk')
+            )
+            if not receipts:
+                return []
+
+            # 2. LOCK THE CAP TABLE (InvestorPosition)
+            pairs = {(r.fund_id, r.investor_id) for r in receipts}
+            InvestorPosition.objects.bulk_create(
+                [InvestorPosition(fund_id=f, investor_id=i) for f, i in sorted(pairs)],
+                batch_size=batch_size, ignore_conflicts=True,
+            )
+            positions = {
+                (p.fund_id, p.investor_id): p
+                for p in InvestorPosition.objects.select_for_update().filter(
+                    fund_id__in={f for f, _ in pairs}, investor_id__in={i for _, i in pairs}
+                ).order_by('pk')
+                if (p.fund_id, p.investor_id) in pairs
+            }
+
+            # 3. CALCULATE & ISSUE UNITS
+            issuances = []
+            for receipt in receipts:
+                position = positions[(receipt.fund_id, receipt.investor_id)]
+                units = (receipt.amount_received / receipt.nav).quantize(TransactionService.UNIT_QUANT)
+                position.total_units += units
+                position.total_capital_contributed += receipt.amount_received
+                issuances.append(UnitIssuance(
+                    position=position, receipt=receipt, units_issued=units, nav_at_issuance=receipt.nav,
+                ))
+            now = timezone.now()
+            for position in positions.values():
+                position.updated_at = now  # bulk_update skips auto_now
+            InvestorPosition.objects.bulk_update(
+                positions.values(), ['total_units', 'total_capital_contributed', 'updated_at'],
+                batch_size=batch_size,
+            )
+
+            # 4. LOG ISSUANCE
+            UnitIssuance.objects.bulk_create(issuances, batch_size=batch_size)
+
+            # 5. UPDATE CALL STATUS
+            call_ids = {r.capital_call_id for r in receipts if r.capital_call_id}
+            if call_ids:
+                covered = CapitalCall.objects.filter(pk__in=call_ids, is_fully_paid=False).annotate(
+                    paid=Sum('receipts__amount_received')
+                ).filter(paid__gte=F('amount_called')).values('pk')
+                CapitalCall.objects.filter(pk__in=Subquery(covered)).update(is_fully_paid=True, is_paid=True)
+        return issuances
+
+HoldingRow = namedtuple('HoldingRow', [
+    'fund_id', 'company_id', 'company_name', 'share_class_id', 'share_class',
+    'purchased', 'sold', 'quantity', 'avg_cost', 'total_cost',
+])
 
 class PortfolioService:
     @staticmethod
-    def get_fund_holdings(fund):
+    def get_fund_holdings(funds):
         """
-        Calculates the current quantity and cost of all stocks held by a Fund.
+        Calculates the current quantity and cost of all stocks held by one or
+        more Funds (a Fund, an id, or an iterable of either).
+
+        A single grouped query per (fund, company, share class) returns the
+        purchased quantity, weighted cost and, via a correlated subquery, the
+        sold quantity. Returns a list of HoldingRow for open positions.
         """
         from .models import PurchaseTransaction, RedemptionTransaction
-        
+
+        if isinstance(funds, (Fund, int)):
+            funds = [funds]
+        fund_ids = [f.pk if isinstance(f, Fund) else f for f in funds]
+
+        # Coalesce so that purchases without a share class match their redemptions
+        sold = RedemptionTransaction.objects.annotate(
+            share_class_key=Coalesce('share_class_id', Value(0))
+        ).filter(
+            fund_id=OuterRef('fund_id'),
+            investee_company_id=OuterRef('investee_company_id'),
+            share_class_key=Coalesce(OuterRef('share_class_id'), Value(0)),
+        ).values('fund_id').annotate(total=Sum('quantity')).values('total')
+
+        rows = PurchaseTransaction.objects.filter(fund_id__in=fund_ids).values(
+            'fund_id', 'investee_company_id', 'investee_company__name',
+            'share_class_id', 'share_class__class_name',
+        ).annotate(
+            purchased=Sum('quantity'),
+            cost=Sum(F('quantity') * F('price_per_share')),
+            sold=Coalesce(Subquery(sold, output_field=DecimalField()), Value(Decimal('0'))),
+        ).order_by('fund_id', 'investee_company__name', 'share_class_id')
+
         holdings = []
-        # Get unique companies the fund has invested in
-        companies = PurchaseTransaction.objects.filter(fund=fund).values_list('investee_company', flat=True).distinct()
-        
-        for company_id in companies:
-            # 1. Calculate Total Quantity Held
-            total_purchased = PurchaseTransaction.objects.filter(
-                fund=fund, investee_company_id=company_id
-            ).aggregate(Sum('quantity'))['quantity__sum'] or Decimal('0')
-            
-            total_sold = RedemptionTransaction.objects.filter(
-                fund=fund, investee_company_id=company_id
-            ).aggregate(Sum('quantity'))['quantity__sum'] or Decimal('0')
-            
-            current_qty = total_purchased - total_sold
-            
-            if current_qty > 0:
-                # 2. Calculate Weighted Average Cost
-                total_cost = PurchaseTransaction.objects.filter(
-                    fund=fund, investee_company_id=company_id
-                ).aggregate(total=Sum(F('quantity') * F('price_per_share')))['total'] or Decimal('0')
-                
-                avg_cost = total_cost / total_purchased if total_purchased > 0 else 0
-                
-                holdings.append({
-                    'company_id': company_id,
-                    'quantity': current_qty,
-                    'avg_cost': avg_cost,
-                    'total_cost': current_qty * avg_cost,
-                })
-        return holdings
\ No newline at end of file
+        for row in rows:
+            current_qty = row['purchased'] - row['sold']
+            if current_qty <= 0:
+                continue
+            # Weighted Average Cost
+            avg_cost = row['cost'] / row['purchased'] if row['purchased'] > 0 else Decimal('0')
+            holdings.append(HoldingRow(
+                fund_id=row['fund_id'],
+                company_id=row['investee_company_id'],
+                company_name=row['investee_company__name'],
+                share_class_id=row['share_class_id'],
+                share_class=row['share_class__class_name'],
+                purchased=row['purchased'],
+                sold=row['sold'],
+                quantity=current_qty,
+                avg_cost=avg_cost,
+                total_cost=current_qty * avg_cost,
+            ))
+        return holdings
+
+
+class LotLedgerService:
+    """
+    Maintains the persistent FIFO lot ledger (PurchaseLot / LotConsumption).
+    An asset is identified by (fund_id, investee_company_id, share_class_id).
+    """
+    PAGE_SIZE = 100
+
+    @staticmethod
+    def asset_key(txn):
+        return (txn.fund_id, txn.investee_company_id, txn.share_class_id)
+
+    @staticmethod
+    def _asset_filter(key, prefix=''):
+        fund_id, company_id, share_class_id = key
+        return {
+            f'{prefix}fund_id': fund_id,
+            f'{prefix}investee_company_id': company_id,
+            f'{prefix}share_class_id': share_class_id,
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def record_purchase(purchase):
+        """Creates or refreshes the lot for a purchase, keeping what was already consumed."""
+        from .models import PurchaseLot, LotConsumption
+
+        consumed = LotConsumption.objects.filter(lot__purchase=purchase).aggregate(
+            total=Sum('quantity')
+        )['total'] or Decimal('0')
+        PurchaseLot.objects.update_or_create(
+            purchase=purchase,
+            defaults={
+                'fund_id': purchase.fund_id,
+                'investee_company_id': purchase.investee_company_id,
+                'share_class_id': purchase.share_class_id,
+                'acquired_on': purchase.transaction_date,
+                'quantity': purchase.quantity,
+                'remaining_quantity': purchase.quantity - consumed,
+                'cost_per_share': purchase.price_per_share,
+            }
+        )
+
+    @staticmethod
+    def create_missing_lots(purchases):
+        """Bulk-creates lots for purchases that predate the ledger."""
+        from .models import PurchaseLot
+
+        missing = purchases.filter(lot__isnull=True)
+        lots = [
+            PurchaseLot(
+                purchase_id=p.pk, fund_id=p.fund_id,
+                investee_company_id=p.investee_company_id, share_class_id=p.share_class_id,
+                acquired_on=p.transaction_date, quantity=p.quantity,
+                remaining_quantity=p.quantity, cost_per_share=p.price_per_share,
+            )
+            for p in missing.iterator()
+        ]
+        PurchaseLot.objects.bulk_create(lots, batch_size=1000)
+        return len(lots)
+
+    @staticmethod
+    @transaction.atomic
+    def release(redemption):
+        """Hands a redemption's consumed quantity back to its lots and drops the matches."""
+        from .models import PurchaseLot
+
+        for consumption in redemption.lot_consumptions.all():
+            PurchaseLot.objects.filter(pk=consumption.lot_id).update(
+                remaining_quantity=F('remaining_quantity') + consumption.quantity
+            )
+        redemption.lot_consumptions.all().delete()
+
+    @classmethod
+    def _open_lots(cls, key, restored):
+        """
+        Yields the asset's open lots in FIFO order, one page at a time,
+        with quantities released by the replay added back.
+        """
+        from .models import PurchaseLot
+
+        qs = PurchaseLot.objects.select_for_update().filter(
+            Q(remaining_quantity__gt=0) | Q(pk__in=restored.keys()),
+            **cls._asset_filter(key)
+        ).order_by('acquired_on', 'id')
+
+        offset = 0
+        while True:
+            page = list(qs[offset:offset + cls.PAGE_SIZE])
+            for lot in page:
+                lot.remaining_quantity += restored.get(lot.pk, Decimal('0'))
+                yield lot
+            if len(page) < cls.PAGE_SIZE:
+                return
+            offset += cls.PAGE_SIZE
+
+    @classmethod
+    @transaction.atomic
+    def replay(cls, key, from_date):
+        """
+        Re-matches every redemption of the asset dated on or after `from_date`.
+        Earlier redemptions and the lots they closed are left untouched.
+        Returns the number of redemptions replayed.
+        """
+        from .models import LotConsumption, PurchaseLot, RedemptionTransaction
+
+        affected = LotConsumption.objects.filter(
+            redemption__transaction_date__gte=from_date,
+            **cls._asset_filter(key, prefix='redemption__')
+        )
+        restored = {
+            row['lot_id']: row['qty']
+            for row in affected.values('lot_id').annotate(qty=Sum('quantity'))
+        }
+        affected.delete()
+
+        redemptions = list(RedemptionTransaction.objects.filter(
+            transaction_date__gte=from_date, **cls._asset_filter(key)
+        ).order_by('transaction_date', 'id'))
+        if not redemptions and not restored:
+            return 0
+
+        lots = cls._open_lots(key, restored)
+        touched = {}
+        consumptions = []
+        current = next(lots, None)
+
+        for redemption in redemptions:
+            to_sell = redemption.quantity
+            cost_basis = Decimal('0.00')
+            while to_sell > 0 and current is not None and current.acquired_on <= redemption.transaction_date:
+                qty_taken = min(current.remaining_quantity, to_sell)
+                cost = qty_taken * current.cost_per_share
+                consumptions.append(LotConsumption(
+                    redemption=redemption, lot=current, quantity=qty_taken, cost=cost
+                ))
+                current.remaining_quantity -= qty_taken
+                touched[current.pk] = current
+                cost_basis += cost
+                to_sell -= qty_taken
+                if current.remaining_quantity <= 0:
+                    current = next(lots, None)
+
+            redemption.cost_basis = cost_basis
+            redemption.realized_gain = redemption.quantity * redemption.price_per_share - cost_basis
+
+        # Lots released by the replay but never reached again only need their
+        # quantity handed back.
+        if current is not None:
+            touched.setdefault(current.pk, current)
+        for lot_id, qty in restored.items():
+            if lot_id not in touched:
+                PurchaseLot.objects.filter(pk=lot_id).update(remaining_quantity=F('remaining_quantity') + qty)
+
+        LotConsumption.objects.bulk_create(consumptions)
+        PurchaseLot.objects.bulk_update(touched.values(), ['remaining_quantity'])
+        RedemptionTransaction.objects.bulk_update(redemptions, ['cost_basis', 'realized_gain'])
+        return len(redemptions)
+
+
+class CapitalCallService:
+    """
+    Issues a drawdown to every committed investor of a fund in one go,
+    either as a percentage of each commitment or as a total amount split
+    pro-rata to commitments. Calls never exceed an investor's unfunded
+    balance.
+    """
+    CENT = Decimal('0.01')
+
+    @staticmethod
+    def _cents(amount):
+        return int((Decimal(amount) / CapitalCallService.CENT).to_integral_value(rounding=ROUND_HALF_UP))
+
+    @staticmethod
+    def balances(fund):
+        """
+        {investor_id: (committed, unfunded)} for the fund, from one grouped
+        query per ledger instead of InvestorCommitment.unfunded_amount per row.
+        """
+        from .models import InvestorCommitment
+
+        committed = dict(
+            InvestorCommitment.objects.filter(fund=fund).values('investor_id')
+            .annotate(total=Sum('amount_committed')).values_list('investor_id', 'total')
+        )
+        called = dict(
+            CapitalCall.objects.filter(fund=fund).values('investor_id')
+            .annotate(total=Sum('amount_called')).values_list('investor_id', 'total')
+        )
+        return {
+            investor_id: (total, max(total - called.get(investor_id, Decimal('0')), Decimal('0')))
+            for investor_id, total in committed.items()
+        }
+
+    @staticmethod
+    def allocate(balances, percent=None, amount=None):
+        """
+        Splits a call across investors; returns {investor_id: Decimal}.
+
+        `percent` calls that share of each commitment (capped at unfunded).
+        `amount` is split pro-rata to commitments; whatever a capped investor
+        cannot take is re-spread over the rest, and leftover cents go to the
+        largest remainders so the allocations add up to `amount` exactly.
+        """
+        to_cents = CapitalCallService._cents
+        weights = {i: to_cents(committed) for i, (committed, _) in balances.items()}
+        room = {i: to_cents(unfunded) for i, (_, unfunded) in balances.items()}
+
+        if percent is not None:
+            cents = {
+                i: min(int((weights[i] * Decimal(percent) / 100).to_integral_value(rounding=ROUND_HALF_UP)), room[i])
+                for i in balances
+            }
+        else:
+            remaining = to_cents(amount)
+            if remaining > sum(room.values()):
+                raise ValueError("The call exceeds the fund's total unfunded commitments.")
+            cents = {i: 0 for i in balances}
+            active = {i for i in balances if weights[i] > 0 and room[i] > 0}
+            while remaining and active:
+                weight = sum(weights[i] for i in active)
+                capped = [i for i in active if remaining * weights[i] >= room[i] * weight]
+                if capped:
+                    for i in capped:
+                        cents[i] += room[i]
+                        remaining -= room[i]
+                        room[i] = 0
+                        active.discard(i)
+                    continue
+                shares = {i: divmod(remaining * weights[i], weight) for i in active}
+                leftover = remaining - sum(whole for whole, _ in shares.values())
+                by_remainder = sorted(active, key=lambda i: (shares[i][1], weights[i], -i), reverse=True)
+                for i in active:
+                    cents[i] += shares[i][0]
+                for i in by_remainder[:leftover]:
+                    cents[i] += 1
+                remaining = 0
+
+        return {i: Decimal(c) * CapitalCallService.CENT for i, c in cents.items() if c > 0}
+
+    @staticmethod
+    def issue(fund, call_date, due_date, purpose, percent=None, amount=None, batch_size=1000):
+        """
+        Allocates and bulk-creates the capital calls for a drawdown in one
+        transaction. The fund row is locked so concurrent drawdowns cannot
+        both spend the same unfunded balance. Returns the created calls.
+        """
+        from dashboard.services import invalidate_rollup
+        from funds.services.stats import refresh_fund_stats
+
+        if (percent is None) == (amount is None):
+            raise ValueError("Give either a percentage or an amount to call.")
+
+        with transaction.atomic():
+            Fund.objects.select_for_update().get(pk=fund.pk)
+            allocations = CapitalCallService.allocate(
+                CapitalCallService.balances(fund), percent=percent, amount=amount
+            )
+            batch = uuid.uuid4().hex[:6].upper()
+            calls = [
+                CapitalCall(
+                    fund=fund, investor_id=investor_id, call_date=call_date, due_date=due_date,
+                    amount_called=called, purpose=purpose,
+                    reference=f"CC-{fund.pk}-{call_date:%Y%m%d}-{batch}-{n:04d}",
+                )
+                for n, (investor_id, called) in enumerate(sorted(allocations.items()), start=1)
+            ]
+            CapitalCall.objects.bulk_create(calls, batch_size=batch_size)
+            # bulk_create skips the FundStats / rollup signals
+            refresh_fund_stats([fund.pk])
+            transaction.on_commit(lambda: invalidate_rollup(fund.manager_entity_id))
+        return calls
+
+
+class DistributionService:
+    """
+    Distributes a fund-level amount (e.g. exit proceeds) to every LP through
+    the fund's waterfall and records one Distribution per LP, with TDS
+    withheld on the income portion (everything above return of capital).
+    """
+    DEFAULT_TDS_RATE = Decimal('10.00')
+
+    @staticmethod
+    def issue(fund, distribution_date, amount, tds_rate=DEFAULT_TDS_RATE,
+              distribution_type='PRINCIPAL', batch_size=1000):
+        """
+        Runs the waterfall and bulk-creates the Distribution rows in one
+        transaction; the fund row is locked so two distributions cannot read
+        the same prior history. Returns (distributions, waterfall lines).
+        """
+        from .models import Distribution
+        from dashboard.services import invalidate_rollup
+        from funds.services.stats import refresh_fund_stats
+        from funds.services.waterfall import compute_waterfall
+
+        with transaction.atomic():
+            Fund.objects.select_for_update().get(pk=fund.pk)
+            lines = compute_waterfall(fund, amount, distribution_date)
+            if not lines:
+                raise ValueError("The fund has no contributed capital to distribute against.")
+            distributions = [
+                Distribution(
+                    fund=fund, investor_id=line.investor_id, distribution_date=distribution_date,
+                    gross_amount=line.lp_amount, carried_interest=line.gp_amount,
+                    tds_deducted=(
+                        (line.lp_amount - line.return_of_capital) * Decimal(tds_rate) / 100
+                    ).quantize(CapitalCallService.CENT, rounding=ROUND_HALF_UP),
+                    distribution_type=distribution_type,
+                    remarks=(
+                        f"Waterfall: capital {line.return_of_capital}, preferred {line.preferred_return}, "
+                        f"catch-up {line.catch_up}, split {line.carry_split}"
+                    ),
+                )
+                for line in lines
+            ]
+            Distribution.objects.bulk_create(distributions, batch_size=batch_size)
+            # bulk_create skips the FundStats / rollup signals
+            refresh_fund_stats([fund.pk])
+            transaction.on_commit(lambda: invalidate_rollup(fund.manager_entity_id))
+        return distributions, lines
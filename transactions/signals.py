@@ -0,0 +1,103 @@
+# transactions/signals.py
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from funds.services.stats import apply_stats_change, stats_contribution
+from .models import (
+    CapitalCall, Distribution, DrawdownReceipt,
+    InvestorCommitment, PurchaseTransaction, RedemptionTransaction
+)
+from .services import LotLedgerService
+
+
+# --- FundStats maintenance ---
+
+@receiver(pre_save, sender=InvestorCommitment)
+@receiver(pre_save, sender=CapitalCall)
+@receiver(pre_save, sender=DrawdownReceipt)
+@receiver(pre_save, sender=PurchaseTransaction)
+@receiver(pre_save, sender=Distribution)
+def remember_previous_contribution(sender, instance, raw=False, **kwargs):
+    """Keeps the stored row's contribution so an edit can be applied as a delta."""
+    instance._stats_previous = None
+    if raw or instance.pk is None:
+        return
+    previous = sender._default_manager.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._stats_previous = stats_contribution(previous)
+
+
+@receiver(post_save, sender=InvestorCommitment)
+@receiver(post_save, sender=CapitalCall)
+@receiver(post_save, sender=DrawdownReceipt)
+@receiver(post_save, sender=PurchaseTransaction)
+@receiver(post_save, sender=Distribution)
+def update_fund_stats_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    apply_stats_change(
+        previous=getattr(instance, '_stats_previous', None),
+        current=stats_contribution(instance),
+    )
+
+
+@receiver(post_delete, sender=InvestorCommitment)
+@receiver(post_delete, sender=CapitalCall)
+@receiver(post_delete, sender=DrawdownReceipt)
+@receiver(post_delete, sender=PurchaseTransaction)
+@receiver(post_delete, sender=Distribution)
+def update_fund_stats_on_delete(sender, instance, **kwargs):
+    apply_stats_change(previous=stats_contribution(instance))
+
+
+# --- FIFO lot ledger ---
+
+@receiver(pre_save, sender=PurchaseTransaction)
+@receiver(pre_save, sender=RedemptionTransaction)
+def remember_previous_asset(sender, instance, raw=False, **kwargs):
+    """Records the stored asset/date so an edit can replay both positions."""
+    instance._lot_previous = None
+    if raw or instance.pk is None:
+        return
+    previous = sender._default_manager.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._lot_previous = (LotLedgerService.asset_key(previous), previous.transaction_date)
+
+
+def _replay_after_change(instance):
+    key = LotLedgerService.asset_key(instance)
+    from_date = instance.transaction_date
+    previous = getattr(instance, '_lot_previous', None)
+    if previous:
+        previous_key, previous_date = previous
+        if previous_key != key:
+            LotLedgerService.replay(previous_key, previous_date)
+        else:
+            from_date = min(from_date, previous_date)
+    LotLedgerService.replay(key, from_date)
+
+
+@receiver(post_save, sender=PurchaseTransaction)
+def update_lot_on_purchase(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    LotLedgerService.record_purchase(instance)
+    _replay_after_change(instance)
+
+
+@receiver(post_save, sender=RedemptionTransaction)
+def match_redemption_to_lots(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _replay_after_change(instance)
+
+
+@receiver(pre_delete, sender=RedemptionTransaction)
+def release_redemption_lots(sender, instance, **kwargs):
+    LotLedgerService.release(instance)
+
+
+@receiver(post_delete, sender=PurchaseTransaction)
+@receiver(post_delete, sender=RedemptionTransaction)
+def replay_lots_on_delete(sender, instance, **kwargs):
+    LotLedgerService.replay(LotLedgerService.asset_key(instance), instance.transaction_date)
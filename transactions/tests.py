@@ -0,0 +1,334 @@
+from decimal import Decimal
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from currencies.models import Currency
+from dashboard.services import compute_rollup
+from funds.models import Fund, FundStats, InvestorPosition, NavSnapshot, UnitIssuance
+from funds.services.nav import compute_nav
+from investors.models import Investor
+from investee_companies.models import InvesteeCompany, ShareCapital
+from manager_entities.models import ManagerEntity
+from .models import (
+    CapitalCall, Distribution, DrawdownReceipt, InvestorCommitment, LotConsumption, PurchaseLot, PurchaseTransaction, RedemptionTransaction
+)
+from .services import CapitalCallService, DistributionService, PortfolioService, TransactionService
+from .utils import calculate_fifo_gain
+
+
+class TransactionTestData(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.currency = Currency.objects.create(code="INR", symbol="₹", name="Indian Rupee", is_base=True)
+        cls.entity = ManagerEntity.objects.create(name="Ledger Manager")
+        cls.fund = Fund.objects.create(name="Ledger Fund", manager_entity=cls.entity, currency=cls.currency)
+        cls.company = InvesteeCompany.objects.create(name="Lot Co")
+        cls.share_class = ShareCapital.objects.create(investee_company=cls.company, class_name="Equity")
+
+    def buy(self, day, qty, price):
+        return PurchaseTransaction.objects.create(
+            fund=self.fund, investee_company=self.company, share_class=self.share_class,
+            transaction_date=day, quantity=Decimal(qty), price_per_share=Decimal(price)
+        )
+
+    def sell(self, day, qty, price):
+        redemption = RedemptionTransaction.objects.create(
+            fund=self.fund, investee_company=self.company, share_class=self.share_class,
+            transaction_date=day, quantity=Decimal(qty), price_per_share=Decimal(price)
+        )
+        redemption.refresh_from_db()
+        return redemption
+
+
+class LotLedgerTest(TransactionTestData):
+
+    def test_redemption_consumes_oldest_lots(self):
+        first = self.buy(date(2024, 1, 1), '100', '10')
+        second = self.buy(date(2024, 2, 1), '100', '20')
+
+        redemption = self.sell(date(2024, 3, 1), '150', '30')
+
+        self.assertEqual(redemption.cost_basis, Decimal('2000.00'))
+        self.assertEqual(redemption.realized_gain, Decimal('2500.00'))
+        self.assertEqual(PurchaseLot.objects.get(purchase=first).remaining_quantity, Decimal('0'))
+        self.assertEqual(PurchaseLot.objects.get(purchase=second).remaining_quantity, Decimal('50'))
+        self.assertEqual(calculate_fifo_gain(redemption), (Decimal('2000.0000'), Decimal('2500.0000')))
+
+    def test_back_dated_purchase_replays_later_sales(self):
+        self.buy(date(2024, 2, 1), '100', '20')
+        redemption = self.sell(date(2024, 3, 1), '50', '30')
+        self.assertEqual(redemption.cost_basis, Decimal('1000.00'))
+
+        self.buy(date(2024, 1, 1), '100', '10')
+
+        redemption.refresh_from_db()
+        self.assertEqual(redemption.cost_basis, Decimal('500.00'))
+        remaining = sorted(lot.remaining_quantity for lot in PurchaseLot.objects.all())
+        self.assertEqual(remaining, [Decimal('50'), Decimal('100')])
+
+    def test_deleting_redemption_returns_quantity(self):
+        purchase = self.buy(date(2024, 1, 1), '100', '10')
+        redemption = self.sell(date(2024, 3, 1), '40', '30')
+
+        redemption.delete()
+
+        self.assertEqual(PurchaseLot.objects.get(purchase=purchase).remaining_quantity, Decimal('100'))
+        self.assertFalse(LotConsumption.objects.exists())
+
+    def test_rebuild_command_replays_from_date(self):
+        self.buy(date(2024, 1, 1), '100', '10')
+        redemption = self.sell(date(2024, 3, 1), '40', '30')
+        # Simulate a ledger that predates the redemption
+        PurchaseLot.objects.all().delete()
+
+        call_command('rebuild_lots', from_date='2024-03-01', stdout=StringIO())
+
+        redemption.refresh_from_db()
+        self.assertEqual(redemption.cost_basis, Decimal('400.00'))
+        self.assertEqual(PurchaseLot.objects.get().remaining_quantity, Decimal('60'))
+
+
+class PortfolioHoldingsTest(TransactionTestData):
+
+    def test_holdings_for_many_funds_in_one_query(self):
+        other_fund = Fund.objects.create(name="Second Fund", manager_entity=self.entity, currency=self.currency)
+        self.buy(date(2024, 1, 1), '100', '10')
+        self.buy(date(2024, 2, 1), '100', '20')
+        self.sell(date(2024, 3, 1), '50', '30')
+        PurchaseTransaction.objects.create(
+            fund=other_fund, investee_company=self.company,
+            quantity=Decimal('10'), price_per_share=Decimal('5')
+        )
+
+        with self.assertNumQueries(1):
+            holdings = PortfolioService.get_fund_holdings([self.fund, other_fund.pk])
+
+        by_fund = {h.fund_id: h for h in holdings}
+        self.assertEqual(by_fund[self.fund.pk].quantity, Decimal('150'))
+        self.assertEqual(by_fund[self.fund.pk].avg_cost, Decimal('15'))
+        self.assertEqual(by_fund[self.fund.pk].company_name, "Lot Co")
+        self.assertEqual(by_fund[other_fund.pk].share_class_id, None)
+        self.assertEqual(by_fund[other_fund.pk].quantity, Decimal('10'))
+
+
+class MasterLedgerViewTest(TransactionTestData):
+
+    def test_ledger_is_scoped_to_active_entity_and_filters_by_kind(self):
+        other_entity = ManagerEntity.objects.create(name="Elsewhere")
+        other_fund = Fund.objects.create(name="Elsewhere Fund", manager_entity=other_entity, currency=self.currency)
+        self.buy(date(2025, 1, 1), '10', '5')
+        self.sell(date(2025, 2, 1), '4', '8')
+        PurchaseTransaction.objects.create(
+            fund=other_fund, investee_company=self.company, transaction_date=date(2025, 3, 1),
+            quantity=Decimal('1'), price_per_share=Decimal('1')
+        )
+        user = User.objects.create_user("ledger-viewer", password="pw")
+        self.client.force_login(user)
+        session = self.client.session
+        session['active_entity_id'] = self.entity.pk
+        session.save()
+
+        response = self.client.get(reverse('transaction-ledger'))
+        self.assertEqual([e.kind for e in response.context['entries']], ['REDEMPTION', 'PURCHASE'])
+
+        response = self.client.get(reverse('transaction-ledger'), {'kind': 'PURCHASE'})
+        self.assertEqual([e.fund_id for e in response.context['entries']], [self.fund.pk])
+
+        export = self.client.get(reverse('ledger-export'), {'format': 'ndjson'})
+        self.assertEqual(len(b''.join(export.streaming_content).splitlines()), 2)
+
+
+class CapitalCallServiceTest(TransactionTestData):
+
+    def setUp(self):
+        self.investors = [
+            Investor.objects.create(name=f"LP {n}", email=f"lp{n}@example.com", pan=f"CALLS{n:04d}X")
+            for n in range(3)
+        ]
+        for investor, committed in zip(self.investors, ('100.00', '200.00', '700.00')):
+            InvestorCommitment.objects.create(fund=self.fund, investor=investor, amount_committed=Decimal(committed))
+        # LP 2 has already been called for most of its commitment
+        CapitalCall.objects.create(
+            fund=self.fund, investor=self.investors[2], due_date=date(2025, 1, 31),
+            amount_called=Decimal('650.00'), purpose="Earlier", reference="CC-EARLIER"
+        )
+
+    def test_amount_is_split_pro_rata_and_respread_past_caps(self):
+        a, b, c = (investor.pk for investor in self.investors)
+        balances = CapitalCallService.balances(self.fund)
+        self.assertEqual(balances[c], (Decimal('700.00'), Decimal('50.00')))
+
+        self.assertEqual(
+            CapitalCallService.allocate(balances, amount=Decimal('300.00')),
+            {a: Decimal('83.33'), b: Decimal('166.67'), c: Decimal('50.00')},
+        )
+        self.assertEqual(
+            CapitalCallService.allocate(balances, percent=Decimal('10')),
+            {a: Decimal('10.00'), b: Decimal('20.00'), c: Decimal('50.00')},
+        )
+        with self.assertRaises(ValueError):
+            CapitalCallService.allocate(balances, amount=Decimal('350.01'))
+
+    def test_issue_bulk_creates_calls_and_refreshes_stats(self):
+        # Constant however many LPs: lock, two balance queries, one INSERT, stats refresh
+        with self.assertNumQueries(13):
+            calls = CapitalCallService.issue(
+                self.fund, date(2025, 3, 1), date(2025, 3, 31), "Drawdown 2", amount=Decimal('300.00')
+            )
+
+        self.assertEqual(len(calls), 3)
+        references = set(CapitalCall.objects.filter(purpose="Drawdown 2").values_list('reference', flat=True))
+        self.assertEqual(len(references), 3)
+        self.assertTrue(all(ref.startswith(f"CC-{self.fund.pk}-20250301-") for ref in references))
+        self.assertEqual(FundStats.objects.get(fund=self.fund).total_called, Decimal('950.00'))
+
+    def test_drawdown_view(self):
+        self.client.force_login(User.objects.create_user("caller", password="pw"))
+        url = reverse('funds:issue-drawdown', args=[self.fund.pk])
+        self.assertEqual(self.client.get(url).context['total_unfunded'], Decimal('350.00'))
+
+        response = self.client.post(url, {
+            'basis': 'PERCENT', 'value': '50', 'call_date': '2025-03-01',
+            'due_date': '2025-03-31', 'purpose': "Half call",
+        })
+        self.assertRedirects(response, reverse('funds:fund_detail', args=[self.fund.pk]), fetch_redirect_response=False)
+        self.assertEqual(
+            list(CapitalCall.objects.filter(purpose="Half call").order_by('investor_id').values_list('amount_called', flat=True)),
+            [Decimal('50.00'), Decimal('100.00'), Decimal('50.00')],
+        )
+
+        response = self.client.post(url, {
+            'basis': 'AMOUNT', 'value': '1000', 'call_date': '2025-03-01',
+            'due_date': '2025-03-31', 'purpose': "Too much",
+        })
+        self.assertIn('exceeds', str(response.context['form'].errors))
+
+
+class ReceiptProcessingTest(TransactionTestData):
+
+    def setUp(self):
+        self.investors = [
+            Investor.objects.create(name=f"Payer {n}", email=f"payer{n}@example.com", pan=f"PAYER{n:04d}X")
+            for n in range(2)
+        ]
+        NavSnapshot.objects.create(
+            fund=self.fund, as_on_date=date(2025, 3, 31), nav_per_unit=Decimal('12.5000'),
+            aum=Decimal('1000.00'), units_outstanding=Decimal('80.0000')
+        )
+        self.call = CapitalCall.objects.create(
+            fund=self.fund, investor=self.investors[0], due_date=date(2025, 4, 30),
+            amount_called=Decimal('250.00'), purpose="Close", reference="CC-CLOSE"
+        )
+
+    def receipt(self, investor, day, amount, call=None):
+        return DrawdownReceipt.objects.create(
+            fund=self.fund, investor=investor, capital_call=call, date_received=day,
+            amount_received=Decimal(amount), transaction_reference=f"UTR-{investor.pk}-{day:%m%d}-{amount}"
+        )
+
+    def test_batch_uses_nav_per_receipt_date_and_marks_calls_paid(self):
+        first, second = self.investors
+        receipts = [
+            self.receipt(first, date(2025, 3, 1), '100.00', self.call),  # before any NAV
+            self.receipt(first, date(2025, 4, 2), '150.00', self.call),
+            self.receipt(second, date(2025, 4, 2), '50.00'),
+        ]
+        ids = [r.pk for r in receipts]
+
+        with self.assertNumQueries(8):
+            issuances = TransactionService.process_receipts(ids)
+
+        self.assertEqual([i.nav_at_issuance for i in issuances], [Decimal('10.00'), Decimal('12.5000'), Decimal('12.5000')])
+        position = InvestorPosition.objects.get(fund=self.fund, investor=first)
+        self.assertEqual(position.total_units, Decimal('22.0000'))
+        self.assertEqual(position.total_capital_contributed, Decimal('250.00'))
+        self.call.refresh_from_db()
+        self.assertTrue(self.call.is_fully_paid)
+
+        # Already-issued receipts are skipped
+        self.assertEqual(TransactionService.process_receipts(ids), [])
+        self.assertEqual(UnitIssuance.objects.filter(position__fund=self.fund).count(), 3)
+
+    def test_issue_units_command_processes_pending_receipts(self):
+        self.receipt(self.investors[0], date(2025, 4, 2), '125.00', self.call)
+        self.receipt(self.investors[1], date(2025, 4, 2), '25.00')
+
+        out = StringIO()
+        call_command('issue_units', '--fund', str(self.fund.pk), stdout=out)
+        self.assertIn('Issued units for 2 receipts', out.getvalue())
+        self.call.refresh_from_db()
+        self.assertFalse(self.call.is_fully_paid)
+        self.assertEqual(
+            InvestorPosition.objects.get(investor=self.investors[1]).total_units, Decimal('2.0000')
+        )
+
+
+class WaterfallDistributionTest(TransactionTestData):
+
+    def setUp(self):
+        # Default terms: 8% hurdle, 100% catch-up, 20% carry
+        self.small, self.large = (
+            Investor.objects.create(name=f"Exit LP {n}", email=f"exit{n}@example.com", pan=f"EXITL{n:04d}X")
+            for n in range(2)
+        )
+        for investor, amount in ((self.small, '100.00'), (self.large, '300.00')):
+            DrawdownReceipt.objects.create(
+                fund=self.fund, investor=investor, date_received=date(2025, 1, 1),
+                amount_received=Decimal(amount), transaction_reference=f"UTR-EXIT-{investor.pk}"
+            )
+
+    def test_tiers_split_profit_at_carry_and_bulk_create_with_tds(self):
+        distributions, lines = DistributionService.issue(self.fund, date(2026, 1, 1), Decimal('600.00'))
+
+        small, large = sorted(lines, key=lambda line: line.contributed)
+        self.assertEqual(
+            (small.allocated, small.return_of_capital, small.preferred_return, small.catch_up, small.carry_split),
+            (Decimal('150.00'), Decimal('100.00'), Decimal('8.00'), Decimal('2.00'), Decimal('40.00')),
+        )
+        self.assertEqual((small.lp_amount, small.gp_amount), (Decimal('140.00'), Decimal('10.00')))
+        self.assertEqual((large.lp_amount, large.gp_amount), (Decimal('420.00'), Decimal('30.00')))
+
+        row = Distribution.objects.get(investor=self.small)
+        self.assertEqual((row.gross_amount, row.tds_deducted, row.carried_interest),
+                         (Decimal('140.00'), Decimal('4.00'), Decimal('10.00')))
+        self.assertEqual(FundStats.objects.get(fund=self.fund).total_distributed, Decimal('560.00'))
+
+        # Past the hurdle and fully caught up: later proceeds split 80/20
+        _, lines = DistributionService.issue(self.fund, date(2026, 6, 30), Decimal('40.00'))
+        small = min(lines, key=lambda line: line.contributed)
+        self.assertEqual((small.catch_up, small.lp_amount, small.gp_amount),
+                         (Decimal('0.00'), Decimal('8.00'), Decimal('2.00')))
+
+    def test_carry_leaves_fund_cash(self):
+        self.buy(date(2025, 2, 1), '100', '4.00')
+        self.sell(date(2025, 12, 1), '100', '6.00')
+        _, lines = DistributionService.issue(self.fund, date(2026, 1, 1), Decimal('600.00'))
+        self.assertEqual(sum(line.gp_amount for line in lines), Decimal('40.00'))
+
+        # 400 drawn - 400 invested + 600 exit - 560 to LPs - 40 carry
+        nav = compute_nav(date(2026, 1, 1), fund_ids=[self.fund.pk], persist=False)[self.fund.pk]
+        self.assertEqual((nav['cash_balance'], nav['net_assets']), (Decimal('0.00'), Decimal('0.00')))
+        rollup = compute_rollup(self.entity.pk)
+        self.assertEqual((rollup['total_carry'], rollup['cash_available']), (Decimal('40.00'), Decimal('0.00')))
+
+    def test_waterfall_view(self):
+        self.client.force_login(User.objects.create_user("distributor", password="pw"))
+        url = reverse('funds:distribute-waterfall', args=[self.fund.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        response = self.client.post(url, {
+            'amount': '400', 'distribution_date': '2025-06-30',
+            'distribution_type': 'PRINCIPAL', 'tds_rate': '10',
+        })
+        self.assertRedirects(response, reverse('funds:fund_detail', args=[self.fund.pk]), fetch_redirect_response=False)
+        # Proceeds below contributed capital are all return of capital: no carry, no TDS
+        self.assertEqual(
+            list(Distribution.objects.order_by('investor_id').values_list('gross_amount', 'tds_deducted', 'carried_interest')),
+            [(Decimal('100.00'), Decimal('0.00'), Decimal('0.00')), (Decimal('300.00'), Decimal('0.00'), Decimal('0.00'))],
+        )
@@ -9,4 +9,5 @@ urlpatterns = [
     path('add/investment/', views.create_investment, name='add-investment'),
     path('add/redemption/', views.create_redemption, name='add-redemption'),
     path('add/distribution/', views.create_distribution, name='add-distribution'),
+    path('ledger/export/', views.ledger_export, name='ledger-export'),
 ]
\ No newline at end of file
@@ -58,58 +58,22 @@ def calculate_fifo_cost_basis(redemption):
 
 def calculate_fifo_gain(redemption):
     """
-    Calculates cost basis for a redemption using FIFO method.
-    Matches redemptions against the earliest available purchase lots.
-    Returns: (cost_basis, realized_gain)
+    Returns (cost_basis, realized_gain) for a redemption from the persisted
+    FIFO lot ledger. The ledger is matched on save; a redemption that
+    predates the ledger is replayed from its own date first.
     """
     # Import inside function to avoid circular import with models.py
-    from .models import PurchaseTransaction, RedemptionTransaction
+    from django.db.models import Sum
+    from .services import LotLedgerService
 
-    # 1. Get all purchases for this specific asset, ordered by date
-    purchases = list(PurchaseTransaction.objects.filter(
-        fund=redemption.fund,
-        investee_company=redemption.investee_company,
-        share_class=redemption.share_class,
-        transaction_date__lte=redemption.transaction_date
-    ).order_by('transaction_date', 'id'))
-
-    # 2. Calculate how much has already been sold PRIOR to this transaction
-    prior_redemptions = RedemptionTransaction.objects.filter(
-        fund=redemption.fund,
-        investee_company=redemption.investee_company,
-        share_class=redemption.share_class,
-        transaction_date__lte=redemption.transaction_date
-    ).exclude(id=redemption.id)
+    if redemption.cost_basis is None:
+        LotLedgerService.replay(LotLedgerService.asset_key(redemption), redemption.transaction_date)
 
-    total_sold_previously = prior_redemptions.aggregate(Sum('quantity'))['quantity__sum'] or Decimal('0.00')
-    
-    # 3. FIFO Consumption Logic
-    remaining_qty_to_sell = redemption.quantity
-    cost_basis = Decimal('0.00')
-
-    # Fast-forward through purchases that were already fully sold
-    for p in purchases:
-        if remaining_qty_to_sell <= 0:
-            break
-            
-        available_in_lot = p.quantity
-        
-        if total_sold_previously >= available_in_lot:
-            # This lot was fully consumed by previous redemptions
-            total_sold_previously -= available_in_lot
-            continue
-        elif total_sold_previously > 0:
-            # This lot was partially consumed previously
-            available_in_lot -= total_sold_previously
-            total_sold_previously = Decimal('0.00')
-
-        # Now take from what's left in this lot for the CURRENT sale
-        qty_taken = min(available_in_lot, remaining_qty_to_sell)
-        cost_basis += qty_taken * p.price_per_share
-        remaining_qty_to_sell -= qty_taken
+    cost_basis = redemption.lot_consumptions.aggregate(
+        total=Sum('cost')
+    )['total'] or Decimal('0.00')
 
-    # 4. Calculate Gain
     sale_proceeds = redemption.quantity * redemption.price_per_share
     realized_gain = sale_proceeds - cost_basis
 
-    return cost_basis, realized_gain
\ No newline at end of file
+    return cost_basis, realized_gain
@@ -1,4 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Sum, Q, F
@@ -15,7 +16,6 @@ from .forms import (
     CapitalCallForm, DrawdownReceiptForm, PurchaseTransactionForm, 
     RedemptionForm, DistributionForm, InvestorCommitmentForm
 )
-from .utils import calculate_fifo_gain
 
 from .serializers import (
     CapitalCallSerializer, DrawdownReceiptSerializer, PurchaseSerializer, 
@@ -24,47 +24,50 @@ from .serializers import (
 
 from investors.models import Investor
 from funds.models import Fund
+from funds.services.ledger import LEDGER_KINDS, export_lines, iter_ledger, ledger_page
 
 
 # Services
-from .services import TransactionService
+from .services import TransactionService, PortfolioService
 
 # ==========================================
 # 1. API ViewSets (DRF)
 # ==========================================
 
 class InvestorCommitmentViewSet(viewsets.ModelViewSet):
-    queryset = InvestorCommitment.objects.all()
+    queryset = InvestorCommitment.objects.select_related('investor', 'fund__currency')
     serializer_class = InvestorCommitmentSerializer
     permission_classes = [IsAuthenticated]
 
 class CapitalCallViewSet(viewsets.ModelViewSet):
-    queryset = CapitalCall.objects.all()
+    queryset = CapitalCall.objects.select_related('investor', 'fund__currency')
     serializer_class = CapitalCallSerializer
     permission_classes = [IsAuthenticated]
 
 class PurchaseViewSet(viewsets.ModelViewSet):
-    queryset = PurchaseTransaction.objects.all()
+    queryset = PurchaseTransaction.objects.select_related('investee_company', 'fund__currency', 'currency')
     serializer_class = PurchaseSerializer
     permission_classes = [IsAuthenticated]
 
 class RedemptionViewSet(viewsets.ModelViewSet):
-    queryset = RedemptionTransaction.objects.all()
+    queryset = RedemptionTransaction.objects.select_related('investee_company', 'fund__currency')
     serializer_class = RedemptionSerializer
     permission_classes = [IsAuthenticated]
 
 class DrawdownReceiptViewSet(viewsets.ModelViewSet):
-    queryset = DrawdownReceipt.objects.all()
+    queryset = DrawdownReceipt.objects.select_related(
+        'fund__currency', 'capital_call__investor', 'capital_call__fund'
+    )
     serializer_class = DrawdownReceiptSerializer
     permission_classes = [IsAuthenticated]
 
 class InvestorUnitIssueViewSet(viewsets.ModelViewSet):
-    queryset = InvestorUnitIssue.objects.all()
+    queryset = InvestorUnitIssue.objects.select_related('investor', 'fund__currency')
     serializer_class = InvestorUnitIssueSerializer
     permission_classes = [IsAuthenticated]
 
 class DistributionViewSet(viewsets.ModelViewSet):
-    queryset = Distribution.objects.all()
+    queryset = Distribution.objects.select_related('investor', 'fund__currency')
     serializer_class = DistributionSerializer
     permission_classes = [IsAuthenticated]
 
@@ -103,18 +106,47 @@ def transaction_dashboard(request):
 @login_required
 def transaction_list(request):
     """
-    The 'Master Ledger' view.
+    The 'Master Ledger' view: every transaction of the active entity's funds
+    in one keyset-paginated stream, optionally narrowed with ?kind=.
     """
+    kind = request.GET.get('kind')
+    page = ledger_page(
+        _ledger_fund_ids(request),
+        kinds=[kind] if kind in LEDGER_KINDS else None,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
     return render(request, 'transactions/transactions_list.html', {
-        'commitments': InvestorCommitment.objects.all().select_related('investor', 'fund').order_by('-commitment_date'),
-        'calls': CapitalCall.objects.all().select_related('investor', 'fund').order_by('-call_date'),
-        'receipts': DrawdownReceipt.objects.all().select_related('investor', 'fund').order_by('-date_received'),
-        'investments': PurchaseTransaction.objects.all().order_by('-transaction_date'),
-        'redemptions': RedemptionTransaction.objects.all().order_by('-transaction_date'),
-        'distributions': Distribution.objects.all().order_by('-distribution_date')
+        'entries': page['rows'],
+        'next_cursor': page['next_cursor'],
+        'previous_cursor': page['previous_cursor'],
+        'kind': kind if kind in LEDGER_KINDS else '',
+        'ledger_kinds': LEDGER_KINDS.items(),
     })
 
 
+@login_required
+def ledger_export(request):
+    """Streams the Master Ledger as CSV (default) or NDJSON (?format=ndjson)."""
+    kind = request.GET.get('kind')
+    fmt = 'ndjson' if request.GET.get('format') == 'ndjson' else 'csv'
+    entries = iter_ledger(_ledger_fund_ids(request), kinds=[kind] if kind in LEDGER_KINDS else None)
+    response = StreamingHttpResponse(
+        export_lines(entries, fmt),
+        content_type='application/x-ndjson' if fmt == 'ndjson' else 'text/csv',
+    )
+    response['Content-Disposition'] = f'attachment; filename="ledger.{fmt}"'
+    return response
+
+
+def _ledger_fund_ids(request):
+    """Funds of the active manager entity (a subquery), or None for all funds."""
+    entity_id = getattr(request, 'active_entity_id', None)
+    if entity_id is None:
+        return None
+    return Fund.objects.filter(manager_entity_id=entity_id).values('pk')
+
+
 # ==========================================
 # 3. TRANSACTION ACTION VIEWS
 # ==========================================
@@ -196,16 +228,12 @@ def create_investment(request):
 def create_redemption(request):
     form = RedemptionForm(request.POST or None)
     if request.method == 'POST' and form.is_valid():
-        redemption = form.save(commit=False)
-        redemption.save()
+        redemption = form.save()
         
-        # FIFO Gain Calculation
-        cost, gain = calculate_fifo_gain(redemption)
-        redemption.cost_basis = cost
-        redemption.realized_gain = gain
-        redemption.save()
+        # FIFO Gain: matched against open lots by the ledger on save
+        redemption.refresh_from_db(fields=['cost_basis', 'realized_gain'])
         
-        messages.success(request, f"Redemption recorded. Realized Gain: {gain}")
+        messages.success(request, f"Redemption recorded. Realized Gain: {redemption.realized_gain}")
         return redirect('portal-transactions')
     return render(request, 'transactions/form_entry.html', {'form': form, 'title': 'Record Redemption (Sell)'})
 